@@ -1,16 +1,20 @@
 #![cfg_attr(not(debug_assertions), windows_subsystem = "windows")]
 
-use std::fs;
+use std::fs::{self, OpenOptions};
+use std::io::Write;
 use std::path::PathBuf;
 
 use serde::{Deserialize, Serialize};
 use scraper::{Html, Selector};
 use tauri::{path::BaseDirectory, AppHandle, Manager};
 
+const JOURNAL_FILE: &str = "edit_journal.jsonl";
+
 #[derive(Serialize, Deserialize)]
 struct StoredData {
-  menus: serde_json::Value,
-  items: serde_json::Value,
+  menus: Option<serde_json::Value>,
+  items: Option<serde_json::Value>,
+  journal: Vec<serde_json::Value>,
 }
 
 #[derive(Serialize, Deserialize)]
@@ -28,46 +32,59 @@ fn resolve_path(app: &AppHandle, filename: &str) -> Result<PathBuf, String> {
     .map_err(|err| err.to_string())
 }
 
+fn read_json(path: PathBuf) -> Result<Option<serde_json::Value>, String> {
+  if !path.exists() {
+    return Ok(None);
+  }
+  let raw = fs::read_to_string(path).map_err(|err| err.to_string())?;
+  serde_json::from_str(&raw).map(Some).map_err(|err| err.to_string())
+}
+
+/// Snapshot files saved by older versions plus every journaled edit, in order.
+/// A torn final line from an interrupted append is ignored.
 #[tauri::command]
 fn load_data(app: AppHandle) -> Result<Option<StoredData>, String> {
-  let menus_path = resolve_path(&app, "menus.json")?;
-  let items_path = resolve_path(&app, "menu_items_refactored.json")?;
+  let menus = read_json(resolve_path(&app, "menus.json")?)?;
+  let items = read_json(resolve_path(&app, "menu_items_refactored.json")?)?;
+
+  let journal_path = resolve_path(&app, JOURNAL_FILE)?;
+  let mut journal = Vec::new();
+  if journal_path.exists() {
+    let raw = fs::read_to_string(journal_path).map_err(|err| err.to_string())?;
+    let lines: Vec<&str> = raw.lines().filter(|line| !line.trim().is_empty()).collect();
+    for (index, line) in lines.iter().enumerate() {
+      match serde_json::from_str(line) {
+        Ok(entry) => journal.push(entry),
+        Err(_) if index + 1 == lines.len() => {}
+        Err(err) => return Err(err.to_string()),
+      }
+    }
+  }
 
-  if !menus_path.exists() || !items_path.exists() {
+  if menus.is_none() && items.is_none() && journal.is_empty() {
     return Ok(None);
   }
-
-  let menus_raw = fs::read_to_string(menus_path).map_err(|err| err.to_string())?;
-  let items_raw = fs::read_to_string(items_path).map_err(|err| err.to_string())?;
-
-  let menus: serde_json::Value =
-    serde_json::from_str(&menus_raw).map_err(|err| err.to_string())?;
-  let items: serde_json::Value =
-    serde_json::from_str(&items_raw).map_err(|err| err.to_string())?;
-
-  Ok(Some(StoredData { menus, items }))
+  Ok(Some(StoredData { menus, items, journal }))
 }
 
+/// Append one edit operation to the journal; scripts/edit_journal.py folds it
+/// into the data on rebuild.
 #[tauri::command]
-fn save_data(app: AppHandle, menus: serde_json::Value, items: serde_json::Value) -> Result<(), String> {
-  let menus_path = resolve_path(&app, "menus.json")?;
-  let items_path = resolve_path(&app, "menu_items_refactored.json")?;
-
-  if let Some(parent) = menus_path.parent() {
+fn append_edit(app: AppHandle, entry: serde_json::Value) -> Result<(), String> {
+  let journal_path = resolve_path(&app, JOURNAL_FILE)?;
+  if let Some(parent) = journal_path.parent() {
     fs::create_dir_all(parent).map_err(|err| err.to_string())?;
   }
 
-  fs::write(
-    menus_path,
-    serde_json::to_string_pretty(&menus).map_err(|err| err.to_string())?,
-  )
-  .map_err(|err| err.to_string())?;
-
-  fs::write(
-    items_path,
-    serde_json::to_string_pretty(&items).map_err(|err| err.to_string())?,
-  )
-  .map_err(|err| err.to_string())?;
+  let mut line = serde_json::to_string(&entry).map_err(|err| err.to_string())?;
+  line.push('\n');
+  let mut file = OpenOptions::new()
+    .create(true)
+    .append(true)
+    .open(journal_path)
+    .map_err(|err| err.to_string())?;
+  file.write_all(line.as_bytes()).map_err(|err| err.to_string())?;
+  file.sync_data().map_err(|err| err.to_string())?;
 
   Ok(())
 }
@@ -268,7 +285,7 @@ async fn scrape_recipe(url: String) -> Result<ScrapeResult, String> {
 fn main() {
   tauri::Builder::default()
     .plugin(tauri_plugin_shell::init())
-    .invoke_handler(tauri::generate_handler![load_data, save_data, scrape_recipe])
+    .invoke_handler(tauri::generate_handler![load_data, append_edit, scrape_recipe])
     .run(tauri::generate_context!())
     .expect("error while running tauri application");
 }
@@ -1,18 +1,99 @@
-import { useEffect, useMemo, useState } from 'react'
+import { useEffect, useMemo, useReducer, useState } from 'react'
 import './App.css'
 import RecipesPage from './RecipesPage'
 import MenuItemsPage from './MenuItemsPage'
 import type { Menu, MenuItem, Recipe, RefactoredMenuItem } from './types'
+import { appendEdit, dataReducer, itemKey, replayJournal } from './editJournal'
+import type { EditOp } from './editJournal'
+import { setNormalizationRules, titleKey } from './normalization'
 
 const BASE = import.meta.env.BASE_URL
 const UNSECTIONED_SECTION = 'Unsectioned'
 
-function normalize(text: string) {
-  return text
-    .toLowerCase()
-    .replace(/[^a-z0-9\s]/g, ' ')
-    .replace(/\s+/g, ' ')
-    .trim()
+type DataManifest = { files?: Record<string, { path: string }> }
+
+// publish_data.py maps each data file to a content-hashed copy that can be
+// cached indefinitely; fall back to the plain file when there is no manifest.
+async function loadManifest(): Promise<DataManifest | null> {
+  try {
+    const res = await fetch(`${BASE}data/manifest.json`, { cache: 'no-cache' })
+    return res.ok ? await res.json() : null
+  } catch {
+    return null
+  }
+}
+
+function dataUrl(manifest: DataManifest | null, name: string) {
+  return `${BASE}data/${manifest?.files?.[name]?.path ?? name}`
+}
+
+// recipes_index.json lists recipes without their bodies, which RecipesPage
+// fetches on selection; data published without it only has recipes.json.
+async function loadRecipes(manifest: DataManifest | null): Promise<Recipe[]> {
+  try {
+    const res = await fetch(dataUrl(manifest, 'recipes_index.json'))
+    if (res.ok) return withHashedBodies((await res.json()).recipes ?? [], manifest)
+  } catch {
+    // fall back to the full file
+  }
+  const res = await fetch(dataUrl(manifest, 'recipes.json'))
+  if (!res.ok) throw new Error('Failed to load data files')
+  return (await res.json()).recipes ?? []
+}
+
+// Bodies are published under hashed names too, so point each recipe at its copy.
+function withHashedBodies(recipes: Recipe[], manifest: DataManifest | null): Recipe[] {
+  if (!manifest?.files) return recipes
+  return recipes.map((r) => (r.body ? { ...r, body: manifest.files?.[r.body]?.path ?? r.body } : r))
+}
+
+type MenuShardManifest = { shards?: { shard: string }[] }
+
+// extract_menus.py also writes menus.json as per-year shards listed newest
+// first in menus/manifest.json. Returns the shard paths, or null when there
+// are none and the whole menus.json has to be loaded.
+async function loadMenuShardList(manifest: DataManifest | null): Promise<string[] | null> {
+  try {
+    const res = await fetch(dataUrl(manifest, 'menus/manifest.json'), { cache: 'no-cache' })
+    if (!res.ok) return null
+    const shards = ((await res.json()) as MenuShardManifest).shards?.map((s) => s.shard) ?? []
+    return shards.length ? shards : null
+  } catch {
+    return null
+  }
+}
+
+async function loadMenuShard(manifest: DataManifest | null, shard: string): Promise<Menu[]> {
+  const res = await fetch(dataUrl(manifest, shard))
+  if (!res.ok) throw new Error(`Failed to load ${shard}`)
+  return (await res.json()).menus ?? []
+}
+
+type RecipeMatches = {
+  item_to_recipe?: Record<string, { recipe: string }>
+  url_to_item?: Record<string, string>
+}
+
+// build_recipe_matches.py joins recipes to refactored items, keyed by item
+// key (URL or title::<title key>); without it no matches are shown.
+async function loadRecipeMatches(manifest: DataManifest | null): Promise<RecipeMatches> {
+  try {
+    const res = await fetch(dataUrl(manifest, 'recipe_matches.json'))
+    return res.ok ? await res.json() : {}
+  } catch {
+    return {}
+  }
+}
+
+// A menu line's item is keyed by its URLs (merged items by one of them), or
+// by its title when it has none, as in build_menu_items_refactored.py.
+function matchedRecipeFile(matches: RecipeMatches, item: MenuItem) {
+  const urls = [...item.links.map((link) => link.url), ...item.urls]
+  for (const key of urls.length ? urls : [`title::${titleKey(item.text)}`]) {
+    const match = matches.item_to_recipe?.[matches.url_to_item?.[key] ?? key]
+    if (match) return match.recipe
+  }
+  return null
 }
 
 function formatDate(iso: string | null) {
@@ -73,12 +154,14 @@ async function openExternal(url: string) {
 }
 
 function App() {
-  const [menus, setMenus] = useState<Menu[]>([])
+  const [data, dispatch] = useReducer(dataReducer, { menus: [], items: [] })
+  const { menus, items: menuItems } = data
   const [recipes, setRecipes] = useState<Recipe[]>([])
-  const [menuItems, setMenuItems] = useState<RefactoredMenuItem[]>([])
+  const [recipeMatches, setRecipeMatches] = useState<RecipeMatches>({})
   const [selectedFile, setSelectedFile] = useState<string | null>(null)
   const [status, setStatus] = useState<'loading' | 'ready' | 'error'>('loading')
   const [errorMessage, setErrorMessage] = useState<string | null>(null)
+  const [notice, setNotice] = useState<string | null>(null)
   const [currentPage, setCurrentPage] = useState<'menus' | 'recipes' | 'items'>('items')
   const [confirmDeleteFile, setConfirmDeleteFile] = useState<string | null>(null)
 
@@ -100,6 +183,7 @@ function App() {
         return await invoke<{
           menus?: { menus?: Menu[] } | null
           items?: { items?: RefactoredMenuItem[] } | null
+          journal?: EditOp[]
         }>('load_data')
       } catch {
         return null
@@ -109,27 +193,61 @@ function App() {
     async function load() {
       try {
         setStatus('loading')
-        const desktopData = await loadDesktopData()
-        const [menusRes, recipesRes, itemsRes] = await Promise.all([
-          desktopData ? Promise.resolve(null) : fetch(`${BASE}data/menus.json`),
-          fetch(`${BASE}data/recipes.json`),
-          desktopData ? Promise.resolve(null) : fetch(`${BASE}data/menu_items_refactored.json`),
+        const manifestLoad = loadManifest()
+        const [desktopData, manifest, shardList] = await Promise.all([
+          loadDesktopData(),
+          manifestLoad,
+          manifestLoad.then(loadMenuShardList),
+        ])
+        // Journal edits can touch any week, so replaying them needs every shard;
+        // otherwise the newest year is enough to start and the rest follow.
+        const shards = desktopData?.menus ? null : shardList
+        const eager = desktopData?.journal?.length ? shards ?? [] : (shards ?? []).slice(0, 1)
+        const deferred = (shards ?? []).slice(eager.length)
+        const [menusRes, shardMenus, recipesList, matches, itemsRes, rulesRes] = await Promise.all([
+          desktopData?.menus || shards ? Promise.resolve(null) : fetch(dataUrl(manifest, 'menus.json')),
+          Promise.all(eager.map((shard) => loadMenuShard(manifest, shard))),
+          loadRecipes(manifest),
+          loadRecipeMatches(manifest),
+          desktopData?.items
+            ? Promise.resolve(null)
+            : fetch(dataUrl(manifest, 'menu_items_refactored.json')),
+          fetch(dataUrl(manifest, 'normalization_rules.json')).catch(() => null),
         ])
 
-        if ((!desktopData && (!menusRes?.ok || !itemsRes?.ok)) || !recipesRes.ok) {
+        if ((menusRes && !menusRes.ok) || (itemsRes && !itemsRes.ok)) {
           throw new Error('Failed to load data files')
         }
 
-        const menusJson = desktopData?.menus ?? (await menusRes?.json())
-        const recipesJson = await recipesRes.json()
+        const menusJson = desktopData?.menus ?? (shards ? { menus: shardMenus.flat() } : await menusRes?.json())
         const itemsJson = desktopData?.items ?? (await itemsRes?.json())
+        // Item keys in the journal must match the pipeline's, so load its rules first.
+        if (rulesRes?.ok) setNormalizationRules(await rulesRes.json())
+        const state = replayJournal(
+          { menus: menusJson?.menus ?? [], items: itemsJson?.items ?? [] },
+          desktopData?.journal ?? []
+        )
 
         if (!cancelled) {
-          setMenus(menusJson.menus ?? [])
-          setRecipes(recipesJson.recipes ?? [])
-          setMenuItems(itemsJson.items ?? [])
+          dispatch({ type: 'loaded', state })
+          setRecipes(recipesList)
+          setRecipeMatches(matches)
           setStatus('ready')
         }
+
+        if (deferred.length) {
+          try {
+            const older = (await Promise.all(deferred.map((shard) => loadMenuShard(manifest, shard)))).flat()
+            if (!cancelled) {
+              dispatch({ type: 'more_menus', menus: older })
+            }
+          } catch (err) {
+            // The app is already usable; say what is missing instead of failing.
+            if (!cancelled) {
+              setNotice(`Older menus could not be loaded: ${err instanceof Error ? err.message : 'Unknown error'}`)
+            }
+          }
+        }
       } catch (err) {
         if (!cancelled) {
           setStatus('error')
@@ -144,103 +262,36 @@ function App() {
     }
   }, [])
 
+  function commitEdit(edit: EditOp) {
+    // One reducer over menus and items: onAddItem can fire after an await,
+    // from an older render, and the edit must see both as they are now.
+    dispatch({ type: 'edit', edit })
+    appendEdit(edit).catch((err) => {
+      setNotice(
+        `This change is shown but was not saved and will be lost on restart: ${
+          err instanceof Error ? err.message : 'Unknown error'
+        }`
+      )
+    })
+  }
+
   function handleSaveMenu(menu: Menu, updatedItems: RefactoredMenuItem[]) {
-    const nextMenus = [menu, ...menus]
-    setMenus(nextMenus)
-    setMenuItems(updatedItems)
-    persistDesktopData(nextMenus, updatedItems)
+    const itemKeys = updatedItems
+      .filter((item) => (item.menu_files ?? []).includes(menu.file))
+      .map(itemKey)
+      .filter((key): key is string => key !== null)
+    commitEdit({ op: 'add_menu', menu, item_keys: itemKeys })
   }
 
   function handleDeleteMenu(menu: Menu) {
-    const nextMenus = menus.filter((entry) => entry.file !== menu.file)
-    const targetWeek = menu.week_of_date
-    const nextItems = menuItems.map((item) => {
-      const menuFiles = (item.menu_files ?? []).filter((file) => file !== menu.file)
-      const menuWeeks = targetWeek
-        ? (item.menu_weeks ?? []).filter((week) => week !== targetWeek)
-        : item.menu_weeks ?? []
-      const menuSeasons = Array.from(
-        new Set(
-          (menuWeeks ?? [])
-            .map((week) => seasonLabel(week))
-            .filter((season) => season && season !== 'Anytime')
-            .map((season) => season.toLowerCase())
-        )
-      )
-      return {
-        ...item,
-        menu_files: menuFiles,
-        menu_weeks: menuWeeks,
-        menu_seasons: menuSeasons,
-        count: menuFiles.length || menuWeeks.length || 0,
-      }
-    })
-
-    setMenus(nextMenus)
-    setMenuItems(nextItems)
+    commitEdit({ op: 'delete_menu', file: menu.file })
     if (confirmDeleteFile === menu.file) {
       setConfirmDeleteFile(null)
     }
-    persistDesktopData(nextMenus, nextItems)
   }
 
   function handleAddItem(newItem: RefactoredMenuItem) {
-    setMenuItems((prev) => {
-      const existingIndex = prev.findIndex(
-        (item) =>
-          (item.url && item.url === newItem.url) ||
-          (item.urls ?? []).includes(newItem.url ?? '')
-      )
-      if (existingIndex === -1) {
-        const nextItems = [newItem, ...prev]
-        persistDesktopData(menus, nextItems)
-        return nextItems
-      }
-      const updated = prev.map((item, index) => {
-        if (index !== existingIndex) return item
-        const urls = Array.from(new Set([...(item.urls ?? []), ...(newItem.urls ?? [])]))
-        const link_texts = Array.from(
-          new Set([...(item.link_texts ?? []), ...(newItem.link_texts ?? [])])
-        )
-        const item_texts = Array.from(
-          new Set([...(item.item_texts ?? []), ...(newItem.item_texts ?? [])])
-        )
-        const source_hints = Array.from(
-          new Set([...(item.source_hints ?? []), ...(newItem.source_hints ?? [])])
-        )
-        const recipe_tags = Array.from(
-          new Set([...(item.recipe_tags ?? []), ...(newItem.recipe_tags ?? [])])
-        )
-        return {
-          ...item,
-          url: newItem.url ?? item.url,
-          urls,
-          link_texts,
-          item_texts,
-          source_hints,
-          ingredients: newItem.ingredients?.length ? newItem.ingredients : item.ingredients,
-          recipe_tags,
-          main_protein: newItem.main_protein || item.main_protein,
-        }
-      })
-      persistDesktopData(menus, updated)
-      return updated
-    })
-  }
-
-  function persistDesktopData(nextMenus: Menu[], nextItems: RefactoredMenuItem[]) {
-    void (async () => {
-      try {
-        const mod = await import('@tauri-apps/api/core')
-        const invoke = mod.invoke as <T>(cmd: string, args?: Record<string, unknown>) => Promise<T>
-        await invoke('save_data', {
-          menus: { menus: nextMenus },
-          items: { items: nextItems },
-        })
-      } catch {
-        // ignore persistence errors
-      }
-    })()
+    commitEdit({ op: 'upsert_item', item: newItem })
   }
 
   const sortedMenus = useMemo(() => {
@@ -262,15 +313,6 @@ function App() {
 
   const selectedMenu = sortedMenus.find((menu) => menu.file === selectedFile) ?? null
 
-  const recipeIndex = useMemo(() => {
-    return recipes
-      .filter((recipe) => recipe.title)
-      .map((recipe) => ({
-        recipe,
-        normalized: normalize(recipe.title ?? ''),
-      }))
-  }, [recipes])
-
   const menuStats = useMemo(() => {
     if (!selectedMenu) return null
     const total = selectedMenu.items.length
@@ -302,6 +344,14 @@ function App() {
 
   return (
     <>
+      {notice && (
+        <div className="app-notice" role="alert">
+          <span>{notice}</span>
+          <button type="button" onClick={() => setNotice(null)}>
+            Dismiss
+          </button>
+        </div>
+      )}
       {currentPage === 'recipes' ? (
         <RecipesPage
           recipes={recipes}
@@ -436,10 +486,7 @@ function App() {
                     )}
                     <ul>
                       {items.map((item, index) => {
-                        const normalizedItem = normalize(item.text)
-                        const matched = recipeIndex.find((entry) =>
-                          normalizedItem.includes(entry.normalized)
-                        )
+                        const matched = matchedRecipeFile(recipeMatches, item)
                         return (
                           <li key={`${section}-${index}`}>
                             <div className="item-row">
@@ -451,7 +498,7 @@ function App() {
                                   {item.source_hint && !isUrl(item.source_hint) && (
                                     <span className="pill">{item.source_hint}</span>
                                   )}
-                                  {matched?.recipe.title && (
+                                  {matched && (
                                     <span className="pill accent">Recipe match</span>
                                   )}
                                 </div>
@@ -1,6 +1,7 @@
 import { useMemo, useState } from 'react'
 import './MenuItemsPage.css'
 import type { Menu, MenuItem, RefactoredMenuItem } from './types'
+import { ingredientKey } from './normalization'
 
 function getSiteName(url: string | null): string {
   if (!url) return 'No link'
@@ -143,7 +144,7 @@ export default function MenuItemsPage({
           const title = item.link_texts?.[0] ?? item.item_texts?.[0] ?? 'Untitled item'
           const lines = (item.ingredients ?? [])
             .filter(Boolean)
-            .filter((ingredient) => !removedIngredients.has(normalizeIngredientKey(ingredient)))
+            .filter((ingredient) => !removedIngredients.has(ingredientKey(ingredient)))
             .map((ingredient) => `- [ ] ${ingredient}`)
           return `## ${title}\n${lines.length ? lines.join('\n') : '_No ingredients listed._'}`
         })
@@ -155,8 +156,8 @@ export default function MenuItemsPage({
     menuSelections.forEach((item) => {
       item.ingredients?.forEach((ingredient) => {
         if (!ingredient) return
-        if (removedIngredients.has(normalizeIngredientKey(ingredient))) return
-        const key = normalizeIngredientKey(ingredient)
+        const key = ingredientKey(ingredient)
+        if (removedIngredients.has(key)) return
         if (!ingredientMap.has(key)) {
           ingredientMap.set(key, ingredient)
         }
@@ -305,17 +306,6 @@ export default function MenuItemsPage({
     return `# Ingredients - ${dateStamp}\n\n${content}\n`
   }
 
-  function normalizeIngredientKey(value: string) {
-    return value
-      .trim()
-      .toLowerCase()
-      .replace(/[–—]/g, '-')
-      .replace(/\s+/g, ' ')
-      .replace(/\b(tablespoons?)\b/g, 'tablespoon')
-      .replace(/\b(teaspoons?)\b/g, 'teaspoon')
-      .replace(/\s+/, ' ')
-  }
-
   function downloadMarkdown(filename: string, content: string) {
     const blob = new Blob([content], { type: 'text/markdown;charset=utf-8' })
     const url = URL.createObjectURL(blob)
@@ -425,7 +415,7 @@ export default function MenuItemsPage({
     menuSelections.forEach((item) => {
       item.ingredients?.forEach((ingredient) => {
         if (!ingredient) return
-        const key = normalizeIngredientKey(ingredient)
+        const key = ingredientKey(ingredient)
         if (removedIngredients.has(key)) return
         if (!ingredientMap.has(key)) {
           ingredientMap.set(key, ingredient)
@@ -575,13 +565,13 @@ export default function MenuItemsPage({
       const title = item.link_texts?.[0] ?? item.item_texts?.[0] ?? 'Untitled item'
       const items = (item.ingredients ?? [])
         .filter(Boolean)
-        .filter((ingredient) => !removedIngredients.has(normalizeIngredientKey(ingredient)))
+        .filter((ingredient) => !removedIngredients.has(ingredientKey(ingredient)))
       return { section: title, items }
     })
   }
 
   function handleRemoveIngredient(ingredient: string) {
-    const key = normalizeIngredientKey(ingredient)
+    const key = ingredientKey(ingredient)
     setRemovedIngredients((prev) => {
       const next = new Set(prev)
       next.add(key)
@@ -1,14 +1,6 @@
-import { useMemo, useState } from 'react'
+import { useEffect, useMemo, useRef, useState } from 'react'
 import './RecipesPage.css'
-
-type Recipe = {
-  file: string
-  title: string | null
-  links: { text: string; url: string }[]
-  urls: string[]
-  attachments: { text: string; url: string }[]
-  text: string
-}
+import type { Recipe } from './types'
 
 const BASE = import.meta.env.BASE_URL
 
@@ -69,13 +61,10 @@ function parseRecipeContent(text: string) {
 }
 
 function extractImagePath(attachment: { text: string; url: string }) {
-  // Extract just the image filename from the attachment URL
-  const url = attachment.url
-  if (url.startsWith('attachments/') || url.startsWith('../attachments/')) {
-    const filename = url.split('/').pop()
-    return `${BASE}images/${filename}`
-  }
-  return null
+  // attachments/<file> is public/images/<file>, the content-addressed image store
+  // (see scripts/build_image_store.py).
+  const match = attachment.url.match(/^(?:\.\.\/)?attachments\/(.+)$/)
+  return match ? `${BASE}images/${match[1]}` : null
 }
 
 function extractSourceUrl(recipe: Recipe): string | null {
@@ -119,6 +108,9 @@ interface RecipesPageProps {
 
 export default function RecipesPage({ recipes, onViewMenus, onViewItems }: RecipesPageProps) {
   const [selectedRecipe, setSelectedRecipe] = useState<Recipe | null>(null)
+  // Bodies fetched from recipe_bodies/, by body path; a null entry failed to load.
+  const [bodies, setBodies] = useState<Record<string, string | null>>({})
+  const requestedBodies = useRef(new Set<string>())
 
   const sortedRecipes = useMemo(() => {
     return [...recipes]
@@ -128,10 +120,27 @@ export default function RecipesPage({ recipes, onViewMenus, onViewItems }: Recip
 
   const displayedRecipe = selectedRecipe ?? (sortedRecipes.length > 0 ? sortedRecipes[0] : null)
 
+  const bodyPath = displayedRecipe?.text === undefined ? displayedRecipe?.body : undefined
+
+  useEffect(() => {
+    if (!bodyPath || requestedBodies.current.has(bodyPath)) return
+    requestedBodies.current.add(bodyPath)
+    fetch(`${BASE}data/${bodyPath}`)
+      .then((res) => (res.ok ? res.text() : null))
+      .catch(() => null)
+      .then((text) => {
+        // Selecting the recipe again retries a failed load.
+        if (text === null) requestedBodies.current.delete(bodyPath)
+        setBodies((prev) => ({ ...prev, [bodyPath]: text }))
+      })
+  }, [bodyPath])
+
+  const recipeText = displayedRecipe?.text ?? (bodyPath ? bodies[bodyPath] : '')
+
   const recipeContent = useMemo(() => {
-    if (!displayedRecipe) return null
-    return parseRecipeContent(displayedRecipe.text)
-  }, [displayedRecipe])
+    if (typeof recipeText !== 'string') return null
+    return parseRecipeContent(recipeText)
+  }, [recipeText])
 
   const recipeImage = useMemo(() => {
     if (!displayedRecipe) return null
@@ -241,9 +250,14 @@ export default function RecipesPage({ recipes, onViewMenus, onViewItems }: Recip
                   </div>
                 )}
 
-                {(!recipeContent || (recipeContent.ingredients.length === 0 && recipeContent.instructions.length === 0)) && (
+                {recipeText === undefined && <div className="loading">Loading recipe…</div>}
+
+                {recipeText === null && <div className="error">Failed to load this recipe.</div>}
+
+                {typeof recipeText === 'string' &&
+                  (!recipeContent || (recipeContent.ingredients.length === 0 && recipeContent.instructions.length === 0)) && (
                   <div className="raw-content">
-                    <pre>{displayedRecipe.text}</pre>
+                    <pre>{recipeText}</pre>
                   </div>
                 )}
               </div>
@@ -0,0 +1,155 @@
+import type { Menu, RefactoredMenuItem } from './types'
+import { titleKey } from './normalization'
+
+// Desktop edits are appended to an edit journal (see scripts/edit_journal.py)
+// instead of rewriting the data files. The same reducer applies an edit live
+// and replays the journal on load, and every operation is idempotent, so
+// replaying onto data a rebuild already folded the journal into is harmless.
+export type EditOp =
+  | { op: 'add_menu'; menu: Menu; item_keys: string[] }
+  | { op: 'delete_menu'; file: string }
+  | { op: 'upsert_item'; item: RefactoredMenuItem }
+
+export type EditState = { menus: Menu[]; items: RefactoredMenuItem[] }
+
+function unique<T>(values: T[]) {
+  return Array.from(new Set(values))
+}
+
+// Mirrors item_key in scripts/build_menu_items_refactored.py.
+export function itemKey(item: RefactoredMenuItem) {
+  if (item.url) return item.url
+  const title = [...(item.link_texts ?? []), ...(item.item_texts ?? [])].find((text) => text?.trim())
+  return title ? `title::${titleKey(title.trim())}` : null
+}
+
+export function seasonOf(iso: string | null) {
+  if (!iso) return null
+  const date = new Date(`${iso}T00:00:00`)
+  if (Number.isNaN(date.getTime())) return null
+  const month = date.getMonth() + 1
+  if (month <= 2 || month === 12) return 'winter'
+  if (month >= 3 && month <= 5) return 'spring'
+  if (month >= 6 && month <= 8) return 'summer'
+  return 'fall'
+}
+
+function addMenu(state: EditState, menu: Menu, itemKeys: string[]): EditState {
+  const keys = new Set(itemKeys)
+  const season = seasonOf(menu.week_of_date)
+  const items = state.items.map((item) => {
+    const key = itemKey(item)
+    if (!key || !keys.has(key)) return item
+    const menuFiles = unique([...(item.menu_files ?? []), menu.file])
+    const menuWeeks = menu.week_of_date
+      ? unique([...(item.menu_weeks ?? []), menu.week_of_date])
+      : item.menu_weeks ?? []
+    const menuSeasons = season ? unique([...(item.menu_seasons ?? []), season]) : item.menu_seasons ?? []
+    return {
+      ...item,
+      menu_files: menuFiles,
+      menu_weeks: menuWeeks,
+      menu_seasons: menuSeasons,
+      count: menuFiles.length || menuWeeks.length || item.count,
+    }
+  })
+  return { menus: [menu, ...state.menus.filter((entry) => entry.file !== menu.file)], items }
+}
+
+function deleteMenu(state: EditState, file: string): EditState {
+  const menu = state.menus.find((entry) => entry.file === file)
+  const targetWeek = menu?.week_of_date ?? null
+  const items = state.items.map((item) => {
+    if (!(item.menu_files ?? []).includes(file)) return item
+    const menuFiles = (item.menu_files ?? []).filter((entry) => entry !== file)
+    const menuWeeks = targetWeek
+      ? (item.menu_weeks ?? []).filter((week) => week !== targetWeek)
+      : item.menu_weeks ?? []
+    const menuSeasons = unique(
+      menuWeeks.map((week) => seasonOf(week)).filter((season): season is string => !!season)
+    )
+    return {
+      ...item,
+      menu_files: menuFiles,
+      menu_weeks: menuWeeks,
+      menu_seasons: menuSeasons,
+      count: menuFiles.length || menuWeeks.length || 0,
+    }
+  })
+  return { menus: state.menus.filter((entry) => entry.file !== file), items }
+}
+
+function upsertItem(state: EditState, newItem: RefactoredMenuItem): EditState {
+  const existingIndex = state.items.findIndex(
+    (item) =>
+      (item.url && item.url === newItem.url) || (item.urls ?? []).includes(newItem.url ?? '')
+  )
+  if (existingIndex === -1) {
+    return { ...state, items: [newItem, ...state.items] }
+  }
+  const items = state.items.map((item, index) => {
+    if (index !== existingIndex) return item
+    return {
+      ...item,
+      url: newItem.url ?? item.url,
+      urls: unique([...(item.urls ?? []), ...(newItem.urls ?? [])]),
+      link_texts: unique([...(item.link_texts ?? []), ...(newItem.link_texts ?? [])]),
+      item_texts: unique([...(item.item_texts ?? []), ...(newItem.item_texts ?? [])]),
+      source_hints: unique([...(item.source_hints ?? []), ...(newItem.source_hints ?? [])]),
+      ingredients: newItem.ingredients?.length ? newItem.ingredients : item.ingredients,
+      recipe_tags: unique([...(item.recipe_tags ?? []), ...(newItem.recipe_tags ?? [])]),
+      main_protein: newItem.main_protein || item.main_protein,
+    }
+  })
+  return { ...state, items }
+}
+
+export function applyEdit(state: EditState, edit: EditOp): EditState {
+  switch (edit.op) {
+    case 'add_menu':
+      return addMenu(state, edit.menu, edit.item_keys ?? [])
+    case 'delete_menu':
+      return deleteMenu(state, edit.file)
+    case 'upsert_item':
+      return upsertItem(state, edit.item)
+    default:
+      // Operations written by the Python tooling are folded in on rebuild.
+      return state
+  }
+}
+
+export function replayJournal(state: EditState, journal: EditOp[]) {
+  return journal.reduce(applyEdit, state)
+}
+
+// Menus and items change together (deleting a menu reads its week to clean
+// up the items), so the app keeps them in one reducer rather than two states.
+export type DataAction =
+  | { type: 'loaded'; state: EditState }
+  | { type: 'more_menus'; menus: Menu[] }
+  | { type: 'edit'; edit: EditOp }
+
+export function dataReducer(state: EditState, action: DataAction): EditState {
+  switch (action.type) {
+    case 'loaded':
+      return action.state
+    case 'more_menus': {
+      const loaded = new Set(state.menus.map((menu) => menu.file))
+      return { ...state, menus: [...state.menus, ...action.menus.filter((menu) => !loaded.has(menu.file))] }
+    }
+    case 'edit':
+      return applyEdit(state, action.edit)
+  }
+}
+
+// Resolves without writing outside the desktop app; rejects when the desktop
+// journal write fails, so the caller can tell the user the edit was not saved.
+export async function appendEdit(edit: EditOp) {
+  const mod = await import('@tauri-apps/api/core')
+  if (!mod.isTauri()) return
+  try {
+    await mod.invoke('append_edit', { entry: { at: new Date().toISOString(), ...edit } })
+  } catch (err) {
+    throw new Error(err instanceof Error ? err.message : String(err))
+  }
+}
@@ -0,0 +1,80 @@
+// Key normalization shared with the pipeline. The rules are exported by
+// scripts/normalization.py to data/normalization_rules.json; the defaults
+// below match them so keys are still right before (or without) that file.
+export type NormalizationRules = {
+  key?: {
+    lowercase?: boolean
+    keep?: string
+    collapse_whitespace?: boolean
+    fixups?: [string, string][]
+  }
+  ingredient?: {
+    lowercase?: boolean
+    dashes?: Record<string, string>
+    collapse_whitespace?: boolean
+    unit_synonyms?: Record<string, string>
+  }
+}
+
+let keyRules = {
+  lowercase: true,
+  keep: new Set('abcdefghijklmnopqrstuvwxyz0123456789'),
+  collapseWhitespace: true,
+  fixups: [['cous cous', 'couscous']] as [string, string][],
+}
+
+let ingredientRules = {
+  lowercase: true,
+  dashes: { '–': '-', '—': '-' } as Record<string, string>,
+  collapseWhitespace: true,
+  unitSynonyms: { tablespoons: 'tablespoon', teaspoons: 'teaspoon' } as Record<string, string>,
+}
+
+export function setNormalizationRules(rules: NormalizationRules | null | undefined) {
+  const key = rules?.key
+  if (key) {
+    keyRules = {
+      lowercase: key.lowercase ?? keyRules.lowercase,
+      keep: key.keep ? new Set(key.keep) : keyRules.keep,
+      collapseWhitespace: key.collapse_whitespace ?? keyRules.collapseWhitespace,
+      fixups: key.fixups ?? keyRules.fixups,
+    }
+  }
+  const ingredient = rules?.ingredient
+  if (ingredient) {
+    ingredientRules = {
+      lowercase: ingredient.lowercase ?? ingredientRules.lowercase,
+      dashes: ingredient.dashes ?? ingredientRules.dashes,
+      collapseWhitespace: ingredient.collapse_whitespace ?? ingredientRules.collapseWhitespace,
+      unitSynonyms: ingredient.unit_synonyms ?? ingredientRules.unitSynonyms,
+    }
+  }
+}
+
+// Mirrors normalize_key in scripts/normalization.py.
+export function normalizeKey(text: string) {
+  const lowered = keyRules.lowercase ? text.toLowerCase() : text
+  let key = Array.from(lowered, (char) => (keyRules.keep.has(char) ? char : ' ')).join('')
+  key = keyRules.collapseWhitespace ? key.split(/\s+/).filter(Boolean).join(' ') : key
+  if (!key) return key
+  let padded = ` ${key} `
+  for (const [variant, canonical] of keyRules.fixups) {
+    padded = padded.split(` ${variant} `).join(` ${canonical} `)
+  }
+  return padded.slice(1, -1)
+}
+
+// Mirrors title_key in scripts/normalization.py.
+export function titleKey(title: string) {
+  return normalizeKey(title) || title.trim().toLowerCase()
+}
+
+// Mirrors ingredient_key in scripts/normalization.py.
+export function ingredientKey(text: string) {
+  const lowered = ingredientRules.lowercase ? text.toLowerCase() : text
+  let key = Array.from(lowered, (char) => ingredientRules.dashes[char] ?? char).join('')
+  key = ingredientRules.collapseWhitespace ? key.split(/\s+/).filter(Boolean).join(' ') : key
+  const units = Object.keys(ingredientRules.unitSynonyms)
+  if (!units.length) return key
+  return key.replace(new RegExp(`\\b(${units.join('|')})\\b`, 'g'), (unit) => ingredientRules.unitSynonyms[unit])
+}
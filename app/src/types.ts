@@ -20,7 +20,10 @@ export type Recipe = {
   links: { text: string; url: string }[]
   urls: string[]
   attachments: { text: string; url: string }[]
-  text: string
+  // recipes.json carries the note text; recipes_index.json instead names the
+  // recipe_bodies/ file to fetch when the recipe is opened.
+  text?: string
+  body?: string
 }
 
 export type RefactoredMenuItem = {
@@ -1,7 +1,11 @@
 import json
-import re
 from pathlib import Path
 
+from extract_menus import write_menu_shards
+from generations import write_text_atomic
+from normalization import normalize_key
+from profiling import run_cli
+
 DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "menus.json"
 APP_DATA_PATH = Path(__file__).resolve().parents[1] / "app" / "public" / "data" / "menus.json"
 
@@ -285,26 +289,15 @@ MAPPING = {
 }
 
 
-def normalize(text: str):
-    text = text.lower()
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    text = " ".join(text.split())
-    text = text.replace("cous cous", "couscous")
-    text = text.replace("bbq", "bbq")
-    return text
-
-
-def main():
-    data = json.loads(DATA_PATH.read_text(encoding="utf-8"))
-    menus = data.get("menus", [])
-
+def add_auto_links(menus):
+    """Attach MAPPING links to unlinked menu lines in place; returns the number added."""
     added = 0
     for menu in menus:
         for item in menu.get("items", []):
             if item.get("links") or item.get("urls"):
                 continue
             text = item.get("text", "")
-            norm = normalize(text)
+            norm = normalize_key(text)
             for key, info in MAPPING.items():
                 if norm.startswith(key) or key in norm:
                     item.setdefault("links", []).append({
@@ -314,12 +307,22 @@ def main():
                     })
                     added += 1
                     break
+    return added
+
+
+def main():
+    data = json.loads(DATA_PATH.read_text(encoding="utf-8"))
+    menus = data.get("menus", [])
+
+    added = add_auto_links(menus)
 
-    DATA_PATH.write_text(json.dumps({"menus": menus}, indent=2, ensure_ascii=True), encoding="utf-8")
-    APP_DATA_PATH.write_text(json.dumps({"menus": menus}, indent=2, ensure_ascii=True), encoding="utf-8")
+    write_text_atomic(DATA_PATH, json.dumps({"menus": menus}, indent=2, ensure_ascii=True))
+    write_text_atomic(APP_DATA_PATH, json.dumps({"menus": menus}, indent=2, ensure_ascii=True))
+    write_menu_shards(menus, DATA_PATH.parent)
+    write_menu_shards(menus, APP_DATA_PATH.parent)
 
     print(f"Auto-added links: {added}")
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for recipe images.
+
+app/public/images is the one tracked copy of every recipe image, stored as
+<sha256[:16]><ext>. The app serves it directly and docs/images is a symlink to
+it, so each image is held once no matter how many trees show it.
+
+Recipes/images is the untracked drop folder for note exports (<UUID>.jpeg).
+Each export is hashed and copied into the store unless an object with that
+hash is already there (a copy, so editing an export in place never changes an
+object under its old hash), and data/image_names.json, the tracked map from
+export name to stored name, is updated. extract_menus.py rewrites recipe
+attachments through that map (attachments/<stored name>), and this script
+does the same for the docs snapshot (docs/data/recipes.json). Stored images
+the map no longer names are removed.
+
+Without Recipes/images (e.g. a fresh clone) the map and the store are left as
+they are.
+
+Usage:
+  python3 scripts/build_image_store.py
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+from generations import write_bytes_atomic, write_text_atomic
+from profiling import run_cli
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SOURCE_DIR = ROOT / "Recipes" / "images"
+STORE_DIR = ROOT / "app" / "public" / "images"
+NAMES_PATH = ROOT / "data" / "image_names.json"
+DOCS_RECIPES_PATH = ROOT / "docs" / "data" / "recipes.json"
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic"}
+HASH_LENGTH = 16
+
+
+def load_image_names(path=NAMES_PATH):
+    """Return the {export name: stored name} map, empty when there is none yet."""
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8")).get("images", {})
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def dump_image_names(names):
+    return json.dumps({"images": dict(sorted(names.items()))}, indent=2, ensure_ascii=True)
+
+
+def import_sources(source_dir=SOURCE_DIR, store_dir=STORE_DIR, names=None):
+    """Hash every export into the store; return (updated names, stats)."""
+    names = dict(names or {})
+    store_dir.mkdir(parents=True, exist_ok=True)
+    stats = {"hashed": 0, "stored": 0}
+    sources = sorted(p for p in source_dir.iterdir() if p.is_file() and p.suffix.lower() in IMAGE_SUFFIXES)
+    for path in sources:
+        data = path.read_bytes()
+        stored = f"{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{path.suffix.lower()}"
+        stats["hashed"] += 1
+        if not (store_dir / stored).exists():
+            write_bytes_atomic(store_dir / stored, data)
+            stats["stored"] += 1
+        names[path.name] = stored
+    return names, stats
+
+
+def prune(names, store_dir=STORE_DIR):
+    """Remove stored images that no export maps to; return how many were removed."""
+    live = set(names.values())
+    removed = 0
+    for path in store_dir.iterdir():
+        if path.is_file() and path.suffix.lower() in IMAGE_SUFFIXES and path.name not in live:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def rewrite_attachments(recipes, names):
+    """Point attachments at their stored names, keeping the prefix; return the number changed."""
+    changed = 0
+    for recipe in recipes:
+        for attachment in recipe.get("attachments", []):
+            prefix, _, filename = attachment["url"].rpartition("/")
+            stored = names.get(filename)
+            if not stored or stored == filename:
+                continue
+            attachment["url"] = f"{prefix}/{stored}" if prefix else stored
+            changed += 1
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash recipe image exports into the content-addressed store.")
+    parser.parse_args()
+
+    names = load_image_names()
+    if SOURCE_DIR.is_dir():
+        names, stats = import_sources(names=names)
+        print(f"Images: {stats['hashed']} exports hashed, {stats['stored']} added to "
+              f"{STORE_DIR.relative_to(ROOT)}")
+        text = dump_image_names(names)
+        if not NAMES_PATH.exists() or NAMES_PATH.read_text(encoding="utf-8") != text:
+            write_text_atomic(NAMES_PATH, text)
+    else:
+        print(f"No {SOURCE_DIR.relative_to(ROOT)}; keeping {len(names)} stored images")
+    print(f"Removed {prune(names)} unreferenced images")
+
+    if DOCS_RECIPES_PATH.exists():
+        docs = json.loads(DOCS_RECIPES_PATH.read_text(encoding="utf-8"))
+        changed = rewrite_attachments(docs.get("recipes", []), names)
+        if changed:
+            write_text_atomic(DOCS_RECIPES_PATH, json.dumps(docs, indent=2, ensure_ascii=True))
+        print(f"Docs attachments pointed at the store: {changed}")
+
+
+if __name__ == "__main__":
+    run_cli(main)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Build a week x item incidence matrix and item x item co-occurrence neighbors.
+
+Rows of the incidence matrix are menu files, columns are refactored items
+(keyed by build_menu_items_refactored.item_key). Both matrices are stored in
+CSR form (indptr/indices/data lists) in data/item_cooccurrence.json, together
+with the top-k neighbor list of every item so "what do we usually cook with X"
+is a single slice of the neighbors arrays.
+
+Usage:
+  python3 scripts/build_item_cooccurrence.py                 # full rebuild
+  python3 scripts/build_item_cooccurrence.py --week "Menus/Menu week of 1-16-26.md"
+  python3 scripts/build_item_cooccurrence.py --query https://pinchofyum.com/burst-tomato-pappardelle
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from build_menu_items_refactored import item_key
+from generations import write_text_atomic
+from profiling import run_cli
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+ITEMS_PATH = DATA_DIR / "menu_items_refactored.json"
+OUT_PATH = DATA_DIR / "item_cooccurrence.json"
+
+TOP_K = 10
+
+
+def to_csr(rows):
+    """Convert a list of {col: value} dicts into CSR (indptr, indices, data)."""
+    indptr = [0]
+    indices = []
+    data = []
+    for row in rows:
+        for col in sorted(row):
+            indices.append(col)
+            data.append(row[col])
+        indptr.append(len(indices))
+    return {"indptr": indptr, "indices": indices, "data": data}
+
+
+def from_csr(csr):
+    rows = []
+    indptr, indices, data = csr["indptr"], csr["indices"], csr["data"]
+    for r in range(len(indptr) - 1):
+        start, end = indptr[r], indptr[r + 1]
+        rows.append(dict(zip(indices[start:end], data[start:end])))
+    return rows
+
+
+class CooccurrenceMatrix:
+    """In-memory form of the incidence/co-occurrence data with incremental updates."""
+
+    def __init__(self, weeks=None, keys=None, week_rows=None, cooc_rows=None, top_k=TOP_K):
+        self.weeks = list(weeks or [])
+        self.keys = list(keys or [])
+        self.week_rows = [set(row) for row in (week_rows or [])]
+        self.cooc_rows = [dict(row) for row in (cooc_rows or [])]
+        self.top_k = top_k
+        self.week_index = {week: i for i, week in enumerate(self.weeks)}
+        self.key_index = {key: i for i, key in enumerate(self.keys)}
+        self.neighbors = [self._top_neighbors(i) for i in range(len(self.keys))]
+
+    @classmethod
+    def from_items(cls, items, top_k=TOP_K):
+        matrix = cls(top_k=top_k)
+        week_items = defaultdict(list)
+        for item in items:
+            key = item_key(item)
+            if key is None:
+                continue
+            for menu_file in item.get("menu_files", []):
+                week_items[menu_file].append(key)
+        for menu_file in sorted(week_items):
+            matrix.set_week(menu_file, week_items[menu_file])
+        return matrix
+
+    @classmethod
+    def load(cls, path=OUT_PATH):
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        incidence = from_csr(data["incidence"])
+        cooc = from_csr(data["cooccurrence"])
+        matrix = cls.__new__(cls)
+        matrix.weeks = data["weeks"]
+        matrix.keys = data["items"]
+        matrix.week_rows = [set(row) for row in incidence]
+        matrix.cooc_rows = cooc
+        matrix.top_k = data.get("top_k", TOP_K)
+        matrix.week_index = {week: i for i, week in enumerate(matrix.weeks)}
+        matrix.key_index = {key: i for i, key in enumerate(matrix.keys)}
+        nb = data["neighbors"]
+        matrix.neighbors = [
+            list(zip(nb["indices"][nb["indptr"][i]:nb["indptr"][i + 1]],
+                     nb["data"][nb["indptr"][i]:nb["indptr"][i + 1]]))
+            for i in range(len(matrix.keys))
+        ]
+        return matrix
+
+    def _column(self, key):
+        col = self.key_index.get(key)
+        if col is None:
+            col = len(self.keys)
+            self.keys.append(key)
+            self.key_index[key] = col
+            self.cooc_rows.append({})
+            self.neighbors.append([])
+        return col
+
+    def _top_neighbors(self, col):
+        row = self.cooc_rows[col]
+        ranked = sorted(row.items(), key=lambda kv: (-kv[1], self.keys[kv[0]]))
+        return [(c, n) for c, n in ranked[:self.top_k] if n > 0]
+
+    def _add_pairs(self, cols, delta):
+        touched = set()
+        for a in cols:
+            row = self.cooc_rows[a]
+            for b in cols:
+                if a == b:
+                    continue
+                count = row.get(b, 0) + delta
+                if count > 0:
+                    row[b] = count
+                else:
+                    row.pop(b, None)
+            touched.add(a)
+        return touched
+
+    def set_week(self, menu_file, keys):
+        """Insert or replace one week's row; cost is O(items in that week squared)."""
+        cols = {self._column(key) for key in keys}
+        touched = set()
+        row_idx = self.week_index.get(menu_file)
+        if row_idx is None:
+            self.week_index[menu_file] = len(self.weeks)
+            self.weeks.append(menu_file)
+            self.week_rows.append(set())
+            row_idx = self.week_index[menu_file]
+        else:
+            touched |= self._add_pairs(self.week_rows[row_idx], -1)
+        self.week_rows[row_idx] = cols
+        touched |= self._add_pairs(cols, 1)
+        for col in touched:
+            self.neighbors[col] = self._top_neighbors(col)
+
+    def set_top_k(self, top_k):
+        """Keep top_k neighbors per item, re-ranking every item if it changed."""
+        if top_k != self.top_k:
+            self.top_k = top_k
+            self.neighbors = [self._top_neighbors(i) for i in range(len(self.keys))]
+
+    def pairings(self, key, k=None):
+        """Return [(neighbor_key, weeks_together), ...] for an item in O(k)."""
+        col = self.key_index.get(key)
+        if col is None:
+            return []
+        neighbors = self.neighbors[col]
+        if k is not None:
+            neighbors = neighbors[:k]
+        return [(self.keys[c], n) for c, n in neighbors]
+
+    def to_dict(self):
+        return {
+            "top_k": self.top_k,
+            "weeks": self.weeks,
+            "items": self.keys,
+            "incidence": to_csr([{col: 1 for col in row} for row in self.week_rows]),
+            "cooccurrence": to_csr(self.cooc_rows),
+            "neighbors": _neighbors_csr(self.neighbors),
+        }
+
+    def save(self, path=OUT_PATH):
+        # Compact separators: these are machine-read index arrays, not review files.
+        write_text_atomic(
+            Path(path),
+            json.dumps(self.to_dict(), separators=(",", ":"), ensure_ascii=True),
+        )
+
+
+def _neighbors_csr(neighbors):
+    """Neighbor lists keep their rank order, so they are not re-sorted by column."""
+    indptr = [0]
+    indices = []
+    data = []
+    for row in neighbors:
+        for col, count in row:
+            indices.append(col)
+            data.append(count)
+        indptr.append(len(indices))
+    return {"indptr": indptr, "indices": indices, "data": data}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build item co-occurrence neighbors.")
+    parser.add_argument("--week", action="append", help="Only refresh these menu files (repeatable)")
+    parser.add_argument("--query", help="Print the top pairings for an item key")
+    parser.add_argument("-k", type=int, default=TOP_K, help="Neighbors kept per item")
+    args = parser.parse_args()
+
+    if args.query:
+        matrix = CooccurrenceMatrix.load()
+        for key, count in matrix.pairings(args.query):
+            print(f"{count:3d}  {key}")
+        return
+
+    items = json.loads(ITEMS_PATH.read_text(encoding="utf-8")).get("items", [])
+
+    if args.week and OUT_PATH.exists():
+        matrix = CooccurrenceMatrix.load()
+        matrix.set_top_k(args.k)
+        wanted = set(args.week)
+        week_items = defaultdict(list)
+        for item in items:
+            key = item_key(item)
+            if key is None:
+                continue
+            for menu_file in item.get("menu_files", []):
+                if menu_file in wanted:
+                    week_items[menu_file].append(key)
+        for menu_file in args.week:
+            matrix.set_week(menu_file, week_items.get(menu_file, []))
+        print(f"Updated weeks: {len(args.week)}")
+    else:
+        matrix = CooccurrenceMatrix.from_items(items, top_k=args.k)
+
+    matrix.save()
+    print(f"Co-occurrence matrix: {len(matrix.weeks)} weeks x {len(matrix.keys)} items")
+
+
+if __name__ == "__main__":
+    run_cli(main)
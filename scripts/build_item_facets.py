@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Emit facet tables for refactored items with per-value item-id bitmaps.
+
+Facets: season, meal_type, main_protein, domain, recipe_tag and has_link.
+Each value maps to a bitmap whose bit i is set when item i (its position in
+menu_items_refactored.json) carries that value. Bitmaps are stored base64
+encoded (little-endian bytes) in data/item_facets.json and app/public/data,
+so counts for any filter combination are bitmap ANDs plus popcounts.
+
+  python3 scripts/build_item_facets.py --filter season=summer --filter main_protein=tofu
+"""
+
+import argparse
+import base64
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from build_menu_sources import domain_from_url
+from generations import write_text_atomic
+from profiling import run_cli
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
+
+ITEMS_PATH = DATA_DIR / "menu_items_refactored.json"
+OUT_PATH = DATA_DIR / "item_facets.json"
+OUT_APP_PATH = APP_DATA_DIR / "item_facets.json"
+
+FACETS = ["season", "meal_type", "main_protein", "domain", "recipe_tag", "has_link"]
+
+
+def normalize_value(value):
+    return (value or "unknown").strip().lower()
+
+
+def item_facet_values(item):
+    """Return {facet: set(values)} for one refactored item."""
+    urls = [u for u in [item.get("url")] + (item.get("urls") or []) if u]
+    return {
+        "season": {normalize_value(s) for s in item.get("menu_seasons") or []},
+        "meal_type": {normalize_value(m) for m in item.get("meal_types") or []},
+        "main_protein": {normalize_value(item.get("main_protein"))},
+        "domain": {d for d in (domain_from_url(u) for u in urls) if d},
+        "recipe_tag": {normalize_value(t) for t in item.get("recipe_tags") or [] if t},
+        "has_link": {"yes" if urls else "no"},
+    }
+
+
+def encode_bitmap(bits, size):
+    return base64.b64encode(bits.to_bytes((size + 7) // 8 or 1, "little")).decode("ascii")
+
+
+def decode_bitmap(text):
+    return int.from_bytes(base64.b64decode(text), "little")
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+def build_facets(items):
+    bitmaps = {facet: defaultdict(int) for facet in FACETS}
+    for idx, item in enumerate(items):
+        for facet, values in item_facet_values(item).items():
+            for value in values:
+                bitmaps[facet][value] |= 1 << idx
+    return bitmaps
+
+
+class FacetIndex:
+    """Facet counts and filtering via bitmap intersections."""
+
+    def __init__(self, size, bitmaps):
+        self.size = size
+        self.bitmaps = bitmaps
+        self.all = (1 << size) - 1
+
+    @classmethod
+    def from_items(cls, items):
+        return cls(len(items), build_facets(items))
+
+    @classmethod
+    def load(cls, path=OUT_PATH):
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        bitmaps = {
+            facet: {v["value"]: decode_bitmap(v["bitmap"]) for v in values}
+            for facet, values in data["facets"].items()
+        }
+        return cls(data["size"], bitmaps)
+
+    def mask(self, filters, skip=None):
+        """AND across facets, OR within a facet's selected values."""
+        bits = self.all
+        for facet, values in filters.items():
+            if facet == skip or not values:
+                continue
+            facet_bits = 0
+            for value in values:
+                facet_bits |= self.bitmaps.get(facet, {}).get(value, 0)
+            bits &= facet_bits
+        return bits
+
+    def item_ids(self, filters):
+        bits = self.mask(filters)
+        return [i for i in range(self.size) if bits >> i & 1]
+
+    def counts(self, filters=None):
+        """Return {facet: {value: count}}; a facet's own selection does not narrow its counts."""
+        filters = filters or {}
+        out = {}
+        for facet, values in self.bitmaps.items():
+            base = self.mask(filters, skip=facet)
+            out[facet] = {value: popcount(bits & base) for value, bits in sorted(values.items())}
+        return out
+
+    def to_dict(self):
+        return {
+            "size": self.size,
+            "facets": {
+                facet: [
+                    {"value": value, "count": popcount(bits), "bitmap": encode_bitmap(bits, self.size)}
+                    for value, bits in sorted(values.items())
+                ]
+                for facet, values in self.bitmaps.items()
+            },
+        }
+
+
+def parse_filters(pairs):
+    filters = defaultdict(list)
+    for pair in pairs or []:
+        facet, _, value = pair.partition("=")
+        filters[facet].append(normalize_value(value))
+    return dict(filters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query item facet bitmaps.")
+    parser.add_argument("--filter", action="append", help="facet=value to query the built index (repeatable)")
+    args = parser.parse_args()
+
+    if args.filter:
+        index = FacetIndex.load()
+        filters = parse_filters(args.filter)
+        print(f"Matching items: {len(index.item_ids(filters))}")
+        for facet, counts in index.counts(filters).items():
+            shown = ", ".join(f"{v}={n}" for v, n in counts.items() if n)
+            print(f"{facet}: {shown}")
+        return
+
+    items = json.loads(ITEMS_PATH.read_text(encoding="utf-8")).get("items", [])
+    output = FacetIndex.from_items(items).to_dict()
+
+    write_text_atomic(OUT_PATH, json.dumps(output, indent=2, ensure_ascii=True))
+    APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(OUT_APP_PATH, json.dumps(output, indent=2, ensure_ascii=True))
+
+    print("Facet tables: " + ", ".join(f"{f}={len(v)}" for f, v in output["facets"].items()))
+
+
+if __name__ == "__main__":
+    run_cli(main)
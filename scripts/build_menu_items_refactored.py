@@ -2,12 +2,17 @@ import json
 from collections import defaultdict
 from pathlib import Path
 
+from generations import write_text_atomic
+from normalization import title_key
+from profiling import run_cli
+
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
 
 MENUS_PATH = DATA_DIR / "menus.json"
 OUT_PATH = DATA_DIR / "menu_items_refactored.json"
 OUT_APP_PATH = APP_DATA_DIR / "menu_items_refactored.json"
+MENU_INDEX_NAME = "menu_item_index.json"
 
 
 def unique_preserve(seq):
@@ -36,17 +41,62 @@ def get_primary_title(item):
     return _get_first_non_empty_text(item, ("link_texts", "item_texts"))
 
 
+def item_key(item):
+    """Stable key for a refactored item: its URL, else title::<title_key of its primary title>."""
+    if item.get("url"):
+        return item["url"]
+    title = get_primary_title(item)
+    return f"title::{title_key(title)}" if title else None
+
+
+def canonical_item_key(key):
+    """Re-normalize a stored key, so keys written before title_key (title::<lowercase>) still resolve."""
+    if key and key.startswith("title::"):
+        return f"title::{title_key(key[len('title::'):])}"
+    return key
+
+
+def build_menu_index(items, menus):
+    """Reverse index: menu file -> its week, season and the item keys it contributes to."""
+    index = {
+        menu.get("file"): {"week": menu.get("week_of_date"), "season": menu.get("season"), "items": []}
+        for menu in menus
+        if menu.get("file")
+    }
+    for item in items:
+        key = item_key(item)
+        if key is None:
+            continue
+        for menu_file in item.get("menu_files", []):
+            entry = index.setdefault(menu_file, {"week": None, "season": None, "items": []})
+            entry["items"].append(key)
+    return index
+
+
+def write_menu_index(menu_index, data_dir=DATA_DIR, app_data_dir=APP_DATA_DIR):
+    output = json.dumps({"menus": menu_index}, indent=2, ensure_ascii=True)
+    write_text_atomic(data_dir / MENU_INDEX_NAME, output)
+    app_data_dir.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(app_data_dir / MENU_INDEX_NAME, output)
+
+
+def refresh_menu_index(items):
+    """Rewrite the reverse index after a later stage has changed item keys."""
+    menus = json.loads(MENUS_PATH.read_text(encoding="utf-8")).get("menus", [])
+    write_menu_index(build_menu_index(items, menus))
+
+
 def merge_items_by_title(items):
-    """Merge items with duplicate titles (case-insensitive)."""
-    # Group items by case-insensitive title
+    """Merge items whose titles share a normalized title key."""
+    # Group items by normalized title
     title_groups = defaultdict(list)
     no_title_items = []
     
     for item in items:
         title = get_primary_title(item)
         if title:
-            # Use lowercase title as key for case-insensitive grouping
-            key = title.lower()
+            # Same title key every stage uses (normalization.title_key)
+            key = title_key(title)
             title_groups[key].append(item)
         else:
             # Keep items with no title as-is
@@ -55,7 +105,7 @@ def merge_items_by_title(items):
     # Merge items with duplicate titles
     merged_items = []
     
-    for title_key, items_list in title_groups.items():
+    for group_key, items_list in title_groups.items():
         if len(items_list) > 1:
             # Multiple items with same title - merge them
             merged = {
@@ -182,10 +232,11 @@ def main():
     items.sort(key=lambda x: (-x["count"], x["url"] or "")) 
 
     output = {"items": items}
-    OUT_PATH.write_text(json.dumps(output, indent=2, ensure_ascii=True), encoding="utf-8")
+    write_text_atomic(OUT_PATH, json.dumps(output, indent=2, ensure_ascii=True))
     APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
-    OUT_APP_PATH.write_text(json.dumps(output, indent=2, ensure_ascii=True), encoding="utf-8")
+    write_text_atomic(OUT_APP_PATH, json.dumps(output, indent=2, ensure_ascii=True))
+    write_menu_index(build_menu_index(items, menus))
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -3,6 +3,9 @@ from collections import defaultdict
 from pathlib import Path
 from urllib.parse import urlparse
 
+from generations import write_text_atomic
+from profiling import run_cli
+
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
 
@@ -70,10 +73,10 @@ def main():
         "websites": websites,
     }
 
-    OUT_PATH.write_text(json.dumps(output, indent=2, ensure_ascii=True), encoding="utf-8")
+    write_text_atomic(OUT_PATH, json.dumps(output, indent=2, ensure_ascii=True))
     APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
-    OUT_APP_PATH.write_text(json.dumps(output, indent=2, ensure_ascii=True), encoding="utf-8")
+    write_text_atomic(OUT_APP_PATH, json.dumps(output, indent=2, ensure_ascii=True))
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Join recipe notes (data/recipes.json) to refactored menu items.
+
+Matches are resolved in order of confidence:
+1) shared URL (scheme, www, trailing slash and #fragment ignored)
+2) identical normalized title (recipe title vs item link_texts/item_texts)
+3) token Jaccard similarity, with candidates drawn from a token inverted index
+
+The result is written in both directions (recipe file -> item keys and
+item key -> recipe file) to data/recipe_matches.json and app/public/data.
+url_to_item maps the other URLs of a matched item to its key, so a menu line
+resolves its recipe with dictionary lookups on its own URLs or title key.
+"""
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlparse
+
+from build_menu_items_refactored import item_key
+from generations import write_text_atomic
+from normalization import normalize_key, tokenize
+from profiling import run_cli
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
+
+ITEMS_PATH = DATA_DIR / "menu_items_refactored.json"
+RECIPES_PATH = DATA_DIR / "recipes.json"
+OUT_PATH = DATA_DIR / "recipe_matches.json"
+OUT_APP_PATH = APP_DATA_DIR / "recipe_matches.json"
+
+TOKEN_THRESHOLD = 0.6
+
+
+def canonical_url(url: str):
+    if not url or not url.startswith(("http://", "https://")):
+        return None
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parsed.path.rstrip("/")
+    return f"{host}{path}"
+
+
+def recipe_urls(recipe):
+    urls = [link.get("url") for link in recipe.get("links", [])] + recipe.get("urls", [])
+    return {c for c in (canonical_url(u) for u in urls) if c}
+
+
+def item_urls(item):
+    urls = [item.get("url")] + item.get("urls", [])
+    return {c for c in (canonical_url(u) for u in urls) if c}
+
+
+def item_titles(item):
+    return [t for t in item.get("link_texts", []) + item.get("item_texts", []) if t]
+
+
+def recipe_title(recipe):
+    # Drop trailing "(easy)"-style qualifiers that are not part of the dish name.
+    title = recipe.get("title") or Path(recipe.get("file", "")).stem
+    return title.split("(")[0].strip() or title
+
+
+def build_indexes(items):
+    by_url = defaultdict(set)
+    by_title = defaultdict(set)
+    by_token = defaultdict(set)
+    item_tokens = {}
+    for idx, item in enumerate(items):
+        for url in item_urls(item):
+            by_url[url].add(idx)
+        tokens = set()
+        for text in item_titles(item):
+            by_title[normalize_key(text)].add(idx)
+            tokens |= set(tokenize(text))
+        item_tokens[idx] = tokens
+        for t in tokens:
+            by_token[t].add(idx)
+    return by_url, by_title, by_token, item_tokens
+
+
+def match_recipe(recipe, indexes, threshold=TOKEN_THRESHOLD):
+    """Return (item_ids, method, score) for one recipe."""
+    by_url, by_title, by_token, item_tokens = indexes
+
+    ids = set()
+    for url in recipe_urls(recipe):
+        ids |= by_url.get(url, set())
+    if ids:
+        return sorted(ids), "url", 1.0
+
+    title = recipe_title(recipe)
+    ids = by_title.get(normalize_key(title), set())
+    if ids:
+        return sorted(ids), "title", 1.0
+
+    tokens = set(tokenize(title))
+    candidates = set()
+    for t in tokens:
+        candidates |= by_token.get(t, set())
+    best_score = 0.0
+    best = []
+    for idx in candidates:
+        other = item_tokens[idx]
+        score = len(tokens & other) / len(tokens | other)
+        if score > best_score:
+            best_score, best = score, [idx]
+        elif score == best_score:
+            best.append(idx)
+    if best_score >= threshold:
+        return sorted(best), "tokens", round(best_score, 3)
+    return [], None, 0.0
+
+
+def build_matches(recipes, items, threshold=TOKEN_THRESHOLD):
+    indexes = build_indexes(items)
+    recipe_to_items = {}
+    item_to_recipe = {}
+    url_to_item = {}
+    for recipe in recipes:
+        ids, method, score = match_recipe(recipe, indexes, threshold)
+        keys = []
+        for idx in ids:
+            key = item_key(items[idx])
+            if key is None:
+                continue
+            keys.append(key)
+            for url in items[idx].get("urls", []):
+                if url != key:
+                    url_to_item[url] = key
+            current = item_to_recipe.get(key)
+            if current is None or score > current["score"]:
+                item_to_recipe[key] = {"recipe": recipe["file"], "method": method, "score": score}
+        if keys:
+            recipe_to_items[recipe["file"]] = {"items": keys, "method": method, "score": score}
+    return {"recipe_to_items": recipe_to_items, "item_to_recipe": item_to_recipe, "url_to_item": url_to_item}
+
+
+def main():
+    items = json.loads(ITEMS_PATH.read_text(encoding="utf-8")).get("items", [])
+    recipes = json.loads(RECIPES_PATH.read_text(encoding="utf-8")).get("recipes", [])
+    output = build_matches(recipes, items)
+
+    write_text_atomic(OUT_PATH, json.dumps(output, indent=2, ensure_ascii=True))
+    APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(OUT_APP_PATH, json.dumps(output, indent=2, ensure_ascii=True))
+
+    print(f"Matched recipes: {len(output['recipe_to_items'])} of {len(recipes)}")
+    print(f"Matched items: {len(output['item_to_recipe'])}")
+
+
+if __name__ == "__main__":
+    run_cli(main)
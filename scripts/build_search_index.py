@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Build a static full-text search index over menu items and recipe notes.
+
+Documents are refactored items (item_texts, link_texts, ingredients) and
+recipes (title and markdown text). The index stores:
+- a sorted term dictionary, so prefix queries are a bisect range scan
+- postings per term as delta-encoded document ids
+- a trigram -> term-id table (also delta-encoded) for substring matching
+
+It is written to data/search_index.json and app/public/data. SearchIndex
+is the Python query API:
+
+  python3 scripts/build_search_index.py --query "peanut tof"
+"""
+
+import argparse
+import json
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+
+from build_menu_items_refactored import get_primary_title, item_key
+from generations import write_text_atomic
+from normalization import normalize_key
+from profiling import run_cli
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
+
+ITEMS_PATH = DATA_DIR / "menu_items_refactored.json"
+RECIPES_PATH = DATA_DIR / "recipes.json"
+OUT_PATH = DATA_DIR / "search_index.json"
+OUT_APP_PATH = APP_DATA_DIR / "search_index.json"
+
+MAX_RESULTS = 20
+
+
+def tokens(text):
+    return normalize_key(text or "").split()
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def delta_encode(ids):
+    out = []
+    prev = 0
+    for n in ids:
+        out.append(n - prev)
+        prev = n
+    return out
+
+
+def delta_decode(deltas):
+    out = []
+    total = 0
+    for d in deltas:
+        total += d
+        out.append(total)
+    return out
+
+
+def collect_documents(items, recipes):
+    """Return (docs, texts) where docs are result descriptors and texts are indexed strings."""
+    docs = []
+    texts = []
+    for idx, item in enumerate(items):
+        docs.append({"type": "item", "id": idx, "key": item_key(item), "title": get_primary_title(item)})
+        fields = ("item_texts", "link_texts", "ingredients")
+        texts.append(" ".join(t for key in fields for t in (item.get(key) or []) if t))
+    for recipe in recipes:
+        docs.append({"type": "recipe", "file": recipe.get("file"), "title": recipe.get("title")})
+        texts.append(" ".join(filter(None, [recipe.get("title"), recipe.get("text")])))
+    return docs, texts
+
+
+def build_index(items, recipes):
+    docs, texts = collect_documents(items, recipes)
+    postings = defaultdict(set)
+    for doc_id, text in enumerate(texts):
+        for term in tokens(text):
+            postings[term].add(doc_id)
+
+    terms = sorted(postings)
+    tri = defaultdict(list)
+    for term_id, term in enumerate(terms):
+        for g in trigrams(term):
+            tri[g].append(term_id)
+
+    return {
+        "docs": docs,
+        "terms": terms,
+        "postings": [delta_encode(sorted(postings[t])) for t in terms],
+        "trigrams": {g: delta_encode(ids) for g, ids in sorted(tri.items())},
+    }
+
+
+class SearchIndex:
+    """Query API over a serialized search index."""
+
+    def __init__(self, data):
+        self.docs = data["docs"]
+        self.terms = data["terms"]
+        self._postings = data["postings"]
+        self._trigrams = data["trigrams"]
+        self._decoded = {}
+
+    @classmethod
+    def load(cls, path=OUT_PATH):
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def postings(self, term_id):
+        ids = self._decoded.get(term_id)
+        if ids is None:
+            ids = self._decoded[term_id] = set(delta_decode(self._postings[term_id]))
+        return ids
+
+    def prefix_terms(self, prefix):
+        start = bisect_left(self.terms, prefix)
+        end = start
+        while end < len(self.terms) and self.terms[end].startswith(prefix):
+            end += 1
+        return range(start, end)
+
+    def substring_terms(self, fragment):
+        grams = [g for g in trigrams(fragment) if not g.startswith(" ") and not g.endswith(" ")]
+        if not grams:
+            return []
+        candidates = None
+        for g in grams:
+            ids = set(delta_decode(self._trigrams.get(g, [])))
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        return [t for t in candidates if fragment in self.terms[t]]
+
+    def _matching_docs(self, term, prefix, substring):
+        if prefix:
+            term_ids = list(self.prefix_terms(term))
+        else:
+            pos = bisect_left(self.terms, term)
+            term_ids = [pos] if pos < len(self.terms) and self.terms[pos] == term else []
+        if not term_ids and substring and len(term) >= 3:
+            term_ids = self.substring_terms(term)
+        out = set()
+        for t in term_ids:
+            out |= self.postings(t)
+        return out
+
+    def search(self, query, limit=MAX_RESULTS, substring=True):
+        """AND-match every query token; the last token is matched as a prefix."""
+        words = tokens(query)
+        if not words:
+            return []
+        result = None
+        for n, word in enumerate(words):
+            docs = self._matching_docs(word, prefix=(n == len(words) - 1), substring=substring)
+            result = docs if result is None else result & docs
+            if not result:
+                return []
+        return [self.docs[d] for d in sorted(result)[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the full-text search index.")
+    parser.add_argument("--query", help="Run a query against the built index")
+    args = parser.parse_args()
+
+    if args.query:
+        for doc in SearchIndex.load().search(args.query):
+            print(f"{doc['type']:6s}  {doc['title']}")
+        return
+
+    items = json.loads(ITEMS_PATH.read_text(encoding="utf-8")).get("items", [])
+    recipes = json.loads(RECIPES_PATH.read_text(encoding="utf-8")).get("recipes", [])
+    index = build_index(items, recipes)
+
+    # Compact separators: posting arrays are machine-read and dominate the size.
+    payload = json.dumps(index, separators=(",", ":"), ensure_ascii=True)
+    write_text_atomic(OUT_PATH, payload)
+    APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(OUT_APP_PATH, payload)
+
+    print(f"Indexed documents: {len(index['docs'])}, terms: {len(index['terms'])}")
+
+
+if __name__ == "__main__":
+    run_cli(main)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Polite, resumable crawl of every recipe URL in data/menu_item_sources.json.
+
+Each domain gets its own asyncio workers (--per-domain) that wait --delay
+seconds between request starts on that site, while a global semaphore caps the
+total number of requests in flight (--concurrency). Pages are fetched and
+parsed with fetch_recipes (keep-alive pool, revalidating disk cache).
+
+Completed and failed URLs are checkpointed to data/crawl_checkpoint.json as
+the crawl runs, so an interrupted crawl resumes where it stopped. A failed URL
+is put back on its domain's queue and retried up to --max-attempts in all, and
+each failure pushes that domain's next request back exponentially (--backoff
+seconds, doubling, capped at MAX_BACKOFF). Per-domain request counts,
+throughput and latency percentiles are printed and written to
+data/crawl_stats.json, and scraped ingredients for items without any are
+recorded in the edit journal (skip with --dry-run), so rebuilds keep them.
+
+Usage:
+  python3 scripts/crawl_sources.py
+  python3 scripts/crawl_sources.py --domain pinchofyum.com --concurrency 4
+  python3 scripts/crawl_sources.py --reset          # forget the checkpoint
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urldefrag
+
+from edit_journal import apply_edits
+from fetch_recipes import (
+    ITEMS_PATH,
+    ConnectionPool,
+    Fetcher,
+    HTTPCache,
+    result_edits,
+    scrape_html,
+)
+from profiling import run_cli
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+SOURCES_PATH = DATA_DIR / "menu_item_sources.json"
+CHECKPOINT_PATH = DATA_DIR / "crawl_checkpoint.json"
+STATS_PATH = DATA_DIR / "crawl_stats.json"
+
+CONCURRENCY = 8
+PER_DOMAIN = 1
+DELAY = 1.0
+MAX_ATTEMPTS = 3
+BACKOFF = 2.0
+MAX_BACKOFF = 60.0
+CHECKPOINT_EVERY = 10
+
+
+def load_targets(path=SOURCES_PATH, domains=None):
+    """Return {domain: [url, ...]} with #fragments dropped and duplicates removed."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    targets = {}
+    for site in data.get("websites", []):
+        domain = site["domain"]
+        if domains and domain not in domains:
+            continue
+        urls = []
+        for entry in site.get("items", []):
+            url = urldefrag(entry.get("url") or "")[0]
+            if url.startswith(("http://", "https://")) and url not in urls:
+                urls.append(url)
+        if urls:
+            targets[domain] = urls
+    return targets
+
+
+class Checkpoint:
+    """Completed and failed URLs, written atomically every few results."""
+
+    def __init__(self, path=CHECKPOINT_PATH, reset=False):
+        self.path = Path(path)
+        data = {}
+        if not reset:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, ValueError):
+                data = {}
+        self.completed = data.get("completed", {})
+        self.failed = data.get("failed", {})
+        self._unsaved = 0
+
+    def pending(self, url, max_attempts):
+        if url in self.completed:
+            return False
+        return self.failed.get(url, {}).get("attempts", 0) < max_attempts
+
+    def complete(self, url, result):
+        self.failed.pop(url, None)
+        self.completed[url] = {"at": time.time(), "result": result}
+        self._tick()
+
+    def fail(self, url, error):
+        """Record a failed attempt; return the URL's attempt count so far."""
+        entry = self.failed.setdefault(url, {"attempts": 0})
+        entry.update(attempts=entry["attempts"] + 1, error=error, at=time.time())
+        self._tick()
+        return entry["attempts"]
+
+    def _tick(self):
+        self._unsaved += 1
+        if self._unsaved >= CHECKPOINT_EVERY:
+            self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"completed": self.completed, "failed": self.failed}, indent=2, ensure_ascii=True),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+        self._unsaved = 0
+
+    def results(self):
+        return {url: entry["result"] for url, entry in self.completed.items()}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class DomainStats:
+    def __init__(self):
+        self.ok = 0
+        self.failed = 0
+        self.bytes = 0
+        self.latencies = []
+        self.first_start = None
+        self.last_end = None
+
+    def record(self, start, end, ok, size=0):
+        self.first_start = start if self.first_start is None else min(self.first_start, start)
+        self.last_end = end if self.last_end is None else max(self.last_end, end)
+        self.latencies.append(end - start)
+        self.bytes += size
+        if ok:
+            self.ok += 1
+        else:
+            self.failed += 1
+
+    def to_dict(self):
+        lat = sorted(self.latencies)
+        span = (self.last_end - self.first_start) if self.latencies else 0.0
+        return {
+            "requests": len(lat),
+            "ok": self.ok,
+            "failed": self.failed,
+            "bytes": self.bytes,
+            "pages_per_s": round(len(lat) / span, 3) if span > 0 else None,
+            "latency_p50_s": round(percentile(lat, 0.5), 3) if lat else None,
+            "latency_p95_s": round(percentile(lat, 0.95), 3) if lat else None,
+            "latency_max_s": round(lat[-1], 3) if lat else None,
+        }
+
+
+class CrawlScheduler:
+    def __init__(self, fetcher, checkpoint, concurrency=CONCURRENCY, per_domain=PER_DOMAIN,
+                 delay=DELAY, max_attempts=MAX_ATTEMPTS, backoff=BACKOFF):
+        self.fetcher = fetcher
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.per_domain = per_domain
+        self.delay = delay
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.domain_stats = defaultdict(DomainStats)
+        self._next_start = {}
+
+    def stats(self):
+        return {domain: s.to_dict() for domain, s in sorted(self.domain_stats.items())}
+
+    def _fetch(self, url):
+        html, _ = self.fetcher.fetch(url)
+        return len(html), scrape_html(html)
+
+    async def _polite_wait(self, domain, lock):
+        async with lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self._next_start.get(domain, now))
+            self._next_start[domain] = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def _back_off(self, domain, attempts):
+        """Hold the domain's next request start for backoff * 2**(attempts - 1) seconds."""
+        now = asyncio.get_running_loop().time()
+        wait = min(MAX_BACKOFF, self.backoff * 2 ** (attempts - 1))
+        self._next_start[domain] = max(self._next_start.get(domain, now), now + wait)
+
+    async def _domain_worker(self, domain, queue, lock, global_slots, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await self._polite_wait(domain, lock)
+            async with global_slots:
+                start = time.perf_counter()
+                try:
+                    size, result = await loop.run_in_executor(executor, self._fetch, url)
+                except Exception as exc:  # noqa: BLE001 - record and move on
+                    self.domain_stats[domain].record(start, time.perf_counter(), False)
+                    attempts = self.checkpoint.fail(url, f"{type(exc).__name__}: {exc}")
+                    if self.checkpoint.pending(url, self.max_attempts):
+                        self._back_off(domain, attempts)
+                        queue.put_nowait(url)
+                    continue
+            self.domain_stats[domain].record(start, time.perf_counter(), True, size)
+            self.checkpoint.complete(url, result)
+
+    async def run(self, targets):
+        """Crawl {domain: [url, ...]}, skipping URLs the checkpoint already settled."""
+        global_slots = asyncio.Semaphore(self.concurrency)
+        workers = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for domain, urls in targets.items():
+                queue = asyncio.Queue()
+                for url in urls:
+                    if self.checkpoint.pending(url, self.max_attempts):
+                        queue.put_nowait(url)
+                if queue.empty():
+                    continue
+                lock = asyncio.Lock()
+                for _ in range(min(self.per_domain, queue.qsize())):
+                    workers.append(asyncio.create_task(
+                        self._domain_worker(domain, queue, lock, global_slots, executor)
+                    ))
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                self.checkpoint.save()
+
+
+def _fmt(value):
+    return f"{value:6.2f}" if value is not None else f"{'-':>6}"
+
+
+def print_stats(stats):
+    print(f"{'domain':32} {'req':>4} {'ok':>4} {'fail':>4} {'pg/s':>6} {'p50':>6} {'p95':>6}")
+    for domain, s in stats.items():
+        print(f"{domain[:32]:32} {s['requests']:4d} {s['ok']:4d} {s['failed']:4d} "
+              f"{_fmt(s['pages_per_s'])} {_fmt(s['latency_p50_s'])} {_fmt(s['latency_p95_s'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl recipe sources by domain with politeness limits.")
+    parser.add_argument("--sources", default=str(SOURCES_PATH), help="menu_item_sources.json path")
+    parser.add_argument("--domain", action="append", help="Only crawl this domain (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Requests in flight overall")
+    parser.add_argument("--per-domain", type=int, default=PER_DOMAIN, help="Requests in flight per domain")
+    parser.add_argument("--delay", type=float, default=DELAY, help="Seconds between request starts per domain")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS, help="Give up on a URL after this many failures")
+    parser.add_argument("--backoff", type=float, default=BACKOFF,
+                        help="Seconds a domain waits after its first failure (doubles per retry)")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH), help="Checkpoint JSON path")
+    parser.add_argument("--reset", action="store_true", help="Ignore the existing checkpoint")
+    parser.add_argument("--max-age", type=float, default=0,
+                        help="Serve cached pages younger than this many seconds without revalidating")
+    parser.add_argument("--dry-run", action="store_true", help="Crawl without updating items")
+    args = parser.parse_args()
+
+    targets = load_targets(args.sources, set(args.domain or []))
+    checkpoint = Checkpoint(args.checkpoint, reset=args.reset)
+    cache = HTTPCache()
+    pool = ConnectionPool(per_host=args.per_domain)
+    fetcher = Fetcher(cache, pool, args.max_age)
+    scheduler = CrawlScheduler(fetcher, checkpoint, args.concurrency, args.per_domain,
+                               args.delay, args.max_attempts, args.backoff)
+
+    total = sum(len(urls) for urls in targets.values())
+    pending = sum(1 for urls in targets.values() for url in urls if checkpoint.pending(url, args.max_attempts))
+    print(f"Domains: {len(targets)}, URLs: {total}, pending: {pending}")
+
+    start = time.perf_counter()
+    try:
+        asyncio.run(scheduler.run(targets))
+    except KeyboardInterrupt:
+        print("\nInterrupted; checkpoint saved, rerun to resume.")
+    finally:
+        cache.save()
+        pool.close()
+    elapsed = time.perf_counter() - start
+
+    stats = scheduler.stats()
+    STATS_PATH.write_text(json.dumps({"wall_s": round(elapsed, 3), "domains": stats}, indent=2), encoding="utf-8")
+    print_stats(stats)
+    print(f"\nCompleted: {len(checkpoint.completed)}, failed: {len(checkpoint.failed)}, "
+          f"this run: {sum(s['requests'] for s in stats.values())} requests in {elapsed:.1f}s")
+
+    if not args.dry_run:
+        items = json.loads(ITEMS_PATH.read_text(encoding="utf-8")).get("items", [])
+        applied, skipped = apply_edits(result_edits(items, checkpoint.results()))
+        print(f"Items updated: {applied} (skipped {skipped})")
+
+
+if __name__ == "__main__":
+    run_cli(main)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Append-only journal of menu/item edits, folded into the data on every rebuild.
+
+Edits made in the desktop app (or appended here) are one JSON object per line
+in an edit journal instead of full rewrites of menus.json and
+menu_items_refactored.json. The rebuild replays the journal onto the freshly
+generated data, so edits survive rebuilds. Items are addressed by item_key
+(URL, else title::<normalization.title_key of the title>), which is stable across rebuilds where list
+positions are not. Every operation is idempotent, so replaying a journal onto
+data that already contains some of its edits is harmless.
+
+Operations:
+  {"op": "add_menu", "menu": {...}, "item_keys": [...]}
+  {"op": "delete_menu", "file": "Menus/..."}
+  {"op": "upsert_item", "item": {...}}                  merged by URL like the app
+  {"op": "upsert_item", "key": "...", "item": {...}}    merged into the item at key, if any
+  {"op": "set_item_fields", "key": "...", "fields": {"ingredients": [...], ...}}
+  {"op": "merge_items", "keys": [...], "title": "..."}
+  {"op": "delete_item", "key": "..."}
+
+The desktop journal lives next to the app's data (edit_journal.jsonl in its
+AppData directory); pass it with --journal to fold it in, or copy it to
+data/edit_journal.jsonl, which the rebuild applies by default.
+
+Usage:
+  python3 scripts/edit_journal.py                      # apply data/edit_journal.jsonl
+  python3 scripts/edit_journal.py --journal ~/Library/Application\\ Support/<app>/edit_journal.jsonl
+  python3 scripts/edit_journal.py --append '{"op": "delete_item", "key": "title::tacos"}'
+  python3 scripts/edit_journal.py --compact            # rewrite the journal without superseded edits
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_menu_items_refactored import MENUS_PATH, canonical_item_key, item_key, unique_preserve
+from extract_menus import season_label, write_menu_shards
+from generations import write_text_atomic
+from menu_item_store import LIST_KEYS, MENUS_APP_PATH, MenuItemStore
+from merge_menu_items import merge_items
+from profiling import run_cli
+
+JOURNAL_PATH = Path(__file__).resolve().parents[1] / "data" / "edit_journal.jsonl"
+
+EDITABLE_FIELDS = {
+    "ingredients", "main_protein", "recipe_tags", "side_dish", "side_dishes",
+    "item_texts", "link_texts", "meal_types", "sections",
+}
+# Operations after which an earlier set_item_fields may address a different item.
+STRUCTURAL_OPS = {"merge_items", "delete_item", "upsert_item"}
+
+
+def append_edits(entries, path=JOURNAL_PATH):
+    """Append operations with one write and one fsync; the only I/O is the new lines."""
+    at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    entries = [{"at": at, **entry} for entry in entries]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(entry, ensure_ascii=True) + "\n" for entry in entries))
+        f.flush()
+        os.fsync(f.fileno())
+    return entries
+
+
+def append_edit(entry, path=JOURNAL_PATH):
+    """Append one operation."""
+    return append_edits([entry], path)[0]
+
+
+def read_journal(path=JOURNAL_PATH):
+    """Return the journal's entries; a torn final line from an interrupted append is ignored."""
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    entries = []
+    for n, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            if n != len(lines) - 1:
+                raise
+    return entries
+
+
+class JournalReplay:
+    """Apply journal entries to a MenuItemStore and the menus list."""
+
+    def __init__(self, store, menus):
+        self.store = store
+        self.menus = menus
+        self.applied = 0
+        self.skipped = 0
+
+    def apply(self, entry):
+        handler = getattr(self, f"_{entry.get('op')}", None)
+        if handler is None or handler(entry) is False:
+            self.skipped += 1
+        else:
+            self.applied += 1
+
+    def _item(self, key):
+        return self.store.find(key)
+
+    def _add_menu(self, entry):
+        menu = dict(entry["menu"])
+        menu.setdefault("season", season_label(menu.get("week_of_date")))
+        menu_file = menu.get("file")
+        self.menus[:] = [m for m in self.menus if m.get("file") != menu_file] + [menu]
+        self.menus.sort(key=lambda m: m.get("file") or "")
+        items = [item for item in (self._item(k) for k in entry.get("item_keys", [])) if item is not None]
+        self.store.menu_index[menu_file] = {
+            "week": menu.get("week_of_date"), "season": menu["season"],
+            "items": unique_preserve([item_key(item) for item in items]),
+        }
+        for item in items:
+            item["menu_files"] = unique_preserve(item.get("menu_files", []) + [menu_file])
+            self.store._recompute_weeks(item)
+
+    def _delete_menu(self, entry):
+        menu_file = entry["file"]
+        before = len(self.menus)
+        self.menus[:] = [m for m in self.menus if m.get("file") != menu_file]
+        touched = self.store.remove_menu(menu_file)
+        return bool(touched) or len(self.menus) != before
+
+    def _upsert_item(self, entry):
+        new = entry["item"]
+        url = new.get("url")
+        existing = self._item(entry["key"]) if entry.get("key") else None
+        for item in self.store.compacted_items() if existing is None else ():
+            if url and (item.get("url") == url or url in (item.get("urls") or [])):
+                existing = item
+                break
+        if existing is None:
+            item = {k: list(new.get(k) or []) for k in LIST_KEYS}
+            item.update({k: v for k, v in new.items() if k not in LIST_KEYS})
+            item.setdefault("count", 0)
+            self.store.add_item(item)
+            return
+        for field in ("urls", "link_texts", "item_texts", "source_hints", "recipe_tags"):
+            if new.get(field):
+                existing[field] = unique_preserve((existing.get(field) or []) + new[field])
+        if new.get("ingredients"):
+            existing["ingredients"] = new["ingredients"]
+        if new.get("main_protein"):
+            existing["main_protein"] = new["main_protein"]
+
+    def _set_item_fields(self, entry):
+        item = self._item(entry["key"])
+        if item is None:
+            return False
+        for field, value in entry.get("fields", {}).items():
+            if field in EDITABLE_FIELDS:
+                item[field] = value
+
+    def _merge_items(self, entry):
+        group = []
+        for item in (self._item(k) for k in unique_preserve(entry.get("keys", []))):
+            # Keys of an already merged group all resolve to the merged item.
+            if item is not None and all(item is not other for other in group):
+                group.append(item)
+        title = (entry.get("title") or "").strip()
+        if len(group) < 2 or not title:
+            return False
+        merged = merge_items(group, title)
+        for item in group:
+            self.store.drop(item)
+        self.store.add_item(merged)
+        key = item_key(merged)
+        # Menus that listed a merged item now list the merged one.
+        old_keys = {canonical_item_key(k) for k in entry["keys"]}
+        for menu_entry in self.store.menu_index.values():
+            if old_keys & set(menu_entry["items"]):
+                menu_entry["items"] = unique_preserve(
+                    [key if k in old_keys else k for k in menu_entry["items"]]
+                )
+
+    def _delete_item(self, entry):
+        item = self._item(entry["key"])
+        if item is None:
+            return False
+        self.store.drop(item)
+        key = canonical_item_key(entry["key"])
+        for menu_entry in self.store.menu_index.values():
+            menu_entry["items"] = [k for k in menu_entry["items"] if k != key]
+
+
+def compact_entries(entries):
+    """Drop edits a later entry makes redundant, keeping the replay result unchanged.
+
+    - a set_item_fields whose fields are all set again for the same key before
+      any structural operation (merge, delete, upsert) is superseded;
+    - an add_menu followed later by a delete_menu of the same file is dropped
+      (the delete stays, since the file may also exist in the notes).
+    """
+    keep = [True] * len(entries)
+    covered = {}
+    deleted_menus = set()
+    for i in range(len(entries) - 1, -1, -1):
+        entry = entries[i]
+        op = entry.get("op")
+        if op in STRUCTURAL_OPS:
+            covered.clear()
+        elif op == "set_item_fields":
+            fields = set(entry.get("fields", {}))
+            seen = covered.setdefault(entry.get("key"), set())
+            if fields and fields <= seen:
+                keep[i] = False
+            seen |= fields
+        elif op == "delete_menu":
+            deleted_menus.add(entry.get("file"))
+        elif op == "add_menu" and entry.get("menu", {}).get("file") in deleted_menus:
+            keep[i] = False
+    return [entry for entry, k in zip(entries, keep) if k]
+
+
+def write_journal(entries, path=JOURNAL_PATH):
+    write_text_atomic(Path(path), "".join(json.dumps(e, ensure_ascii=True) + "\n" for e in entries))
+
+
+def fold(entries):
+    """Apply entries to data/ and app/public/data; return (applied, skipped)."""
+    store = MenuItemStore.load()
+    menus = json.loads(MENUS_PATH.read_text(encoding="utf-8")).get("menus", [])
+    replayer = JournalReplay(store, menus)
+    for entry in entries:
+        replayer.apply(entry)
+    if replayer.applied:
+        store.save()
+        for path in (MENUS_PATH, MENUS_APP_PATH):
+            write_text_atomic(path, json.dumps({"menus": menus}, indent=2, ensure_ascii=True))
+            write_menu_shards(menus, path.parent)
+    return replayer.applied, replayer.skipped
+
+
+def replay(journal_paths):
+    """Fold every journal into data/ and app/public/data; return (applied, skipped)."""
+    return fold([entry for path in journal_paths for entry in read_journal(path)])
+
+
+def apply_edits(entries, path=JOURNAL_PATH):
+    """Journal entries and fold them into the current data; return (applied, skipped).
+
+    Scripts that change items (fetch_recipes.py, crawl_sources.py,
+    import_recipes.py) go through here rather than rewriting
+    menu_items_refactored.json, which the next rebuild regenerates: the
+    rebuild replays the journal, so their changes survive it.
+    """
+    if not entries:
+        return 0, 0
+    append_edits(entries, path)
+    return fold(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append to, compact or apply the edit journal.")
+    parser.add_argument("--journal", action="append", help="Journal path (repeatable; default data/edit_journal.jsonl)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--append", metavar="JSON", help="Append one operation to the (first) journal")
+    group.add_argument("--compact", action="store_true", help="Rewrite the journal(s) without superseded edits")
+    args = parser.parse_args()
+
+    paths = [Path(p).expanduser() for p in args.journal] if args.journal else [JOURNAL_PATH]
+
+    if args.append:
+        entry = json.loads(args.append)
+        if not isinstance(entry, dict) or not hasattr(JournalReplay, f"_{entry.get('op')}"):
+            raise SystemExit(f"Unknown journal operation: {args.append}")
+        append_edit(entry, paths[0])
+        print(f"Appended {entry['op']} to {paths[0]}")
+        return
+
+    if args.compact:
+        for path in paths:
+            entries = read_journal(path)
+            compacted = compact_entries(entries)
+            if len(compacted) != len(entries):
+                write_journal(compacted, path)
+            print(f"{path}: {len(entries)} -> {len(compacted)} entries")
+        return
+
+    applied, skipped = replay(paths)
+    print(f"Journal edits applied: {applied}, no-ops: {skipped}")
+
+
+if __name__ == "__main__":
+    run_cli(main)
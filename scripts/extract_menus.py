@@ -1,13 +1,31 @@
+import argparse
+import hashlib
 import json
 import re
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
+from build_image_store import load_image_names, rewrite_attachments
+from generations import write_text_atomic
+from normalization import normalize_key
+from normalize_menus import (
+    extract_link_tokens,
+    line_link_tokens,
+    links_from_tokens,
+    normalize_lines_with_links,
+    write_note_lines,
+)
+from profiling import run_cli
+
 MENUS_DIR = Path(__file__).resolve().parents[1] / "Menus"
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 OUT_MENUS_PATH = DATA_DIR / "menus.json"
 OUT_RECIPES_PATH = DATA_DIR / "recipes.json"
+OUT_RECIPES_INDEX_NAME = "recipes_index.json"
+RECIPE_BODIES_DIR_NAME = "recipe_bodies"
+MENU_SHARDS_DIR_NAME = "menus"
+DECISIONS_PATH = Path(__file__).resolve().parents[1] / "menu_item_decisions.json"
 
 DATE_PATTERNS = [
     # Menu week of 6-1-21, Menu week of 12-31-2020, Week of 7-27-25
@@ -24,25 +42,8 @@ TRAILING_PAREN_RE = re.compile(r"\(([^)]+)\)\s*$")
 
 
 def extract_links(text: str):
-    md_matches = list(MD_LINK_RE.finditer(text))
-    md_links = [{"text": m.group(1), "url": m.group(2)} for m in md_matches]
-    md_spans = [m.span() for m in md_matches]
-    md_urls = {m.group(2) for m in md_matches}
-
-    def overlaps_md(span):
-        return any(span[0] >= start and span[1] <= end for start, end in md_spans)
-
-    urls = []
-    for m in URL_RE.finditer(text):
-        span = m.span()
-        if overlaps_md(span):
-            continue
-        url = m.group(0)
-        if url in md_urls:
-            continue
-        urls.append(url)
-
-    return md_links, urls
+    """Return (markdown links, bare URLs) in text; normalize_menus.py parses both."""
+    return links_from_tokens(extract_link_tokens(text))
 
 
 def strip_urls_from_text(text: str):
@@ -62,13 +63,6 @@ def strip_urls_from_text(text: str):
     return text.strip()
 
 
-def normalize_text(text: str):
-    text = text.lower()
-    text = re.sub(r"[^a-z0-9\\s]", " ", text)
-    text = " ".join(text.split())
-    return text
-
-
 # Single-ingredient produce notes to exclude from menu items.
 # Update this list if you want to keep/remove additional produce items.
 PRODUCE_SINGLETONS = {
@@ -155,10 +149,50 @@ NON_RECIPE_ITEMS = {
     "corned beef, cabbage, potatoes",
 }
 
+# Human review decisions that drop a line at parse time.
+DROP_DECISIONS = {"delete", "ingredient"}
+
 # Ingredient-only notes like "2 lbs salmon" or "1.25 lb chicken thighs".
 INGREDIENT_ONLY_RE = re.compile(r"^\s*\d+(\.\d+)?\s*lbs?\b", re.IGNORECASE)
 
 
+def load_decision_index(path: Path = DECISIONS_PATH):
+    """Compile menu_item_decisions.json into a normalized-title -> decision map.
+
+    Decisions are keyed by title rather than positional id so they survive
+    rebuilds that renumber items, and on the title with any weekday or meal
+    prefix stripped, as menu lines are. A "keep" wins over any conflicting
+    decision.
+    """
+    if not path.exists():
+        return {}
+    index = {}
+    for entry in json.loads(path.read_text(encoding="utf-8")):
+        key = normalize_key(strip_leading_prefixes(entry.get("title") or "")[0])
+        decision = entry.get("decision")
+        if not key or not decision:
+            continue
+        if index.get(key) == "keep":
+            continue
+        index[key] = decision
+    return index
+
+
+def is_dropped(decisions, clean_text: str):
+    """A line is dropped only when its whole text was decided delete/ingredient."""
+    return bool(decisions) and decisions.get(normalize_key(clean_text)) in DROP_DECISIONS
+
+
+def kept_links(decisions, md_links):
+    """The line's links minus those whose text was decided delete/ingredient.
+
+    A multi-dish line keeps its other dishes when one linked side is dropped.
+    """
+    if not decisions:
+        return md_links
+    return [link for link in md_links if decisions.get(normalize_key(link["text"])) not in DROP_DECISIONS]
+
+
 def extract_source_hint(text: str):
     m = TRAILING_PAREN_RE.search(text)
     if not m:
@@ -178,9 +212,10 @@ def strip_leading_prefixes(text: str):
     if not trimmed:
         return text, None
 
-    # Weekday prefixes like "Monday:" or "Mon -"
+    # Weekday prefixes like "Monday:" or "Mon -" (a dash needs a space before it,
+    # so "Sun-dried tomatoes" keeps its first word)
     weekday_re = re.compile(
-        r"^(mon(day)?|tue(sday)?|wed(nesday)?|thu(rsday)?|fri(day)?|sat(urday)?|sun(day)?)\\s*[:\\-–]\\s*",
+        r"^(mon(day)?|tue(sday)?|wed(nesday)?|thu(rsday)?|fri(day)?|sat(urday)?|sun(day)?)(\s*:|\s+[\-–])\s*",
         re.IGNORECASE,
     )
     trimmed = weekday_re.sub("", trimmed, count=1)
@@ -198,7 +233,7 @@ def strip_leading_prefixes(text: str):
         "drink": "drink",
     }
     meal_re = re.compile(
-        r"^(breakfast|brunch|lunch|dinner|snack|snacks|dessert|drinks|drink)\\s*[:\\-–]\\s*",
+        r"^(breakfast|brunch|lunch|dinner|snack|snacks|dessert|drinks|drink)(\s*:|\s+[\-–])\s*",
         re.IGNORECASE,
     )
     m = meal_re.match(trimmed)
@@ -260,24 +295,37 @@ def infer_meal_type(section: Optional[str], item_text: str):
     return "dinner"
 
 
-def warn_if_dirty_lines(path: Path, lines):
-    for idx, line in enumerate(lines, start=1):
-        checkbox_tokens = list(CHECKBOX_TOKEN_RE.finditer(line))
-        if len(checkbox_tokens) > 1:
+def warn_if_dirty_lines(path: Path, lines, line_tokens):
+    for idx, (line, tokens) in enumerate(zip(lines, line_tokens), start=1):
+        if len(CHECKBOX_TOKEN_RE.findall(line)) > 1:
             print(f"Warning: {path} has multiple checkbox items on one line at {idx}")
             continue
 
-        if checkbox_tokens:
-            text = line[checkbox_tokens[0].end():].strip()
-            md_links, urls = extract_links(text)
-            if len(md_links) + len(urls) > 1:
-                print(f"Warning: {path} has multiple links on one item at {idx}")
+        if tokens and len(tokens) > 1:
+            print(f"Warning: {path} has multiple links on one item at {idx}")
 
 
-def parse_menu_file(path: Path):
+def parse_menu_file(path: Path, decisions=None, normalize=False, write_normalized=False):
+    """Parse one menu note.
+
+    With normalize=True the lines are split in memory the same way
+    normalize_menus.py would, so the note is read once; write_normalized=True
+    also writes the split lines back to the note, but only if they changed.
+    """
     text = path.read_text(encoding="utf-8", errors="replace")
     lines = text.splitlines()
-    warn_if_dirty_lines(path, lines)
+    # Each checkbox line's links are parsed once, here or while normalizing.
+    if normalize:
+        lines, line_tokens, changed = normalize_lines_with_links(lines)
+        if changed:
+            if write_normalized:
+                write_note_lines(path, lines)
+                print(f"Normalized {path}")
+            else:
+                print(f"Normalized {path} in memory (pass --write-normalized to update the note)")
+    else:
+        line_tokens = [line_link_tokens(line) for line in lines]
+        warn_if_dirty_lines(path, lines, line_tokens)
 
     title = None
     week_of_date = parse_date_from_filename(path.name)
@@ -286,7 +334,7 @@ def parse_menu_file(path: Path):
     items = []
     current_section = None
 
-    for line in lines:
+    for line, tokens in zip(lines, line_tokens):
         if title is None:
             m = HEADING_RE.match(line)
             if m:
@@ -296,16 +344,19 @@ def parse_menu_file(path: Path):
         if cb:
             mark = cb.group("mark")
             item_text = cb.group("text").strip()
-            md_links, urls = extract_links(item_text)
+            md_links, urls = links_from_tokens(tokens or [])
             # Strip URLs from the text since they're now in clickable pills
             clean_text = strip_urls_from_text(item_text)
             # Strip leading weekday/meal prefixes and infer meal type from prefix if present
             clean_text, prefix_meal = strip_leading_prefixes(clean_text)
-            normalized = normalize_text(clean_text)
+            normalized = normalize_key(clean_text)
             if normalized in PRODUCE_SINGLETONS or normalized in NON_RECIPE_ITEMS:
                 continue
             if INGREDIENT_ONLY_RE.match(clean_text):
                 continue
+            if is_dropped(decisions, clean_text):
+                continue
+            md_links = kept_links(decisions, md_links)
             items.append({
                 "text": clean_text,
                 "section": current_section,
@@ -362,23 +413,127 @@ def parse_recipe_file(path: Path):
     }
 
 
+def recipe_content_hash(text: str):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def write_recipe_shards(recipes, data_dir: Path = DATA_DIR):
+    """Write a lightweight recipe index plus one content-addressed body per recipe.
+
+    The index carries everything the list view needs; bodies live at
+    recipe_bodies/<hash>.md and are only fetched when a recipe is opened.
+    Unchanged bodies keep their file name, and orphaned bodies are removed.
+    """
+    bodies_dir = data_dir / RECIPE_BODIES_DIR_NAME
+    bodies_dir.mkdir(parents=True, exist_ok=True)
+
+    index = []
+    live = set()
+    for recipe in recipes:
+        text = recipe.get("text", "")
+        digest = recipe_content_hash(text)
+        body_path = bodies_dir / f"{digest}.md"
+        if not body_path.exists():
+            write_text_atomic(body_path, text)
+        live.add(body_path.name)
+        index.append({
+            "file": recipe.get("file"),
+            "title": recipe.get("title"),
+            "links": recipe.get("links", []),
+            "urls": recipe.get("urls", []),
+            "attachments": recipe.get("attachments", []),
+            "hash": digest,
+            "body": f"{RECIPE_BODIES_DIR_NAME}/{digest}.md",
+        })
+
+    for stale in bodies_dir.glob("*.md"):
+        if stale.name not in live:
+            stale.unlink()
+
+    write_text_atomic(
+        data_dir / OUT_RECIPES_INDEX_NAME,
+        json.dumps({"recipes": index}, indent=2, ensure_ascii=True),
+    )
+
+
+def write_menu_shards(menus, data_dir: Path = DATA_DIR):
+    """Write one menus/<year>.json shard per year plus menus/manifest.json.
+
+    The manifest lists shards newest first with week/item counts and date
+    ranges, so a client can load recent history first and the rest on demand.
+    Undated menus go to menus/undated.json.
+    """
+    shards_dir = data_dir / MENU_SHARDS_DIR_NAME
+    shards_dir.mkdir(parents=True, exist_ok=True)
+
+    by_year = {}
+    for menu in menus:
+        week = menu.get("week_of_date")
+        by_year.setdefault(week[:4] if week else "undated", []).append(menu)
+
+    manifest = []
+    for year in sorted(by_year):
+        shard_menus = sorted(by_year[year], key=lambda m: m.get("week_of_date") or "", reverse=True)
+        weeks = [m["week_of_date"] for m in shard_menus if m.get("week_of_date")]
+        name = f"{year}.json"
+        write_text_atomic(
+            shards_dir / name,
+            json.dumps({"menus": shard_menus}, indent=2, ensure_ascii=True),
+        )
+        manifest.append({
+            "shard": f"{MENU_SHARDS_DIR_NAME}/{name}",
+            "year": None if year == "undated" else int(year),
+            "menus": len(shard_menus),
+            "items": sum(len(m.get("items", [])) for m in shard_menus),
+            "first_week": min(weeks) if weeks else None,
+            "last_week": max(weeks) if weeks else None,
+        })
+
+    # Newest dated shard first, undated last.
+    manifest.sort(key=lambda s: (s["year"] is None, -(s["year"] or 0)))
+    live = {Path(s["shard"]).name for s in manifest} | {"manifest.json"}
+    for stale in shards_dir.glob("*.json"):
+        if stale.name not in live:
+            stale.unlink()
+
+    write_text_atomic(
+        shards_dir / "manifest.json",
+        json.dumps({"shards": manifest}, indent=2, ensure_ascii=True),
+    )
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Extract menus and recipes from the notes.")
+    parser.add_argument("--normalize", action="store_true",
+                        help="Split multi-item lines in memory (normalize_menus.py) while extracting")
+    parser.add_argument("--write-normalized", action="store_true",
+                        help="With --normalize, also rewrite notes whose lines were split")
+    args = parser.parse_args()
+
     menu_files = sorted(MENUS_DIR.glob("*.md"))
-    menus = [parse_menu_file(p) for p in menu_files]
+    decisions = load_decision_index()
+    menus = [
+        parse_menu_file(p, decisions, args.normalize or args.write_normalized, args.write_normalized)
+        for p in menu_files
+    ]
 
     recipe_files = sorted((MENUS_DIR.parent / "Recipes").glob("*.md"))
     recipes = [parse_recipe_file(p) for p in recipe_files]
+    # Notes link their exports (attachments/<UUID>.jpeg); point them at the stored copies.
+    rewrite_attachments(recipes, load_image_names())
 
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    OUT_MENUS_PATH.write_text(
+    write_text_atomic(
+        OUT_MENUS_PATH,
         json.dumps({"menus": menus}, indent=2, ensure_ascii=True),
-        encoding="utf-8",
     )
-    OUT_RECIPES_PATH.write_text(
+    write_text_atomic(
+        OUT_RECIPES_PATH,
         json.dumps({"recipes": recipes}, indent=2, ensure_ascii=True),
-        encoding="utf-8",
     )
+    write_recipe_shards(recipes)
+    write_menu_shards(menus)
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+"""
+Batch-fetch recipe pages and back-fill ingredients, tags and main protein.
+
+This is the batch counterpart of the desktop app's scrape_recipe command
+(app/src-tauri/src/main.rs): pages are parsed the same way (og:title/<title>,
+itemprop and class-based ingredient lists, tag metas/links, and JSON-LD
+recipeIngredient/keywords/recipeCategory as in extract_from_json_ld).
+
+Requests go through a small keep-alive connection pool (per host) and an
+on-disk HTTP cache under data/http_cache: bodies are stored by sha256, and
+cached URLs are revalidated with If-None-Match/If-Modified-Since, so a rerun
+costs one 304 per page. --deadline bounds the whole batch.
+
+Back-filled fields go into the edit journal as set_item_fields entries (see
+edit_journal.apply_edits), so the rebuild, which regenerates the items, keeps
+them.
+
+Usage:
+  python3 scripts/fetch_recipes.py                 # items without ingredients
+  python3 scripts/fetch_recipes.py --all --limit 50
+  python3 scripts/fetch_recipes.py --url https://example.com/recipe   # print one scrape
+"""
+
+import argparse
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from build_menu_items_refactored import item_key
+from edit_journal import apply_edits
+from profiling import run_cli
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+ITEMS_PATH = DATA_DIR / "menu_items_refactored.json"
+CACHE_DIR = DATA_DIR / "http_cache"
+
+USER_AGENT = "MenuMaker Fetcher/0.1"
+TIMEOUT = 20
+WORKERS = 8
+PER_HOST = 2
+MAX_REDIRECTS = 5
+
+
+# --- HTTP -----------------------------------------------------------------
+
+
+class ConnectionPool:
+    """Keep-alive http.client connections, at most `per_host` per (scheme, host, port)."""
+
+    def __init__(self, per_host=PER_HOST, timeout=TIMEOUT):
+        self.per_host = per_host
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._slots = {}
+
+    def _key(self, url):
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return parts.scheme, parts.hostname, port
+
+    def _acquire(self, key):
+        with self._lock:
+            slots = self._slots.setdefault(key, threading.BoundedSemaphore(self.per_host))
+            idle = self._idle.setdefault(key, queue.LifoQueue())
+        slots.acquire()
+        try:
+            return idle.get_nowait(), True
+        except queue.Empty:
+            scheme, host, port = key
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            return cls(host, port, timeout=self.timeout), False
+
+    def _release(self, key, conn, reusable):
+        if reusable:
+            self._idle[key].put(conn)
+        else:
+            conn.close()
+        self._slots[key].release()
+
+    def request(self, url, headers):
+        """GET url and return (status, headers, body bytes); the body is fully read."""
+        key = self._key(url)
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                resp = self._send(conn, path, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry once on a fresh one.
+                conn.close()
+                resp = self._send(conn, path, headers)
+            body = resp.read()
+        except BaseException:
+            self._release(key, conn, False)
+            raise
+        self._release(key, conn, not resp.will_close)
+        return resp.status, {k.lower(): v for k, v in resp.getheaders()}, body
+
+    @staticmethod
+    def _send(conn, path, headers):
+        conn.request("GET", path, headers=headers)
+        return conn.getresponse()
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                while not idle.empty():
+                    idle.get_nowait().close()
+
+
+def decode_body(headers, body):
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding == "gzip":
+        body = gzip.decompress(body)
+    elif encoding == "deflate":
+        body = zlib.decompress(body)
+    return body
+
+
+def body_charset(content_type):
+    for part in (content_type or "").split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip("\"'")
+    return "utf-8"
+
+
+class HTTPCache:
+    """Content-addressed response cache: index.json maps url -> validators + body sha256."""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.dir = Path(cache_dir)
+        self.index_path = self.dir / "index.json"
+        self._lock = threading.Lock()
+        try:
+            self.index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            self.index = {}
+
+    def body_path(self, digest):
+        return self.dir / "bodies" / digest[:2] / digest
+
+    def get(self, url):
+        entry = self.index.get(url)
+        if entry and self.body_path(entry["sha256"]).exists():
+            return entry
+        return None
+
+    def read(self, entry):
+        return self.body_path(entry["sha256"]).read_bytes()
+
+    def put(self, url, headers, body, final_url):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.body_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        entry = {
+            "sha256": digest,
+            "final_url": final_url,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "content_type": headers.get("content-type"),
+            "fetched_at": time.time(),
+        }
+        with self._lock:
+            self.index[url] = entry
+        return entry
+
+    def touch(self, url):
+        with self._lock:
+            self.index[url]["fetched_at"] = time.time()
+
+    def save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = json.dumps(self.index, indent=2, sort_keys=True, ensure_ascii=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+
+class Fetcher:
+    def __init__(self, cache=None, pool=None, max_age=0):
+        self.cache = cache or HTTPCache()
+        self.pool = pool or ConnectionPool()
+        self.max_age = max_age
+        self.stats = {"network": 0, "revalidated": 0, "fresh": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def fetch(self, url):
+        """Return (html text, final url), served from cache when it is fresh or revalidates."""
+        entry = self.cache.get(url)
+        if entry and self.max_age and time.time() - entry["fetched_at"] < self.max_age:
+            self._count("fresh")
+            return self._text(entry), entry["final_url"]
+
+        headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip", "Accept": "text/html,*/*"}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        target = url
+        for _ in range(MAX_REDIRECTS + 1):
+            status, resp_headers, body = self.pool.request(target, headers)
+            if status in (301, 302, 303, 307, 308) and resp_headers.get("location"):
+                target = urljoin(target, resp_headers["location"])
+                continue
+            break
+        else:
+            raise RuntimeError(f"too many redirects for {url}")
+
+        if status == 304 and entry:
+            self._count("revalidated")
+            self.cache.touch(url)
+            return self._text(entry), entry["final_url"]
+        if status != 200:
+            raise RuntimeError(f"HTTP {status} for {url}")
+        self._count("network")
+        body = decode_body(resp_headers, body)
+        entry = self.cache.put(url, resp_headers, body, target)
+        return body.decode(body_charset(entry["content_type"]), errors="replace"), target
+
+    def _text(self, entry):
+        return self.cache.read(entry).decode(body_charset(entry.get("content_type")), errors="replace")
+
+
+# --- Parsing (mirrors scrape_recipe in app/src-tauri/src/main.rs) -------------
+
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+}
+
+
+def normalize_whitespace(value):
+    return " ".join(value.split())
+
+
+def dedupe(values):
+    out = []
+    seen = set()
+    for v in values:
+        if not v:
+            continue
+        # Same as Rust's eq_ignore_ascii_case: only ASCII letters are case-folded.
+        key = "".join(c.lower() if c.isascii() else c for c in v)
+        if key not in seen:
+            seen.add(key)
+            out.append(v)
+    return out
+
+
+def detect_protein(ingredients):
+    if not ingredients:
+        return "unknown"
+    text = " ".join(ingredients).lower()
+
+    def has(terms):
+        return any(t in text for t in terms)
+
+    if has(["tofu", "tempeh", "seitan"]):
+        return "tofu"
+    if has(["chicken", "beef", "pork", "turkey", "sausage", "bacon", "ham", "salmon", "tuna", "shrimp",
+            "scallop", "crab", "fish", "egg", "lamb"]):
+        return "meat"
+    return "vegetarian"
+
+
+class RecipePageParser(HTMLParser):
+    """Collects the elements scrape_recipe selects, with their text content."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []  # (tag, classes)
+        self.open = []  # [kind, depth, parts]
+        self.og_title = None
+        self.og_url = None
+        self.canonical_url = None
+        self.title = None
+        self.json_ld = []
+        self.itemprop_ingredients = []
+        self.list_ingredients = []
+        self.meta_tags = []
+        self.link_tags = []
+
+    def _ancestor_has_class(self, name):
+        return any(name in classes for _, classes in self.stack)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v or "") for k, v in attrs}
+        classes = attrs.get("class", "").split()
+        if tag == "meta":
+            prop = attrs.get("property", "")
+            if prop == "og:title" and self.og_title is None:
+                self.og_title = attrs.get("content", "")
+            if prop == "og:url" and self.og_url is None:
+                self.og_url = attrs.get("content") or None
+            if prop == "article:tag" or attrs.get("name", "") == "keywords":
+                self.meta_tags.append(attrs.get("content", ""))
+        if tag == "link" and "canonical" in attrs.get("rel", "").split() and self.canonical_url is None:
+            self.canonical_url = attrs.get("href") or None
+        if tag in VOID_TAGS:
+            return
+
+        kinds = []
+        if tag == "title" and self.title is None:
+            kinds.append("title")
+        if tag == "script" and attrs.get("type") == "application/ld+json":
+            kinds.append("json_ld")
+        if attrs.get("itemprop") == "recipeIngredient":
+            kinds.append("itemprop")
+        if (
+            (tag == "li" and (self._ancestor_has_class("ingredients")
+                              or "ingredient" in attrs.get("class", "")
+                              or self._ancestor_has_class("tasty-recipes-ingredients")))
+            or "wprm-recipe-ingredient" in classes
+        ):
+            kinds.append("list")
+        if tag == "a" and (attrs.get("rel") == "tag" or self._ancestor_has_class("tags")
+                           or self._ancestor_has_class("tag")):
+            kinds.append("link_tag")
+
+        self.stack.append((tag, set(classes)))
+        for kind in kinds:
+            self.open.append([kind, len(self.stack), []])
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        # Browsers close unclosed children implicitly; do the same.
+        for depth in range(len(self.stack), 0, -1):
+            if self.stack[depth - 1][0] == tag:
+                while len(self.stack) >= depth:
+                    self._close(len(self.stack))
+                    self.stack.pop()
+                return
+
+    def _close(self, depth):
+        still_open = []
+        for kind, at, parts in self.open:
+            if at < depth:
+                still_open.append([kind, at, parts])
+                continue
+            if kind == "json_ld":
+                self.json_ld.append("".join(parts))
+                continue
+            text = normalize_whitespace(" ".join(parts))
+            if kind == "title":
+                self.title = text
+            elif kind == "itemprop":
+                self.itemprop_ingredients.append(text)
+            elif kind == "list":
+                self.list_ingredients.append(text)
+            elif kind == "link_tag":
+                self.link_tags.append(text)
+        self.open = still_open
+
+    def handle_data(self, data):
+        for _, _, parts in self.open:
+            parts.append(data)
+
+    def close(self):
+        super().close()
+        while self.stack:
+            self._close(len(self.stack))
+            self.stack.pop()
+
+
+def json_ld_recipes(scripts):
+    """Yield the Recipe node of every top-level (or @graph) JSON-LD node that has one."""
+    for raw in scripts:
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            continue
+        nodes = value if isinstance(value, list) else [value]
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            if node.get("@type") == "Recipe":
+                yield node
+            elif isinstance(node.get("@graph"), list):
+                recipe = next(
+                    (n for n in node["@graph"] if isinstance(n, dict) and n.get("@type") == "Recipe"),
+                    None,
+                )
+                if recipe is not None:
+                    yield recipe
+
+
+def extract_from_json_ld(scripts):
+    """Return (ingredients, tags) from JSON-LD Recipe nodes, as extract_from_json_ld does."""
+    ingredients = []
+    tags = []
+    for recipe in json_ld_recipes(scripts):
+        if isinstance(recipe.get("recipeIngredient"), list):
+            ingredients += [normalize_whitespace(i) for i in recipe["recipeIngredient"] if isinstance(i, str)]
+        if isinstance(recipe.get("keywords"), str):
+            tags += [t for t in (normalize_whitespace(p) for p in recipe["keywords"].split(",")) if t]
+        if isinstance(recipe.get("recipeCategory"), list):
+            tags += [normalize_whitespace(c) for c in recipe["recipeCategory"] if isinstance(c, str)]
+    return dedupe(ingredients), dedupe(tags)
+
+
+def scrape_html(html):
+    """Return {"title", "ingredients", "tags", "main_protein"} like the scrape_recipe command.
+
+    "canonical_url" (<link rel=canonical> or og:url, else None) is added for importers.
+    """
+    parser = RecipePageParser()
+    parser.feed(html)
+    parser.close()
+
+    title = normalize_whitespace(parser.og_title) if parser.og_title is not None else (parser.title or "")
+    json_ld_ingredients, json_ld_tags = extract_from_json_ld(parser.json_ld)
+
+    ingredients = [t for t in parser.itemprop_ingredients if t]
+    if not ingredients:
+        ingredients = [t for t in parser.list_ingredients if t]
+
+    tags = []
+    for content in parser.meta_tags:
+        tags += [t for t in (normalize_whitespace(p) for p in content.split(",")) if t]
+    tags += [t for t in parser.link_tags if t]
+
+    ingredients += json_ld_ingredients
+    tags += json_ld_tags
+
+    ingredients = dedupe(ingredients)
+    return {
+        "title": title,
+        "ingredients": ingredients,
+        "tags": dedupe(tags),
+        "main_protein": detect_protein(ingredients),
+        "canonical_url": parser.canonical_url or parser.og_url,
+    }
+
+
+# --- Batch ----------------------------------------------------------------
+
+
+def item_fetch_url(item):
+    for url in [item.get("url")] + item.get("urls", []):
+        if url and url.startswith(("http://", "https://")):
+            return urldefrag(url)[0]
+    return None
+
+
+def fetch_all(urls, fetcher, workers=WORKERS, deadline=None):
+    """Scrape every url; return ({url: result or {"error": str}}, urls not started before the deadline)."""
+    results = {}
+    started_at = time.monotonic()
+    skipped = []
+
+    def job(url):
+        if deadline is not None and time.monotonic() - started_at > deadline:
+            skipped.append(url)
+            return url, None
+        try:
+            html, _ = fetcher.fetch(url)
+            return url, scrape_html(html)
+        except Exception as exc:  # noqa: BLE001 - one bad page must not stop the batch
+            return url, {"error": f"{type(exc).__name__}: {exc}"}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(job, url) for url in urls]):
+            url, result = future.result()
+            if result is not None:
+                results[url] = result
+    return results, skipped
+
+
+def result_edits(items, results, overwrite=False):
+    """Edit journal set_item_fields entries filling ingredients/recipe_tags/main_protein from scrape results."""
+    edits = []
+    for item in items:
+        result = results.get(item_fetch_url(item))
+        if not result or "error" in result or not result["ingredients"]:
+            continue
+        if item.get("ingredients") and not overwrite:
+            continue
+        fields = {"ingredients": result["ingredients"]}
+        if result["tags"] and (overwrite or not item.get("recipe_tags")):
+            fields["recipe_tags"] = result["tags"]
+        if overwrite or item.get("main_protein") in (None, "", "unknown"):
+            fields["main_protein"] = result["main_protein"]
+        fields = {k: v for k, v in fields.items() if item.get(k) != v}
+        if fields:
+            edits.append({"op": "set_item_fields", "key": item_key(item), "fields": fields})
+    return edits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back-fill recipe ingredients by fetching item URLs.")
+    parser.add_argument("--url", help="Scrape one URL and print the result")
+    parser.add_argument("--all", action="store_true", help="Refetch items that already have ingredients")
+    parser.add_argument("--limit", type=int, help="Fetch at most this many URLs")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Concurrent fetches")
+    parser.add_argument("--per-host", type=int, default=PER_HOST, help="Open connections per host")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="Per-request socket timeout (seconds)")
+    parser.add_argument("--deadline", type=float, help="Stop starting new fetches after this many seconds")
+    parser.add_argument("--max-age", type=float, default=0,
+                        help="Serve cached pages younger than this many seconds without revalidating")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR), help="HTTP cache directory")
+    parser.add_argument("--dry-run", action="store_true", help="Fetch and report without writing items")
+    args = parser.parse_args()
+
+    cache = HTTPCache(args.cache_dir)
+    pool = ConnectionPool(args.per_host, args.timeout)
+    fetcher = Fetcher(cache, pool, args.max_age)
+
+    if args.url:
+        try:
+            html, final_url = fetcher.fetch(args.url)
+        finally:
+            cache.save()
+            pool.close()
+        print(json.dumps({"url": final_url, **scrape_html(html)}, indent=2, ensure_ascii=False))
+        return
+
+    items = json.loads(ITEMS_PATH.read_text(encoding="utf-8")).get("items", [])
+    urls = []
+    for item in items:
+        if item.get("ingredients") and not args.all:
+            continue
+        url = item_fetch_url(item)
+        if url and url not in urls:
+            urls.append(url)
+    if args.limit is not None:
+        urls = urls[:args.limit]
+
+    start = time.perf_counter()
+    try:
+        results, skipped = fetch_all(urls, fetcher, args.workers, args.deadline)
+    finally:
+        cache.save()
+        pool.close()
+    elapsed = time.perf_counter() - start
+
+    # Journaled, so the next rebuild (which regenerates the items) keeps them.
+    edits = result_edits(items, results, overwrite=args.all)
+    if not args.dry_run:
+        apply_edits(edits)
+    updated = len(edits)
+
+    errors = {url: r["error"] for url, r in results.items() if "error" in r}
+    print(f"URLs fetched: {len(results)} of {len(urls)} in {elapsed:.1f}s "
+          f"({fetcher.stats['network']} downloaded, {fetcher.stats['revalidated']} not modified, "
+          f"{fetcher.stats['fresh']} fresh from cache)")
+    print(f"Items updated: {updated}{' (dry run)' if args.dry_run else ''}")
+    if skipped:
+        print(f"Not started before the deadline: {len(skipped)}")
+    for url, error in sorted(errors.items()):
+        print(f"  ! {url}: {error}")
+
+
+if __name__ == "__main__":
+    run_cli(main)
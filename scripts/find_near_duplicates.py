@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Find near-duplicate refactored items with MinHash + LSH and emit a merge plan.
+
+Each item is reduced to character shingles of its normalized item_texts and
+link_texts, signed with MinHash, and bucketed by LSH bands so only items that
+share a band are compared. Candidate pairs above the Jaccard threshold are
+grouped with union-find and written in the same merge_plan_*.json format the
+merge tools export, ready for review and merge_menu_items.py --plan.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_menu_items_refactored import get_primary_title
+from generations import write_text_atomic
+from normalization import normalize_key
+from profiling import run_cli
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_PATH = ROOT / "data" / "menu_items_refactored.json"
+
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16
+THRESHOLD = 0.6
+
+# Mersenne prime used for the universal hash family.
+PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    text = normalize_key(text)
+    if not text:
+        return set()
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def item_shingles(item):
+    out = set()
+    for key in ("item_texts", "link_texts"):
+        for text in item.get(key, []):
+            if text:
+                out |= shingles(text)
+    return out
+
+
+def shingle_hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def make_permutations(num_perm=NUM_PERM, seed=1):
+    rng = random.Random(seed)
+    return [(rng.randrange(1, PRIME), rng.randrange(0, PRIME)) for _ in range(num_perm)]
+
+
+def minhash(shingle_set, perms):
+    hashes = [shingle_hash(s) for s in shingle_set]
+    return tuple(min(((a * h + b) % PRIME) & MAX_HASH for h in hashes) for a, b in perms)
+
+
+def estimated_jaccard(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def candidate_pairs(signatures, bands=BANDS):
+    """Yield index pairs sharing at least one LSH band bucket."""
+    rows = len(next(iter(signatures.values()))) // bands
+    seen = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for idx, sig in signatures.items():
+            buckets[sig[band * rows:(band + 1) * rows]].append(idx)
+        for members in buckets.values():
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair not in seen:
+                        seen.add(pair)
+                        yield pair
+
+
+def find(parent, x):
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def find_groups(items, threshold=THRESHOLD, bands=BANDS, num_perm=NUM_PERM, allow_distinct_urls=False):
+    """Return [(item_ids, similarity)] for near-duplicate clusters of two or more items."""
+    perms = make_permutations(num_perm)
+    signatures = {}
+    for idx, item in enumerate(items):
+        sh = item_shingles(item)
+        if sh:
+            signatures[idx] = minhash(sh, perms)
+    if not signatures:
+        return []
+
+    parent = {idx: idx for idx in signatures}
+    # URLs per set, so the guard also holds across chains through URL-less items.
+    set_urls = {idx: {items[idx]["url"]} if items[idx].get("url") else set() for idx in signatures}
+    best = defaultdict(float)
+    for a, b in candidate_pairs(signatures, bands):
+        ra, rb = find(parent, a), find(parent, b)
+        if not allow_distinct_urls and ra != rb and len(set_urls[ra] | set_urls[rb]) > 1:
+            continue
+        sim = estimated_jaccard(signatures[a], signatures[b])
+        if sim < threshold:
+            continue
+        if ra != rb:
+            parent[rb] = ra
+            set_urls[ra] |= set_urls.pop(rb)
+        best[ra] = max(best[ra], best.pop(rb, 0.0), sim)
+
+    clusters = defaultdict(list)
+    for idx in signatures:
+        clusters[find(parent, idx)].append(idx)
+    groups = []
+    for root, members in clusters.items():
+        if len(members) > 1:
+            groups.append((sorted(members), round(best.get(root, threshold), 3)))
+    groups.sort(key=lambda g: g[0][0])
+    return groups
+
+
+def group_title(items, item_ids):
+    """Pick the primary title of the most frequently used item in the group."""
+    ranked = sorted(item_ids, key=lambda i: (-(items[i].get("count") or 0), i))
+    for idx in ranked:
+        title = get_primary_title(items[idx])
+        if title:
+            return title
+    return ""
+
+
+def plan_timestamp(now=None):
+    now = now or datetime.now(timezone.utc)
+    iso = now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+    return iso, iso.replace(":", "-").replace(".", "-")
+
+
+def build_plan(items, groups):
+    generated_at, _ = plan_timestamp()
+    return {
+        "generatedAt": generated_at,
+        "groups": [
+            {
+                "id": n,
+                "title": group_title(items, item_ids),
+                "itemIds": item_ids,
+                "similarity": similarity,
+            }
+            for n, (item_ids, similarity) in enumerate(groups, start=1)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate merge plan candidates for near-duplicate items.")
+    parser.add_argument("--data", default=str(DATA_PATH), help="Refactored data JSON")
+    parser.add_argument("--out", help="Output plan path (default: merge_plan_<timestamp>.json in repo root)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Minimum estimated Jaccard similarity")
+    parser.add_argument("--bands", type=int, default=BANDS, help="LSH bands (must divide --num-perm)")
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM, help="MinHash permutations")
+    parser.add_argument("--allow-distinct-urls", action="store_true",
+                        help="Also group items whose URLs differ")
+    args = parser.parse_args()
+
+    if args.num_perm % args.bands:
+        parser.error("--bands must divide --num-perm")
+
+    items = json.loads(Path(args.data).read_text(encoding="utf-8")).get("items", [])
+    groups = find_groups(items, args.threshold, args.bands, args.num_perm, args.allow_distinct_urls)
+    plan = build_plan(items, groups)
+
+    out_path = Path(args.out) if args.out else ROOT / f"merge_plan_{plan_timestamp()[1]}.json"
+    write_text_atomic(out_path, json.dumps(plan, indent=2, ensure_ascii=True))
+
+    print(f"Candidate groups: {len(groups)}")
+    for group in plan["groups"]:
+        print(f"- {group['title']} ({len(group['itemIds'])} items, ~{group['similarity']:.2f})")
+    print(f"Plan written to {out_path}")
+
+
+if __name__ == "__main__":
+    run_cli(main)
@@ -3,6 +3,10 @@ import re
 from pathlib import Path
 from urllib.parse import urlparse
 
+from extract_menus import write_recipe_shards
+from generations import write_text_atomic
+from profiling import run_cli
+
 DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "recipes.json"
 APP_DATA_PATH = Path(__file__).resolve().parents[1] / "app" / "public" / "data" / "recipes.json"
 
@@ -90,11 +94,13 @@ def main():
     recipes = data.get("recipes", [])
     changed = fix_titles(recipes)
 
-    DATA_PATH.write_text(json.dumps({"recipes": recipes}, indent=2, ensure_ascii=True), encoding="utf-8")
-    APP_DATA_PATH.write_text(json.dumps({"recipes": recipes}, indent=2, ensure_ascii=True), encoding="utf-8")
+    write_text_atomic(DATA_PATH, json.dumps({"recipes": recipes}, indent=2, ensure_ascii=True))
+    write_text_atomic(APP_DATA_PATH, json.dumps({"recipes": recipes}, indent=2, ensure_ascii=True))
+    write_recipe_shards(recipes, DATA_PATH.parent)
+    write_recipe_shards(recipes, APP_DATA_PATH.parent)
 
     print(f"Fixed titles: {changed}")
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -3,6 +3,9 @@ import re
 from pathlib import Path
 from urllib.parse import urlparse
 
+from generations import write_text_atomic
+from profiling import run_cli
+
 DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "menu_items_refactored.json"
 APP_DATA_PATH = Path(__file__).resolve().parents[1] / "app" / "public" / "data" / "menu_items_refactored.json"
 
@@ -65,11 +68,11 @@ def main():
         if clean_titles(item):
             changed += 1
 
-    DATA_PATH.write_text(json.dumps({"items": items}, indent=2, ensure_ascii=True), encoding="utf-8")
-    APP_DATA_PATH.write_text(json.dumps({"items": items}, indent=2, ensure_ascii=True), encoding="utf-8")
+    write_text_atomic(DATA_PATH, json.dumps({"items": items}, indent=2, ensure_ascii=True))
+    write_text_atomic(APP_DATA_PATH, json.dumps({"items": items}, indent=2, ensure_ascii=True))
 
     print(f"Fixed refactored titles: {changed}")
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Generation directories for published data, with atomic writes and rollback.
+
+Pipeline scripts write their outputs with write_text_atomic (a temporary file
+renamed over the target), so a reader never sees a half-written file and
+every write produces a new inode. After a successful rebuild,
+rebuild_all_data.py commits the full output set as a new generation:
+data/generations/<id>/ holds hardlinks to the files just written (no copies),
+the directory appears under its final name with one rename, and the
+data/generations/CURRENT pointer is then replaced atomically. Readers that
+want a consistent set (serve_data.py --generations) read through CURRENT; the
+last --keep generations are kept for instant rollback.
+
+A hardlinked generation is only as safe as its writers: a file rewritten in
+place changes every generation that shares its inode. Each generation records
+the inode, size and mtime of its files. commit() copies instead of linking any
+file whose inode an earlier generation holds with a different size or mtime
+(it was written in place), and checkout() refuses a generation whose files no
+longer match what was recorded, unless forced.
+
+rebuild_all_data.py also keeps the live trees consistent: stages run in a
+staging workspace (link_tree mirrors the live files into it), and the result
+is published at the end. app/public/data, the directory the app loads, is
+swapped in whole with one atomic exchange (see exchange); the other outputs
+are replaced file by file (sync_path).
+
+Generation ids are UTC timestamps, with -2, -3, ... appended when several
+are made within one second; generations() orders them by time, then by
+that number.
+
+Usage:
+  python3 scripts/generations.py --list
+  python3 scripts/generations.py --rollback            # previous generation
+  python3 scripts/generations.py --rollback 20261019T114356Z
+"""
+
+import argparse
+import ctypes
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from profiling import run_cli
+
+ROOT = Path(__file__).resolve().parents[1]
+GENERATIONS_DIR = ROOT / "data" / "generations"
+CURRENT_NAME = "CURRENT"
+MANIFEST_NAME = "generation.json"
+KEEP = 5
+
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+
+def _tmp_path(path):
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+
+def write_bytes_atomic(path, data):
+    """Write data to a temporary sibling and rename it over path."""
+    path = Path(path)
+    tmp = _tmp_path(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_text_atomic(path, text):
+    write_bytes_atomic(path, text.encode("utf-8"))
+
+
+def link_or_copy(src, dest):
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def file_stat(path):
+    st = os.stat(path)
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def iter_files(path):
+    if path.is_file():
+        yield path
+    elif path.is_dir():
+        yield from sorted(p for p in path.rglob("*") if p.is_file() and not p.name.endswith(".tmp"))
+
+
+def link_tree(src, dest):
+    """Hardlink the file src, or every file under the directory src, to the same place under dest."""
+    src, dest = Path(src), Path(dest)
+    if src.is_dir():
+        dest.mkdir(parents=True, exist_ok=True)
+    for f in iter_files(src):
+        target = dest / f.relative_to(src) if src.is_dir() else dest
+        target.parent.mkdir(parents=True, exist_ok=True)
+        link_or_copy(f, target)
+
+
+def sync_path(src, dest):
+    """Make the file or directory dest hold what src holds, replacing each changed file atomically."""
+    src, dest = Path(src), Path(dest)
+    if not src.exists():
+        if dest.is_dir():
+            shutil.rmtree(dest)
+        elif dest.exists():
+            dest.unlink()
+        return
+    wanted = set()
+    for f in iter_files(src):
+        target = dest / f.relative_to(src) if src.is_dir() else dest
+        wanted.add(target)
+        try:
+            if os.path.samefile(f, target):
+                continue
+        except FileNotFoundError:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _tmp_path(target)
+        link_or_copy(f, tmp)
+        os.replace(tmp, target)
+    if src.is_dir():
+        for f in iter_files(dest):
+            if f not in wanted:
+                f.unlink()
+
+
+def _renameat2():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return getattr(ctypes.CDLL(None, use_errno=True), "renameat2", None)
+    except OSError:
+        return None
+
+
+def exchange(a, b):
+    """Swap the paths a and b, so readers of b see either all of the old or all of the new.
+
+    On Linux this is one renameat2(RENAME_EXCHANGE) call. Elsewhere (or on
+    filesystems without it) it takes three renames, and b is briefly missing
+    but never half updated. If b does not exist, a is just renamed to b.
+    """
+    a, b = Path(a), Path(b)
+    if not b.exists():
+        os.rename(a, b)
+        return
+    renameat2 = _renameat2()
+    if renameat2 is not None:
+        if renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE) == 0:
+            return
+    aside = a.with_name(f".{a.name}.{os.getpid()}.old")
+    os.rename(b, aside)
+    os.rename(a, b)
+    os.rename(aside, a)
+
+
+def generation_order(generation):
+    """Sort key for generation ids: the timestamp, then the -N suffix (none counts as 1)."""
+    stamp, _, n = generation.partition("-")
+    return stamp, int(n) if n.isdigit() else 1
+
+
+class GenerationStore:
+    def __init__(self, root=ROOT, directory=GENERATIONS_DIR, keep=KEEP):
+        self.root = Path(root)
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def generations(self):
+        if not self.directory.is_dir():
+            return []
+        return sorted((p.name for p in self.directory.iterdir() if (p / MANIFEST_NAME).is_file()),
+                      key=generation_order)
+
+    def current(self):
+        try:
+            return (self.directory / CURRENT_NAME).read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def path(self, generation=None):
+        generation = generation or self.current()
+        return self.directory / generation if generation else None
+
+    def manifest(self, generation):
+        return json.loads((self.directory / generation / MANIFEST_NAME).read_text(encoding="utf-8"))
+
+    def changed_files(self, generation):
+        """Files of a generation whose size or mtime no longer match its manifest.
+
+        Inodes are not compared, so a generation directory that was copied
+        (which keeps mtimes) still verifies.
+        """
+        gen_dir = self.directory / generation
+        changed = []
+        for rel_file, recorded in self.manifest(generation).get("stats", {}).items():
+            try:
+                if file_stat(gen_dir / rel_file)[1:] != recorded[1:]:
+                    changed.append(rel_file)
+            except FileNotFoundError:
+                changed.append(rel_file)
+        return changed
+
+    def _new_id(self):
+        base = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        existing = set(self.generations())
+        gen_id, n = base, 1
+        while gen_id in existing:
+            n += 1
+            gen_id = f"{base}-{n}"
+        return gen_id
+
+    def _flip(self, generation):
+        write_text_atomic(self.directory / CURRENT_NAME, generation + "\n")
+
+    def commit(self, paths, meta=None):
+        """Hardlink the files under paths (relative to root) into a new generation and make it current."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        gen_id = self._new_id()
+        staging = self.directory / f".{gen_id}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        current = self.current()
+        previous = self.manifest(current).get("stats", {}) if current in self.generations() else {}
+        files, stats, rewritten = {}, {}, []
+        for rel in paths:
+            for src in iter_files(self.root / rel):
+                rel_file = src.relative_to(self.root).as_posix()
+                dest = staging / rel_file
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                st = file_stat(src)
+                old = previous.get(rel_file)
+                if old and old[0] == st[0] and old != st:
+                    # Written in place: the current generation shares this inode, so link it no further.
+                    shutil.copy2(src, dest)
+                    rewritten.append(rel_file)
+                else:
+                    link_or_copy(src, dest)
+                stats[rel_file] = file_stat(dest)
+                files[rel_file] = stats[rel_file][1]
+        if rewritten:
+            print(f"Warning: written in place since generation {current} (its copies changed too): "
+                  + ", ".join(rewritten))
+        manifest = {
+            "id": gen_id,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "paths": list(paths),
+            "files": files,
+            "stats": stats,
+            "meta": meta or {},
+        }
+        (staging / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, ensure_ascii=True), encoding="utf-8")
+        os.replace(staging, self.directory / gen_id)
+        self._flip(gen_id)
+        self.prune()
+        return gen_id
+
+    def checkout(self, generation, force=False):
+        """Restore the live files from a generation and make it current.
+
+        Raises ValueError if files of the generation were changed after it was
+        committed (see changed_files), unless force is set.
+        """
+        manifest = self.manifest(generation)
+        changed = [] if force else self.changed_files(generation)
+        if changed:
+            raise ValueError(f"generation {generation} changed since it was committed: {', '.join(changed)}")
+        gen_dir = self.directory / generation
+        for rel_file in manifest["files"]:
+            dest = self.root / rel_file
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = _tmp_path(dest)
+            link_or_copy(gen_dir / rel_file, tmp)
+            os.replace(tmp, dest)
+        # Drop files the generation's directories did not have (e.g. newer shards).
+        for rel in manifest["paths"]:
+            live = self.root / rel
+            if live.is_dir():
+                for f in iter_files(live):
+                    if f.relative_to(self.root).as_posix() not in manifest["files"]:
+                        f.unlink()
+        self._flip(generation)
+
+    def prune(self, keep=None):
+        keep = self.keep if keep is None else keep
+        current = self.current()
+        old = [g for g in self.generations() if g != current][: max(0, len(self.generations()) - keep)]
+        for generation in old:
+            shutil.rmtree(self.directory / generation)
+        return old
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List, roll back or prune published data generations.")
+    parser.add_argument("--list", action="store_true", help="List generations (the current one is starred)")
+    parser.add_argument("--rollback", nargs="?", const="", metavar="ID",
+                        help="Restore a generation (default: the one before the current)")
+    parser.add_argument("--force", action="store_true",
+                        help="Roll back even if the generation's files changed after it was committed")
+    parser.add_argument("--keep", type=int, default=KEEP, help="Generations to keep when pruning")
+    parser.add_argument("--prune", action="store_true", help="Delete all but the newest --keep generations")
+    args = parser.parse_args()
+
+    store = GenerationStore(keep=args.keep)
+    if args.rollback is not None:
+        generations = store.generations()
+        target = args.rollback
+        if not target:
+            current = store.current()
+            older = generations[:generations.index(current)] if current in generations else generations
+            if not older:
+                raise SystemExit("No earlier generation to roll back to.")
+            target = older[-1]
+        if target not in generations:
+            raise SystemExit(f"Unknown generation: {target}")
+        try:
+            store.checkout(target, force=args.force)
+        except ValueError as exc:
+            raise SystemExit(f"Not rolled back: {exc} (use --force to restore it anyway)")
+        print(f"Rolled back to generation {target}")
+    if args.prune:
+        removed = store.prune()
+        print(f"Pruned generations: {len(removed)}")
+    if args.list or (args.rollback is None and not args.prune):
+        current = store.current()
+        for generation in store.generations():
+            files = store.manifest(generation)["files"]
+            marker = "*" if generation == current else " "
+            print(f"{marker} {generation}  {len(files)} files, {sum(files.values())} bytes")
+
+
+if __name__ == "__main__":
+    run_cli(main)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Bulk-import saved recipe pages (HTML) or JSON-LD dumps as refactored items.
+
+Sources are directories (searched recursively) or .zip/.tar(.gz) archives of
+*.html/*.htm pages and *.json/*.jsonld files. Files are parsed across a process
+pool with the same extraction as fetch_recipes/scrape_recipe. Each parsed
+recipe is deduplicated by canonical URL and by a content hash of its sorted
+ingredient keys, against the batch itself, data/menu_items_refactored.json
+and data/recipes.json:
+
+- URL of an existing item without ingredients -> the item is back-filled
+- content known under another URL             -> the URL is added to that item
+- URL or content already known                -> skipped
+- otherwise                                   -> appended as a new item (count 0)
+
+All changes are recorded at the end as one batch of edit journal entries
+(set_item_fields for back-fills, upsert_item for new items and URLs) and
+folded into the items, so the next rebuild replays them instead of dropping
+them (--dry-run only reports).
+
+Usage:
+  python3 scripts/import_recipes.py ~/Downloads/saved-recipes
+  python3 scripts/import_recipes.py pages.zip dumps/ --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_menu_items_refactored import item_key
+from build_menu_sources import domain_from_url
+from build_recipe_matches import canonical_url, item_urls, recipe_urls
+from edit_journal import apply_edits
+from fetch_recipes import (
+    ITEMS_PATH,
+    detect_protein,
+    extract_from_json_ld,
+    json_ld_recipes,
+    normalize_whitespace,
+    scrape_html,
+)
+from normalization import ingredient_key
+from profiling import run_cli
+
+RECIPES_PATH = Path(__file__).resolve().parents[1] / "data" / "recipes.json"
+
+HTML_SUFFIXES = {".html", ".htm"}
+JSON_SUFFIXES = {".json", ".jsonld"}
+
+
+def iter_sources(paths):
+    """Yield (name, path or None, bytes or None) for every importable file."""
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            for f in sorted(path.rglob("*")):
+                if f.is_file() and f.suffix.lower() in HTML_SUFFIXES | JSON_SUFFIXES:
+                    yield str(f), str(f), None
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    if not info.is_dir() and Path(info.filename).suffix.lower() in HTML_SUFFIXES | JSON_SUFFIXES:
+                        yield f"{path}:{info.filename}", None, zf.read(info)
+        elif tarfile.is_tarfile(path):
+            with tarfile.open(path) as tf:
+                for member in tf:
+                    if member.isfile() and Path(member.name).suffix.lower() in HTML_SUFFIXES | JSON_SUFFIXES:
+                        yield f"{path}:{member.name}", None, tf.extractfile(member).read()
+        elif path.is_file():
+            yield str(path), str(path), None
+
+
+def first_string(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return next((v for v in value if isinstance(v, str)), None)
+    if isinstance(value, dict):
+        return value.get("@id") or value.get("url")
+    return None
+
+
+def parse_json_ld_dump(text):
+    """Parse every Recipe node of a JSON-LD file into the scrape_html result shape."""
+    results = []
+    for recipe in json_ld_recipes([text]):
+        ingredients, tags = extract_from_json_ld([json.dumps(recipe)])
+        url = first_string(recipe.get("url")) or first_string(recipe.get("mainEntityOfPage"))
+        results.append({
+            "title": normalize_whitespace(first_string(recipe.get("name")) or ""),
+            "ingredients": ingredients,
+            "tags": tags,
+            "main_protein": detect_protein(ingredients),
+            "canonical_url": url,
+        })
+    return results
+
+
+def content_hash(ingredients):
+    """Hash of the sorted ingredient keys, so the same recipe saved from two URLs collides."""
+    payload = "\n".join(sorted(ingredient_key(i) for i in ingredients))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def parse_source(job):
+    """Worker: return the parsed recipes of one file, or [{"name", "error"}]."""
+    name, path, data = job
+    try:
+        if data is None:
+            data = Path(path).read_bytes()
+        text = data.decode("utf-8", errors="replace")
+        if Path(name).suffix.lower() in JSON_SUFFIXES:
+            results = parse_json_ld_dump(text)
+        else:
+            results = [scrape_html(text)]
+    except Exception as exc:  # noqa: BLE001 - report the file and keep going
+        return [{"name": name, "error": f"{type(exc).__name__}: {exc}"}]
+    results = [r for r in results if r["ingredients"]]
+    if not results:
+        return [{"name": name, "error": "no recipe ingredients found"}]
+    for n, result in enumerate(results):
+        result["name"] = name if len(results) == 1 else f"{name}#{n}"
+        result["hash"] = content_hash(result["ingredients"])
+    return results
+
+
+def parse_all(sources, jobs):
+    sources = list(sources)
+    if jobs > 1 and len(sources) > 1:
+        chunksize = max(1, len(sources) // (jobs * 8))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            batches = list(pool.map(parse_source, sources, chunksize=chunksize))
+    else:
+        batches = [parse_source(job) for job in sources]
+    return [result for batch in batches for result in batch]
+
+
+def new_item(recipe):
+    url = recipe["canonical_url"]
+    title = recipe["title"]
+    domain = domain_from_url(url) if url else None
+    return {
+        "url": url,
+        "urls": [url] if url else [],
+        "link_texts": [title] if title and url else [],
+        "menu_files": [],
+        "menu_weeks": [],
+        "menu_seasons": [],
+        "meal_types": [],
+        "sections": [],
+        "source_hints": [domain] if domain else [],
+        "item_texts": [title] if title else [],
+        "count": 0,
+        "ingredients": recipe["ingredients"],
+        "main_protein": recipe["main_protein"],
+        "recipe_tags": recipe["tags"],
+    }
+
+
+def merge_recipes(items, recipe_notes, parsed):
+    """Merge parsed recipes into items in place; return (summary dict, edit journal entries)."""
+    url_to_item = {}
+    for item in items:
+        for url in item_urls(item):
+            url_to_item.setdefault(url, item)
+    hash_to_item = {}
+    for item in items:
+        if item.get("ingredients"):
+            hash_to_item.setdefault(content_hash(item["ingredients"]), item)
+    note_urls = set()
+    for note in recipe_notes:
+        note_urls |= recipe_urls(note)
+
+    summary = {"added": [], "backfilled": [], "urls_added": [], "duplicates": [], "errors": []}
+    edits = []
+    # Richest parse first, so within-batch duplicates keep the most complete copy.
+    ok = sorted((r for r in parsed if "error" not in r), key=lambda r: (-len(r["ingredients"]), r["name"]))
+    summary["errors"] = sorted((r["name"], r["error"]) for r in parsed if "error" in r)
+
+    for recipe in ok:
+        canon = canonical_url(recipe["canonical_url"] or "")
+        item = url_to_item.get(canon) if canon else None
+        if item is not None:
+            if not item.get("ingredients"):
+                fields = {"ingredients": recipe["ingredients"]}
+                if not item.get("recipe_tags") and recipe["tags"]:
+                    fields["recipe_tags"] = recipe["tags"]
+                if item.get("main_protein") in (None, "", "unknown"):
+                    fields["main_protein"] = recipe["main_protein"]
+                edits.append({"op": "set_item_fields", "key": item_key(item), "fields": fields})
+                item.update(fields)
+                hash_to_item.setdefault(recipe["hash"], item)
+                summary["backfilled"].append(recipe["name"])
+            else:
+                summary["duplicates"].append(recipe["name"])
+            continue
+        if canon and canon in note_urls:
+            summary["duplicates"].append(recipe["name"])
+            continue
+        same = hash_to_item.get(recipe["hash"])
+        if same is not None:
+            # Same recipe under another URL: remember the URL on the item we already have.
+            if canon and recipe["canonical_url"] not in same["urls"]:
+                edits.append({"op": "upsert_item", "key": item_key(same),
+                              "item": {"urls": [recipe["canonical_url"]]}})
+                same["urls"].append(recipe["canonical_url"])
+                url_to_item[canon] = same
+                summary["urls_added"].append(recipe["name"])
+            summary["duplicates"].append(recipe["name"])
+            continue
+        entry = new_item(recipe)
+        # Keyed so a replay merges into an item a rebuild already has rather than adding it twice.
+        edits.append({"op": "upsert_item", "key": item_key(entry), "item": dict(entry)})
+        items.append(entry)
+        hash_to_item[recipe["hash"]] = entry
+        if canon:
+            url_to_item[canon] = entry
+        summary["added"].append(recipe["name"])
+    return summary, edits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import saved recipe pages or JSON-LD dumps.")
+    parser.add_argument("sources", nargs="+", help="Directories, archives (.zip/.tar.gz) or files")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Parser processes")
+    parser.add_argument("--dry-run", action="store_true", help="Report without writing items")
+    args = parser.parse_args()
+
+    parsed = parse_all(iter_sources(args.sources), args.jobs)
+
+    items = json.loads(ITEMS_PATH.read_text(encoding="utf-8")).get("items", [])
+    recipe_notes = json.loads(RECIPES_PATH.read_text(encoding="utf-8")).get("recipes", [])
+    summary, edits = merge_recipes(items, recipe_notes, parsed)
+
+    if edits and not args.dry_run:
+        apply_edits(edits)
+
+    print(f"Recipes parsed: {len(parsed) - len(summary['errors'])}")
+    print(f"New items: {len(summary['added'])}")
+    print(f"Back-filled items: {len(summary['backfilled'])}")
+    print(f"URLs added to known items: {len(summary['urls_added'])}")
+    print(f"Duplicates skipped: {len(summary['duplicates'])}")
+    print(f"Unparseable: {len(summary['errors'])}")
+    for name, error in summary["errors"][:20]:
+        print(f"  ! {name}: {error}")
+    if args.dry_run:
+        print("Dry run: nothing written.")
+
+
+if __name__ == "__main__":
+    run_cli(main)
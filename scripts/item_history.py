@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Versioned snapshots of the refactored item list, for undoing merge plans.
+
+Items are stored once each in a content-addressed object store, and a
+snapshot is the ordered list of its items' content hashes. A snapshot
+therefore shares every unchanged item with its parent: recording one costs a
+small JSON file plus objects for the items that actually changed. Each
+snapshot also keeps the hashes it added and removed relative to its parent,
+and plan snapshots keep the plan rewritten against item keys, which is what
+lets merge_menu_items.py replay plans onto a fresh rebuild where list
+positions have moved.
+
+A base snapshot records items that came from outside the history (a rebuild,
+a hand edit); the plan snapshots after the latest base are the ones a replay
+re-applies.
+
+Layout (under data/item_history/):
+  objects/<hash>.json     one item, named by the hash of its canonical JSON
+  snapshots/<id>.json     {"id", "parent", "base", "label", "plan", "added", "removed", "items"}
+  HEAD                    the current snapshot id
+
+Plans are applied, replayed and undone with merge_menu_items.py; this script
+only inspects the history.
+
+Usage:
+  python3 scripts/item_history.py                       # list snapshots (HEAD starred)
+  python3 scripts/item_history.py --diff 00003 00004
+  python3 scripts/item_history.py --diff 00003          # 00003 -> HEAD
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_menu_items_refactored import get_primary_title, item_key
+from generations import write_text_atomic
+from profiling import run_cli
+
+HISTORY_DIR = Path(__file__).resolve().parents[1] / "data" / "item_history"
+HEAD_NAME = "HEAD"
+HASH_LENGTH = 16
+
+
+def canonical(item):
+    return json.dumps(item, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+
+
+def item_hash(item):
+    return hashlib.sha1(canonical(item).encode("utf-8")).hexdigest()[:HASH_LENGTH]
+
+
+class ItemHistory:
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = Path(directory)
+        self.objects_dir = self.directory / "objects"
+        self.snapshots_dir = self.directory / "snapshots"
+        self._snapshots = {}
+        self._objects = {}
+
+    def head(self):
+        try:
+            return (self.directory / HEAD_NAME).read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_head(self, snapshot_id):
+        self.snapshot(snapshot_id)  # raises for an unknown id
+        write_text_atomic(self.directory / HEAD_NAME, snapshot_id + "\n")
+
+    def snapshot_ids(self):
+        if not self.snapshots_dir.is_dir():
+            return []
+        return sorted(p.stem for p in self.snapshots_dir.glob("*.json"))
+
+    def snapshot(self, snapshot_id):
+        if snapshot_id not in self._snapshots:
+            path = self.snapshots_dir / f"{snapshot_id}.json"
+            self._snapshots[snapshot_id] = json.loads(path.read_text(encoding="utf-8"))
+        return self._snapshots[snapshot_id]
+
+    def _object(self, digest):
+        if digest not in self._objects:
+            path = self.objects_dir / f"{digest}.json"
+            self._objects[digest] = json.loads(path.read_text(encoding="utf-8"))
+        return self._objects[digest]
+
+    def _store(self, item):
+        digest = item_hash(item)
+        path = self.objects_dir / f"{digest}.json"
+        if digest not in self._objects and not path.exists():
+            # Hashed in canonical form, stored in the item's own key order.
+            write_text_atomic(path, json.dumps(item, separators=(",", ":"), ensure_ascii=True))
+        return digest
+
+    def items(self, snapshot_id=None):
+        """Materialize a snapshot's items (fresh copies, safe to mutate)."""
+        snapshot = self.snapshot(snapshot_id or self.head())
+        return [copy.deepcopy(self._object(digest)) for digest in snapshot["items"]]
+
+    def matches(self, items, snapshot_id=None):
+        snapshot_id = snapshot_id or self.head()
+        return snapshot_id is not None and [item_hash(i) for i in items] == self.snapshot(snapshot_id)["items"]
+
+    def record(self, items, label, plan=None, base=False):
+        """Snapshot items as a child of HEAD and make it HEAD; an unchanged list just returns HEAD."""
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        hashes = [self._store(item) for item in items]
+        parent = self.head()
+        parent_hashes = self.snapshot(parent)["items"] if parent else []
+        if parent is not None and hashes == parent_hashes:
+            return parent
+        old, new = Counter(parent_hashes), Counter(hashes)
+        ids = self.snapshot_ids()
+        snapshot_id = f"{int(ids[-1]) + 1 if ids else 1:05d}"
+        snapshot = {
+            "id": snapshot_id,
+            "parent": parent,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "base": base or parent is None,
+            "label": label,
+            "plan": plan,
+            "added": sorted((new - old).elements()),
+            "removed": sorted((old - new).elements()),
+            "items": hashes,
+        }
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        write_text_atomic(self.snapshots_dir / f"{snapshot_id}.json", json.dumps(snapshot, ensure_ascii=True))
+        self._snapshots[snapshot_id] = snapshot
+        self.set_head(snapshot_id)
+        return snapshot_id
+
+    def lineage(self, snapshot_id=None):
+        """Yield a snapshot and its ancestors, newest first."""
+        snapshot_id = snapshot_id or self.head()
+        while snapshot_id is not None:
+            snapshot = self.snapshot(snapshot_id)
+            yield snapshot
+            snapshot_id = snapshot["parent"]
+
+    def base(self, snapshot_id=None):
+        return next((s for s in self.lineage(snapshot_id) if s["base"]), None)
+
+    def pending_plans(self, snapshot_id=None):
+        """Plan snapshots since the latest base, oldest first."""
+        plans = []
+        for snapshot in self.lineage(snapshot_id):
+            if snapshot["base"]:
+                break
+            if snapshot["plan"]:
+                plans.append(snapshot)
+        return plans[::-1]
+
+    def diff(self, old_id, new_id):
+        """Return (added, removed, changed) items from old_id to new_id.
+
+        Only hashes that differ are loaded. An added and a removed item with
+        the same item key are reported together as a (before, after) change.
+        """
+        old = Counter(self.snapshot(old_id)["items"])
+        new = Counter(self.snapshot(new_id)["items"])
+        removed_by_key = {}
+        removed = []
+        for digest in (old - new).elements():
+            item = self._object(digest)
+            key = item_key(item)
+            if key is None:
+                removed.append(item)
+            else:
+                removed_by_key.setdefault(key, []).append(item)
+        added, changed = [], []
+        for digest in (new - old).elements():
+            item = self._object(digest)
+            before = removed_by_key.get(item_key(item))
+            if before:
+                changed.append((before.pop(0), item))
+            else:
+                added.append(item)
+        removed.extend(item for group in removed_by_key.values() for item in group)
+        return added, removed, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List item history snapshots or diff two of them.")
+    parser.add_argument("--diff", nargs="+", metavar="ID", help="Diff OLD [NEW] (NEW defaults to HEAD)")
+    args = parser.parse_args()
+
+    history = ItemHistory()
+    head = history.head()
+    if args.diff:
+        if len(args.diff) > 2:
+            parser.error("--diff takes one or two snapshot ids")
+        old_id, new_id = (args.diff + [head])[:2]
+        for snapshot_id in (old_id, new_id):
+            if snapshot_id not in history.snapshot_ids():
+                raise SystemExit(f"Unknown snapshot: {snapshot_id}")
+        added, removed, changed = history.diff(old_id, new_id)
+        for item in added:
+            print(f"+ {get_primary_title(item)}")
+        for item in removed:
+            print(f"- {get_primary_title(item)}")
+        for before, after in changed:
+            fields = sorted(k for k in set(before) | set(after) if before.get(k) != after.get(k))
+            print(f"~ {get_primary_title(after)} ({', '.join(fields)})")
+        print(f"{old_id} -> {new_id}: {len(added)} added, {len(removed)} removed, {len(changed)} changed")
+        return
+
+    for snapshot_id in history.snapshot_ids():
+        snapshot = history.snapshot(snapshot_id)
+        marker = "*" if snapshot_id == head else " "
+        kind = "base" if snapshot["base"] else "plan"
+        print(f"{marker} {snapshot_id}  {kind:<4}  {len(snapshot['items'])} items "
+              f"(+{len(snapshot['added'])} -{len(snapshot['removed'])})  {snapshot['label']}")
+
+
+if __name__ == "__main__":
+    run_cli(main)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Remove or replace one menu's contributions to the refactored items.
+
+Uses the menu_file -> item keys reverse index written by
+build_menu_items_refactored.py, so an edit touches only the items that the
+week actually contributed to instead of walking every item. A replaced menu
+is parsed and auto-linked as a rebuild would, and each line is looked up
+through the URLs and title_keys of the existing items (including texts that
+title merges and merge plans folded in), so it lands in the item a full
+rebuild would put it in.
+
+Usage:
+  python3 scripts/menu_item_store.py --delete "Menus/Menu week of 1-16-26.md"
+  python3 scripts/menu_item_store.py --replace "Menus/Menu week of 1-16-26.md"
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from auto_add_links import add_auto_links
+from build_menu_items_refactored import (
+    APP_DATA_DIR,
+    DATA_DIR,
+    MENU_INDEX_NAME,
+    MENUS_PATH,
+    OUT_APP_PATH,
+    OUT_PATH,
+    canonical_item_key,
+    get_primary_title,
+    item_key,
+    unique_preserve,
+    write_menu_index,
+)
+from extract_menus import load_decision_index, parse_menu_file, write_menu_shards
+from fix_refactored_item_titles import clean_titles, looks_like_url, title_from_url
+from generations import write_text_atomic
+from merge_brats_entries import extract_side_dish_from_text
+from normalization import title_key
+from profiling import run_cli
+
+ROOT = Path(__file__).resolve().parents[1]
+MENUS_APP_PATH = APP_DATA_DIR / "menus.json"
+
+LIST_KEYS = ["urls", "link_texts", "menu_files", "menu_weeks", "menu_seasons",
+             "meal_types", "sections", "source_hints", "item_texts"]
+
+
+def menu_item_urls(item):
+    urls = [link.get("url") for link in item.get("links", []) if link.get("url")]
+    return unique_preserve(urls + item.get("urls", []))
+
+
+def extend(item, field, values):
+    """Append the values item[field] lacks, leaving its existing entries (and
+    the duplicates clean-up stages leave in them) alone."""
+    existing = item.get(field, [])
+    item[field] = existing + [v for v in unique_preserve(values) if v not in existing]
+
+
+class MenuItemStore:
+    def __init__(self, items, menu_index, menus=(), data_dir=DATA_DIR, app_data_dir=APP_DATA_DIR):
+        self.items = items
+        self.menu_index = menu_index
+        # save() writes back where the store was loaded from.
+        self.data_dir = Path(data_dir)
+        self.app_data_dir = Path(app_data_dir)
+        # item_key -> items; merge_brats_entries leaves several items per key.
+        self.by_key = {}
+        # url -> title keys of the menu lines that carry it. Those lines made
+        # the URL item; the rest of its texts were merged in (by title or by a
+        # merge plan) and are what a bare line with that text folds into.
+        self.line_keys = {}
+        for menu in menus:
+            for menu_item in menu.get("items", []):
+                text = (menu_item.get("text") or "").strip()
+                for url in menu_item_urls(menu_item):
+                    self.line_keys.setdefault(url, set()).add(title_key(text))
+        # Lookup aliases, the way a rebuild groups a line: every URL and the
+        # title_key of the primary title are strong; the title_key of the other
+        # texts (members of a merged item) is the fallback.
+        self.primary = {}
+        self.aliases = {}
+        self._removed = set()
+        for item in items:
+            self._index(item)
+
+    def _live(self, item):
+        return item is not None and id(item) not in self._removed
+
+    def _derived_titles(self, item):
+        # Titles clean_titles made from a URL; the rebuild grouped by the
+        # URL-like link text they replaced, not by these.
+        return {title_from_url(url) for url in [item.get("url")] + item.get("urls", []) if url}
+
+    def _index(self, item):
+        key = item_key(item)
+        if key is not None:
+            self.by_key.setdefault(key, []).append(item)
+        strong = [url for url in [item.get("url")] + item.get("urls", []) if url]
+        title = get_primary_title(item)
+        if title and title not in self._derived_titles(item):
+            strong.append(f"title::{title_key(title)}")
+        for alias in strong:
+            if not self._live(self.primary.get(alias)):
+                self.primary[alias] = item
+        self._alias_texts(item)
+
+    def _alias_texts(self, item):
+        own = set()
+        for url in item.get("urls", []):
+            own |= self.line_keys.get(url, set())
+        derived = self._derived_titles(item)
+        for text in item.get("link_texts", []) + item.get("item_texts", []):
+            if not (text and text.strip()) or text in derived:
+                continue
+            key = title_key(text.strip())
+            if key in own:
+                continue
+            alias = f"title::{key}"
+            if not self._live(self.aliases.get(alias)):
+                self.aliases[alias] = item
+
+    def find(self, key):
+        """The live item a stored item key, URL or title::<text> resolves to, or None."""
+        key = canonical_item_key(key)
+        for table in (self.primary, self.aliases):
+            item = table.get(key)
+            if self._live(item):
+                return item
+            if item is not None:
+                # A dropped item still records which URLs a rebuild grouped.
+                for url in item.get("urls", []):
+                    other = self.primary.get(url)
+                    if self._live(other):
+                        return other
+        return None
+
+    def add_item(self, item):
+        self.items.append(item)
+        self._index(item)
+
+    def drop(self, item):
+        self._removed.add(id(item))
+
+    @classmethod
+    def load(cls, data_dir=DATA_DIR, app_data_dir=None):
+        """Load the store from data_dir; the app copy defaults to the sibling app/public/data."""
+        data_dir = Path(data_dir)
+        if app_data_dir is None:
+            app_data_dir = data_dir.parent / APP_DATA_DIR.relative_to(DATA_DIR.parent)
+        items = json.loads((data_dir / OUT_PATH.name).read_text(encoding="utf-8")).get("items", [])
+        index = json.loads((data_dir / MENU_INDEX_NAME).read_text(encoding="utf-8")).get("menus", {})
+        menus = json.loads((data_dir / MENUS_PATH.name).read_text(encoding="utf-8")).get("menus", [])
+        return cls(items, index, menus, data_dir, app_data_dir)
+
+    def _week_of(self, menu_file):
+        return (self.menu_index.get(menu_file) or {}).get("week")
+
+    def _season_of(self, menu_file):
+        return (self.menu_index.get(menu_file) or {}).get("season")
+
+    def _recompute_weeks(self, item):
+        files = item.get("menu_files", [])
+        item["menu_weeks"] = unique_preserve([w for w in (self._week_of(f) for f in files) if w])
+        item["menu_seasons"] = unique_preserve([s for s in (self._season_of(f) for f in files) if s])
+        item["count"] = len(files)
+
+    def remove_menu(self, menu_file):
+        """Drop menu_file from every item it contributed to; returns touched item keys."""
+        entry = self.menu_index.get(menu_file)
+        if not entry:
+            return []
+        touched = []
+        for key in entry["items"]:
+            candidates = [i for i in self.by_key.get(canonical_item_key(key), []) if self._live(i)]
+            for item in candidates or [self.find(key)]:
+                if item is None or menu_file not in item.get("menu_files", []):
+                    continue
+                item["menu_files"] = [f for f in item["menu_files"] if f != menu_file]
+                self._recompute_weeks(item)
+                if not item["menu_files"]:
+                    self.drop(item)
+                if key not in touched:
+                    touched.append(key)
+        del self.menu_index[menu_file]
+        return touched
+
+    def _line_item(self, url, title, side=None):
+        """Existing item a menu line folds into, the way a rebuild would group it, or None.
+
+        URL first, then title. A brats/burgers line split by merge_brats_entries
+        belongs to the item of that title with the same side dish, and a line
+        without a side never to one with a side.
+        """
+        if url:
+            item = self.find(url)
+            if item is not None:
+                return item
+        if not title:
+            return None
+        if side is not None:
+            for item in self.by_key.get(f"title::{title_key(title)}", []):
+                sides = {s.lower() for s in item.get("side_dish") or []}
+                if self._live(item) and side.lower() in sides:
+                    return item
+            return None
+        item = self.find(f"title::{title}")
+        if item is not None and item.get("side_dish") and not item.get("url"):
+            # "X burgers and fries" was a different line text from "X burgers".
+            return next((i for i in self.by_key.get(f"title::{title_key(title)}", [])
+                         if self._live(i) and not i.get("side_dish")), None)
+        return item
+
+    def add_menu(self, menu):
+        """Fold one parsed menu (extract_menus.parse_menu_file output) into the items.
+
+        Lines go through the same grouping and clean-up as a rebuild (URL and
+        title merging, URL-like link titles, brats/burgers sides), so deleting
+        and replacing a menu leaves the items as a full rebuild would.
+        """
+        menu_file = menu.get("file")
+        self.menu_index[menu_file] = {"week": menu.get("week_of_date"), "season": menu.get("season"), "items": []}
+        keys = self.menu_index[menu_file]["items"]
+        for menu_item in menu.get("items", []):
+            item_text = menu_item.get("text")
+            item_text, side = extract_side_dish_from_text(item_text) if item_text else (item_text, None)
+            urls = menu_item_urls(menu_item)
+            for url in urls or [None]:
+                link_texts = [link.get("text") for link in menu_item.get("links", [])
+                              if url and link.get("url") == url and link.get("text")]
+                # A rebuild titles a new URL item by its link text, else the line.
+                title = (link_texts or [(item_text or "").strip()])[0]
+                if not url and not title:
+                    continue
+                item = self._line_item(url, title, side if not url else None)
+                new = item is None
+                if new:
+                    item = {k: [] for k in LIST_KEYS}
+                    item["url"] = url
+                    item["count"] = 0
+                if url:
+                    if item.get("url") and url not in item.get("urls", []):
+                        # Title-merged URL items keep the smallest URL, as in a rebuild.
+                        item["url"] = min(item["url"], url)
+                    extend(item, "urls", [url])
+                    # Already in the form clean_titles leaves, so a replace does not
+                    # bring back URL-like texts next to the titles made from them.
+                    derived = title_from_url(url)
+                    extend(item, "link_texts", [derived if derived and looks_like_url(t) else t
+                                                for t in link_texts])
+                for field, value in (
+                    ("menu_files", menu_file),
+                    ("meal_types", menu_item.get("meal_type")),
+                    ("sections", menu_item.get("section")),
+                    ("source_hints", menu_item.get("source_hint")),
+                    ("item_texts", item_text),
+                ):
+                    if value:
+                        extend(item, field, [value])
+                if side:
+                    if side.lower() not in {s.lower() for s in item.get("side_dish") or []}:
+                        item["side_dish"] = (item.get("side_dish") or []) + [side]
+                    extend(item, "meal_types", ["grill"])
+                self._recompute_weeks(item)
+                clean_titles(item)
+                if new:
+                    self.add_item(item)
+                else:
+                    self._alias_texts(item)
+                key = item_key(item)
+                if key is not None and key not in keys:
+                    keys.append(key)
+        return keys
+
+    def replace_menu(self, menu):
+        self.remove_menu(menu.get("file"))
+        return self.add_menu(menu)
+
+    def compacted_items(self):
+        if not self._removed:
+            return self.items
+        return [item for item in self.items if id(item) not in self._removed]
+
+    def save(self):
+        output = {"items": self.compacted_items()}
+        write_text_atomic(self.data_dir / OUT_PATH.name, json.dumps(output, indent=2, ensure_ascii=True))
+        self.app_data_dir.mkdir(parents=True, exist_ok=True)
+        write_text_atomic(self.app_data_dir / OUT_APP_PATH.name, json.dumps(output, indent=2, ensure_ascii=True))
+        write_menu_index(self.menu_index, self.data_dir, self.app_data_dir)
+
+
+def parse_menu(menu_file):
+    """Parse a menu note the way a rebuild's first stages would (normalized, auto-linked)."""
+    menu = parse_menu_file(ROOT / menu_file, load_decision_index(), normalize=True)
+    add_auto_links([menu])
+    return menu
+
+
+def update_menus_json(menu_file, new_menu=None):
+    menus = json.loads(MENUS_PATH.read_text(encoding="utf-8")).get("menus", [])
+    menus = [m for m in menus if m.get("file") != menu_file]
+    if new_menu is not None:
+        menus.append(new_menu)
+        menus.sort(key=lambda m: m.get("file") or "")
+    for path in (MENUS_PATH, MENUS_APP_PATH):
+        write_text_atomic(path, json.dumps({"menus": menus}, indent=2, ensure_ascii=True))
+        write_menu_shards(menus, path.parent)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Patch refactored items for a single menu.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--delete", help="Menu file to remove, e.g. 'Menus/Menu week of 1-16-26.md'")
+    group.add_argument("--replace", help="Menu file to re-parse from Menus/ and replace")
+    args = parser.parse_args()
+
+    store = MenuItemStore.load()
+    if args.delete:
+        touched = store.remove_menu(args.delete)
+        update_menus_json(args.delete)
+        print(f"Removed {args.delete}: {len(touched)} items touched")
+    else:
+        menu = parse_menu(args.replace)
+        touched = store.replace_menu(menu)
+        update_menus_json(menu["file"], menu)
+        print(f"Replaced {menu['file']}: {len(touched)} items touched")
+    store.save()
+
+
+if __name__ == "__main__":
+    run_cli(main)
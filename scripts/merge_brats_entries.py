@@ -12,6 +12,10 @@ import json
 import re
 from pathlib import Path
 
+from build_menu_items_refactored import refresh_menu_index
+from generations import write_text_atomic
+from profiling import run_cli
+
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
 
@@ -109,16 +113,16 @@ def main():
     data["items"] = items
 
     print(f"Saving to {MENU_ITEMS_PATH}...")
-    with open(MENU_ITEMS_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=True)
+    write_text_atomic(MENU_ITEMS_PATH, json.dumps(data, indent=2, ensure_ascii=True))
 
     print(f"Saving to {MENU_ITEMS_APP_PATH}...")
     APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(MENU_ITEMS_APP_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=True)
+    write_text_atomic(MENU_ITEMS_APP_PATH, json.dumps(data, indent=2, ensure_ascii=True))
+
+    refresh_menu_index(items)
 
     print("Done!")
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
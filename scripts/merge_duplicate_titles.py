@@ -1,8 +1,12 @@
 import json
-import shutil
 from collections import defaultdict
 from pathlib import Path
 
+from build_menu_items_refactored import refresh_menu_index
+from generations import write_text_atomic
+from normalization import title_key
+from profiling import run_cli
+
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
 
@@ -83,83 +87,61 @@ def merge_items(items_to_merge):
 
 
 def main():
-    # Make a backup of the original file before processing
-    backup_path = DATA_DIR / "menu_items_refactored.json.backup"
-    if IN_PATH.exists():
-        shutil.copy2(IN_PATH, backup_path)
-        print(f"Created backup at {backup_path}")
+    # Outputs are written atomically (temp file + rename), so a failure leaves
+    # the previous files intact and no backup copy is needed.
+    data = json.loads(IN_PATH.read_text(encoding="utf-8"))
+    items = data.get("items", [])
+    
+    print(f"Original item count: {len(items)}")
+    
+    # Group items by normalized title
+    grouped = defaultdict(list)
+    no_title_items = []
+    
+    for item in items:
+        title = get_primary_title(item)
+        if title:
+            # Same title key every stage uses (normalization.title_key)
+            key = title_key(title)
+            grouped[key].append(item)
+        else:
+            # Keep items with no title as-is
+            no_title_items.append(item)
+    
+    # Merge items with duplicate titles
+    merged_items = []
+    merge_count = 0
+    
+    for group_key, items_list in grouped.items():
+        if len(items_list) > 1:
+            # Multiple items with same title - merge them
+            print(f"Merging {len(items_list)} items with title: {get_primary_title(items_list[0])}")
+            merged = merge_items(items_list)
+            merged_items.append(merged)
+            merge_count += 1
+        else:
+            # Single item with this title - keep as-is
+            merged_items.append(items_list[0])
+    
+    # Add items with no title
+    merged_items.extend(no_title_items)
+    
+    # Sort by count (descending) then by url
+    merged_items.sort(key=lambda x: (-x["count"], x["url"] or ""))
+    
+    print(f"Merged item count: {len(merged_items)}")
+    print(f"Number of title groups merged: {merge_count}")
+    print(f"Items without titles: {len(no_title_items)}")
     
-    try:
-        # Read input file
-        data = json.loads(IN_PATH.read_text(encoding="utf-8"))
-        items = data.get("items", [])
-        
-        print(f"Original item count: {len(items)}")
-        
-        # Group items by case-insensitive title
-        grouped = defaultdict(list)
-        no_title_items = []
-        
-        for item in items:
-            title = get_primary_title(item)
-            if title:
-                # Use lowercase title as key for case-insensitive grouping
-                key = title.lower()
-                grouped[key].append(item)
-            else:
-                # Keep items with no title as-is
-                no_title_items.append(item)
-        
-        # Merge items with duplicate titles
-        merged_items = []
-        merge_count = 0
-        
-        for title_key, items_list in grouped.items():
-            if len(items_list) > 1:
-                # Multiple items with same title - merge them
-                print(f"Merging {len(items_list)} items with title: {get_primary_title(items_list[0])}")
-                merged = merge_items(items_list)
-                merged_items.append(merged)
-                merge_count += 1
-            else:
-                # Single item with this title - keep as-is
-                merged_items.append(items_list[0])
-        
-        # Add items with no title
-        merged_items.extend(no_title_items)
-        
-        # Sort by count (descending) then by url
-        merged_items.sort(key=lambda x: (-x["count"], x["url"] or ""))
-        
-        print(f"Merged item count: {len(merged_items)}")
-        print(f"Number of title groups merged: {merge_count}")
-        print(f"Items without titles: {len(no_title_items)}")
-        
-        # Write output
-        output = {"items": merged_items}
-        OUT_PATH.write_text(json.dumps(output, indent=2, ensure_ascii=True), encoding="utf-8")
-        APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
-        OUT_APP_PATH.write_text(json.dumps(output, indent=2, ensure_ascii=True), encoding="utf-8")
-        
-        print(f"Output written to {OUT_PATH} and {OUT_APP_PATH}")
-        
-        # If successful, delete the backup
-        if backup_path.exists():
-            backup_path.unlink()
-            print(f"Backup deleted successfully")
+    # Write output
+    output = {"items": merged_items}
+    write_text_atomic(OUT_PATH, json.dumps(output, indent=2, ensure_ascii=True))
+    APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(OUT_APP_PATH, json.dumps(output, indent=2, ensure_ascii=True))
+    refresh_menu_index(merged_items)
     
-    except Exception as e:
-        # If an error occurs, restore from backup
-        print(f"Error occurred: {e}")
-        if backup_path.exists():
-            shutil.copy2(backup_path, IN_PATH)
-            print(f"Restored {IN_PATH} from backup")
-            # Keep the app data file in sync with the restored main file
-            if OUT_APP_PATH.exists():
-                shutil.copy2(backup_path, OUT_APP_PATH)
-                print(f"Restored {OUT_APP_PATH} from backup")
-        raise
+    print(f"Output written to {OUT_PATH} and {OUT_APP_PATH}")
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
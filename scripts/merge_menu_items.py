@@ -1,13 +1,43 @@
 #!/usr/bin/env python3
+"""
+Apply merge plans exported by the merge tools and regenerate merge_items_tool.html.
+
+Every applied plan is recorded as a snapshot in the item history (see
+scripts/item_history.py), with its groups rewritten from list positions to
+item keys. That makes undo a checkout of the parent snapshot, and lets
+--replay re-apply the plans onto a fresh rebuild (the rebuild runs it after
+the edit journal) without rebuilding anything else.
+
+Usage:
+  python3 scripts/merge_menu_items.py --plan merge_plan_<timestamp>.json
+  python3 scripts/merge_menu_items.py --undo
+  python3 scripts/merge_menu_items.py --checkout 00004
+  python3 scripts/merge_menu_items.py --replay
+"""
+
 import argparse
 import json
 from collections import OrderedDict
 from pathlib import Path
 import html
 
+from build_menu_items_refactored import (
+    OUT_APP_PATH,
+    OUT_PATH,
+    canonical_item_key,
+    item_key,
+    refresh_menu_index,
+)
+from generations import write_text_atomic
+from item_history import ItemHistory
+from profiling import run_cli
+
+TOOL_PATH = Path(__file__).resolve().parents[1] / 'merge_items_tool.html'
+
 LIST_KEYS = {
     'urls', 'link_texts', 'menu_files', 'menu_weeks', 'menu_seasons',
-    'meal_types', 'sections', 'source_hints', 'item_texts', 'side_dish'
+    'meal_types', 'sections', 'source_hints', 'item_texts', 'side_dish',
+    'side_dishes', 'recipe_tags'
 }
 
 TEMPLATE = """
@@ -384,6 +414,10 @@ def merge_items(group_items, canonical_title):
             uniq = list(OrderedDict.fromkeys(urls))
             merged[k] = uniq[0] if len(uniq) == 1 else None
             continue
+        if k == 'ingredients':
+            # One recipe's ingredient list; concatenating several would not be a recipe.
+            merged[k] = next((g[k] for g in group_items if g.get(k)), [])
+            continue
         if k in LIST_KEYS:
             combined = []
             for g in group_items:
@@ -446,6 +480,49 @@ def apply_merge_plan(data, merge_plan):
         data['items'] = new_items
 
 
+def plan_keys(items, merge_plan):
+    """Rewrite a plan's itemIds (positions in items) as item keys, which survive rebuilds."""
+    groups = []
+    for group in merge_plan.get('groups', []):
+        item_ids = [i for i in group.get('itemIds') or [] if isinstance(i, int) and 0 <= i < len(items)]
+        keys = [item_key(items[i]) for i in item_ids]
+        groups.append({'title': group.get('title'), 'keys': [k for k in keys if k]})
+    return {'groups': groups}
+
+
+def apply_keyed_plan(data, keyed_plan):
+    """Apply a plan from plan_keys; groups whose items are already merged are skipped."""
+    positions = {}
+    for idx, item in enumerate(data['items']):
+        key = item_key(item)
+        if key is not None:
+            positions.setdefault(key, idx)
+    groups = []
+    for group in keyed_plan.get('groups', []):
+        keys = OrderedDict.fromkeys(canonical_item_key(k) for k in group.get('keys', []))
+        item_ids = [positions[k] for k in keys if k in positions]
+        groups.append({'title': group.get('title'), 'itemIds': item_ids})
+    apply_merge_plan(data, {'groups': groups})
+
+
+def replay_plans(history, data):
+    """Re-apply the history's pending plans onto rebuilt data; return the number replayed."""
+    head = history.head()
+    if head is None or history.matches(data['items']):
+        return 0
+    pending = history.pending_plans()
+    base = history.base()
+    if base is not None and history.matches(data['items'], base['id']):
+        # The rebuild reproduced the base the plans were applied to.
+        data['items'] = history.items(head)
+        return len(pending)
+    history.record(data['items'], 'rebuild', base=True)
+    for snapshot in pending:
+        apply_keyed_plan(data, snapshot['plan'])
+        history.record(data['items'], snapshot['label'], plan=snapshot['plan'])
+    return len(pending)
+
+
 def regenerate_merge_tool(data_path, tool_path):
     with open(data_path) as f:
         data = json.load(f)
@@ -483,31 +560,77 @@ def regenerate_merge_tool(data_path, tool_path):
     rows = '\n'.join(rows_parts)
 
     html_doc = TEMPLATE.replace('__COUNT__', str(len(items))).replace('__ROWS__', rows)
-    Path(tool_path).write_text(html_doc, encoding='utf-8')
+    tool_path = Path(tool_path)
+    # Tracked in git: leave it alone when a replay did not change the items.
+    if tool_path.exists() and tool_path.read_text(encoding='utf-8') == html_doc:
+        return
+    write_text_atomic(tool_path, html_doc)
+
+
+def load_items_file(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_items_file(path, data):
+    write_text_atomic(Path(path), json.dumps(data, ensure_ascii=True, indent=2, sort_keys=False))
 
 
 def main():
-    parser = argparse.ArgumentParser(description='Apply merge plan(s) and regenerate merge tool.')
-    parser.add_argument('--plan', action='append', required=True, help='Path to merge_plan_*.json (repeatable)')
-    parser.add_argument('--data', default='data/menu_items_refactored.json', help='Refactored data JSON')
-    parser.add_argument('--public', default='app/public/data/menu_items_refactored.json', help='Public data JSON')
-    parser.add_argument('--tool', default='merge_items_tool.html', help='Output HTML tool path')
+    parser = argparse.ArgumentParser(description='Apply, replay or undo merge plans and regenerate merge tool.')
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--plan', action='append', help='Path to merge_plan_*.json (repeatable)')
+    action.add_argument('--replay', action='store_true', help='Re-apply recorded plans onto rebuilt data')
+    action.add_argument('--undo', action='store_true', help='Restore the snapshot before the current one')
+    action.add_argument('--checkout', metavar='ID', help='Restore an item history snapshot')
+    parser.add_argument('--data', default=str(OUT_PATH), help='Refactored data JSON')
+    parser.add_argument('--public', default=str(OUT_APP_PATH), help='Public data JSON')
+    parser.add_argument('--tool', default=str(TOOL_PATH), help='Output HTML tool path')
+    parser.add_argument('--no-history', action='store_true', help='Apply plans without recording snapshots')
     args = parser.parse_args()
 
-    for path in [args.data, args.public]:
-        with open(path) as f:
-            data = json.load(f)
-
+    history = None if args.no_history else ItemHistory()
+    if history is None and not args.plan:
+        parser.error('--no-history only applies to --plan')
+
+    data = load_items_file(args.data)
+    if args.plan:
+        if history is not None:
+            replayed = replay_plans(history, data)
+            if replayed:
+                print(f'Replayed {replayed} recorded plan(s) onto rebuilt data')
+            history.record(data['items'], 'base', base=True)
         for plan_path in args.plan:
             with open(plan_path) as f:
-                merge_plan = json.load(f)
-            apply_merge_plan(data, merge_plan)
+                keyed_plan = plan_keys(data['items'], json.load(f))
+            apply_keyed_plan(data, keyed_plan)
+            if history is not None:
+                snapshot_id = history.record(data['items'], Path(plan_path).name, plan=keyed_plan)
+                print(f'Applied {plan_path} (snapshot {snapshot_id})')
+    elif args.replay:
+        replayed = replay_plans(history, data)
+        print(f'Merge plans replayed: {replayed}')
+        if not replayed:
+            return
+    else:
+        target = args.checkout
+        if args.undo:
+            head = history.head()
+            target = head and history.snapshot(head)['parent']
+            if target is None:
+                raise SystemExit('Nothing to undo.')
+        elif target not in history.snapshot_ids():
+            raise SystemExit(f'Unknown snapshot: {target}')
+        data['items'] = history.items(target)
+        history.set_head(target)
+        print(f'Restored snapshot {target} ({len(data["items"])} items)')
 
-        with open(path, 'w') as f:
-            json.dump(data, f, ensure_ascii=True, indent=2, sort_keys=False)
+    for path in [args.data, args.public]:
+        write_items_file(path, data)
 
     regenerate_merge_tool(args.data, args.tool)
+    refresh_menu_index(data['items'])
 
 
 if __name__ == '__main__':
-    main()
+    run_cli(main)
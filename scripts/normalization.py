@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Shared text normalization for grouping and lookup keys.
+
+normalize_key() is the one key every stage uses for titles and item text
+(decisions, produce filters, title grouping, item keys, auto-links, search
+tokens):
+lowercase, anything but a-z/0-9 becomes a space, whitespace collapses, then
+the FIXUPS table folds spelling variants ("cous cous" -> "couscous").
+ingredient_key() is the key for ingredient lines; the app's ingredientKey
+(app/src/normalization.ts) applies the same exported rules.
+tokenize() splits a key into the match tokens suggest_links.py and
+build_recipe_matches.py score with.
+
+Both are str.translate based and LRU-cached, so each distinct string is
+normalized once per run. Running this script exports the rules to
+app/public/data/normalization_rules.json, which app/src/normalization.ts
+loads so the app builds the same item keys.
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from generations import write_text_atomic
+from profiling import run_cli
+
+APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
+RULES_PATH = APP_DATA_DIR / "normalization_rules.json"
+
+CACHE_SIZE = 1 << 16
+
+KEY_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+# Applied to whole words of an already-normalized key, in order.
+FIXUPS = [
+    ("cous cous", "couscous"),
+]
+
+INGREDIENT_DASHES = "–—"
+INGREDIENT_UNIT_SYNONYMS = {
+    "tablespoons": "tablespoon",
+    "teaspoons": "teaspoon",
+}
+# Words too common in titles to say anything about which recipe a text names.
+STOPWORDS = {
+    "a", "an", "and", "the", "with", "of", "in", "on", "for", "to", "or",
+    "recipe", "recipes", "easy", "best", "my", "our", "how", "make",
+}
+
+INGREDIENT_UNIT_RE = re.compile(r"\b(" + "|".join(INGREDIENT_UNIT_SYNONYMS) + r")\b")
+
+
+class _KeyTable(dict):
+    """str.translate table that lowercases and blanks out every non key character.
+
+    Unicode is too large to enumerate, so entries are filled in on first lookup.
+    """
+
+    def __missing__(self, code):
+        lowered = chr(code).lower()
+        value = "".join(c if c in KEY_CHARS else " " for c in lowered)
+        self[code] = value
+        return value
+
+
+KEY_TABLE = _KeyTable()
+INGREDIENT_TABLE = str.maketrans({c: "-" for c in INGREDIENT_DASHES})
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_key(text: str) -> str:
+    key = " ".join(text.translate(KEY_TABLE).split())
+    if not key:
+        return key
+    padded = f" {key} "
+    for variant, canonical in FIXUPS:
+        padded = padded.replace(f" {variant} ", f" {canonical} ")
+    return padded[1:-1]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def ingredient_key(text: str) -> str:
+    key = " ".join(text.lower().translate(INGREDIENT_TABLE).split())
+    return INGREDIENT_UNIT_RE.sub(lambda m: INGREDIENT_UNIT_SYNONYMS[m.group(1)], key)
+
+
+def title_key(title: str) -> str:
+    """Grouping key for a title; falls back to lowercase for titles with no key characters."""
+    return normalize_key(title) or title.strip().lower()
+
+
+def tokenize(text):
+    """Match tokens of a text: its normalized words minus stopwords and numbers."""
+    return [t for t in normalize_key(text or "").split() if t not in STOPWORDS and not t.isdigit()]
+
+
+def rules():
+    return {
+        "key": {
+            "lowercase": True,
+            "keep": KEY_CHARS,
+            "collapse_whitespace": True,
+            "fixups": [list(pair) for pair in FIXUPS],
+        },
+        "ingredient": {
+            "lowercase": True,
+            "dashes": {c: "-" for c in INGREDIENT_DASHES},
+            "collapse_whitespace": True,
+            "unit_synonyms": INGREDIENT_UNIT_SYNONYMS,
+        },
+    }
+
+
+def write_rules(path: Path = RULES_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(path, json.dumps(rules(), indent=2, ensure_ascii=True))
+
+
+def main():
+    write_rules()
+    print(f"Normalization rules written to {RULES_PATH}")
+
+
+if __name__ == "__main__":
+    run_cli(main)
@@ -1,6 +1,8 @@
 import re
 from pathlib import Path
 
+from profiling import run_cli
+
 MENUS_DIR = Path(__file__).resolve().parents[1] / "Menus"
 
 CHECKBOX_TOKEN_RE = re.compile(r"-\s*\[(?P<mark>[xX\s])\]\s*")
@@ -30,8 +32,13 @@ def split_multi_checkbox(line: str):
 
 
 def extract_link_tokens(text: str):
+    """Links in text as (kind, source text, span, link) tuples in order of appearance.
+
+    kind is "md" for [text](url), with link {"text", "url"}, or "url" for a
+    bare URL not inside a markdown link, with link the URL.
+    """
     md_matches = list(MD_LINK_RE.finditer(text))
-    md_links = [("md", m.group(0), m.span()) for m in md_matches]
+    md_links = [("md", m.group(0), m.span(), {"text": m.group(1), "url": m.group(2)}) for m in md_matches]
     md_urls = {m.group(2) for m in md_matches}
     md_spans = [m.span() for m in md_matches]
 
@@ -46,38 +53,50 @@ def extract_link_tokens(text: str):
         url = m.group(0)
         if url in md_urls:
             continue
-        url_links.append(("url", url, span))
+        url_links.append(("url", url, span, url))
 
     tokens = md_links + url_links
     tokens.sort(key=lambda t: t[2][0])
     return tokens
 
 
-def split_multi_links(line: str):
+def links_from_tokens(tokens):
+    """Split link tokens into (markdown links, bare URLs), as extract_menus.py stores them."""
+    md_links = [link for kind, _, _, link in tokens if kind == "md"]
+    urls = [link for kind, _, _, link in tokens if kind == "url"]
+    return md_links, urls
+
+
+def checkbox_parts(line: str):
+    """Return (indent, mark, text, link tokens) for a non-empty checkbox line, else None."""
     prefix = CHECKBOX_PREFIX_RE.match(line)
     if not prefix:
         return None
-
-    mark = prefix.group("mark")
-    indent = prefix.group("indent")
     text = line[prefix.end():].strip()
     if not text:
         return None
+    return prefix.group("indent"), prefix.group("mark"), text, extract_link_tokens(text)
 
-    tokens = extract_link_tokens(text)
+
+def split_multi_links(line: str):
+    parts = checkbox_parts(line)
+    return _split_multi_links(*parts) if parts else None
+
+
+def _split_multi_links(indent, mark, text, tokens):
     if len(tokens) <= 1:
         return None
 
     segments = []
     last = 0
-    for _, _, span in tokens:
+    for _, _, span, _ in tokens:
         segments.append(text[last:span[0]])
         last = span[1]
     segments.append(text[last:])
 
     lines = []
     last_index = len(tokens) - 1
-    for idx, (_, link_repr, _) in enumerate(tokens):
+    for idx, (_, link_repr, _, _) in enumerate(tokens):
         desc = segments[idx].strip()
         if idx == last_index:
             tail = segments[idx + 1].strip()
@@ -90,21 +109,15 @@ def split_multi_links(line: str):
 
 
 def split_trailing_text_after_link(line: str):
-    prefix = CHECKBOX_PREFIX_RE.match(line)
-    if not prefix:
-        return None
+    parts = checkbox_parts(line)
+    return _split_trailing_text_after_link(*parts) if parts else None
 
-    mark = prefix.group("mark")
-    indent = prefix.group("indent")
-    text = line[prefix.end():].strip()
-    if not text:
-        return None
 
-    tokens = extract_link_tokens(text)
+def _split_trailing_text_after_link(indent, mark, text, tokens):
     if len(tokens) != 1:
         return None
 
-    _, link_repr, (start, end) = tokens[0]
+    _, link_repr, (start, end), _ = tokens[0]
     before = text[:start].strip()
     after = text[end:].strip()
     if not after:
@@ -132,21 +145,15 @@ def split_trailing_text_after_link(line: str):
 
 
 def split_trigger_before_link(line: str):
-    prefix = CHECKBOX_PREFIX_RE.match(line)
-    if not prefix:
-        return None
+    parts = checkbox_parts(line)
+    return _split_trigger_before_link(*parts) if parts else None
 
-    mark = prefix.group("mark")
-    indent = prefix.group("indent")
-    text = line[prefix.end():].strip()
-    if not text:
-        return None
 
-    tokens = extract_link_tokens(text)
+def _split_trigger_before_link(indent, mark, text, tokens):
     if len(tokens) != 1:
         return None
 
-    _, link_repr, (start, _) = tokens[0]
+    _, link_repr, (start, _), _ = tokens[0]
     before = text[:start].strip()
     if not before:
         return None
@@ -175,43 +182,72 @@ def split_trigger_before_link(line: str):
     return [f"{indent}- [{mark}] {first}", f"{indent}- [{mark}] {second}"]
 
 
-def normalize_file(path: Path):
-    original = path.read_text(encoding="utf-8", errors="replace").splitlines()
+def _normalize_line(line: str):
+    """Return (split lines or None, checkbox parts or None) for one note line."""
+    multi_checkbox = split_multi_checkbox(line)
+    if multi_checkbox:
+        return multi_checkbox, None
+
+    parts = checkbox_parts(line)
+    if not parts:
+        return None, None
+    for splitter in (_split_multi_links, _split_trailing_text_after_link, _split_trigger_before_link):
+        split = splitter(*parts)
+        if split:
+            return split, parts
+    return None, parts
+
+
+def normalize_line(line: str):
+    """Return the lines a single note line should be split into, or None to keep it.
+
+    The checkbox prefix and link tokens are parsed once and shared by every splitter.
+    """
+    return _normalize_line(line)[0]
+
+
+def line_link_tokens(line: str):
+    """Link tokens of a checkbox line's text, or None for any other line."""
+    parts = checkbox_parts(line)
+    return parts[3] if parts else None
+
+
+def normalize_lines_with_links(lines):
+    """Return (updated_lines, link tokens per updated line, changed) for one menu note.
+
+    A line that is kept reuses the tokens its splitters parsed; only lines a
+    split produced are tokenized again.
+    """
     updated = []
+    tokens = []
     changed = False
-
-    for line in original:
-        # Split if multiple checkbox tokens in one line
-        multi_checkbox = split_multi_checkbox(line)
-        if multi_checkbox:
-            updated.extend(multi_checkbox)
+    for line in lines:
+        split, parts = _normalize_line(line)
+        if split:
+            updated.extend(split)
+            tokens.extend(line_link_tokens(new) for new in split)
             changed = True
-            continue
+        else:
+            updated.append(line)
+            tokens.append(parts[3] if parts else None)
+    return updated, tokens, changed
 
-        # Split if multiple links in a single checkbox item
-        multi_links = split_multi_links(line)
-        if multi_links:
-            updated.extend(multi_links)
-            changed = True
-            continue
 
-        split_trailing = split_trailing_text_after_link(line)
-        if split_trailing:
-            updated.extend(split_trailing)
-            changed = True
-            continue
+def normalize_lines(lines):
+    """Return (updated_lines, changed) for the lines of one menu note."""
+    updated, _, changed = normalize_lines_with_links(lines)
+    return updated, changed
 
-        split_before = split_trigger_before_link(line)
-        if split_before:
-            updated.extend(split_before)
-            changed = True
-            continue
 
-        updated.append(line)
+def write_note_lines(path: Path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
-    if changed:
-        path.write_text("\n".join(updated) + "\n", encoding="utf-8")
 
+def normalize_file(path: Path):
+    original = path.read_text(encoding="utf-8", errors="replace").splitlines()
+    updated, changed = normalize_lines(original)
+    if changed:
+        write_note_lines(path, updated)
     return changed
 
 
@@ -230,4 +266,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -0,0 +1,149 @@
+"""
+Shared --profile support for the pipeline scripts.
+
+Every script ends with run_cli(main). Without profiling flags this just calls
+main(). With them, the flags are removed from sys.argv (so each script's own
+argparse never sees them) and main() runs under a profiler:
+
+  --profile [DIR]      cProfile; writes DIR/<stage>.pstats and a top-N
+                       hotspot summary DIR/<stage>.txt (DIR defaults to profiles/)
+  --profile-sample     statistical sampler instead of cProfile: a background
+                       thread records the main thread's current line every
+                       --profile-interval ms (default 5) and writes the hottest
+                       lines to DIR/<stage>.samples.txt. Much lower overhead on
+                       large archives.
+  --profile-top N      number of rows in the summaries (default 25)
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+PROFILE_DIR = Path(__file__).resolve().parents[1] / "profiles"
+DEFAULT_TOP = 25
+DEFAULT_INTERVAL_MS = 5.0
+
+
+def pop_profile_args(argv):
+    """Strip profiling flags from argv in place and return them as a dict."""
+    opts = {"dir": None, "sample": False, "top": DEFAULT_TOP, "interval_ms": DEFAULT_INTERVAL_MS}
+    rest = [argv[0]]
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--profile":
+            opts["dir"] = PROFILE_DIR
+            if i + 1 < len(argv) and not argv[i + 1].startswith("-"):
+                opts["dir"] = Path(argv[i + 1])
+                i += 1
+        elif arg.startswith("--profile="):
+            opts["dir"] = Path(arg.split("=", 1)[1])
+        elif arg == "--profile-sample":
+            opts["sample"] = True
+        elif arg in ("--profile-top", "--profile-interval") and i + 1 < len(argv):
+            key = "top" if arg == "--profile-top" else "interval_ms"
+            opts[key] = int(argv[i + 1]) if key == "top" else float(argv[i + 1])
+            i += 1
+        else:
+            rest.append(arg)
+        i += 1
+    argv[:] = rest
+    if opts["sample"] and opts["dir"] is None:
+        opts["dir"] = PROFILE_DIR
+    return opts
+
+
+def summarize_stats(profiler, top=DEFAULT_TOP):
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs()
+    out.write("== By cumulative time ==\n")
+    stats.sort_stats("cumulative").print_stats(top)
+    out.write("== By own time ==\n")
+    stats.sort_stats("tottime").print_stats(top)
+    return out.getvalue()
+
+
+class Sampler:
+    """Sample the calling thread's current line from a background thread."""
+
+    def __init__(self, interval_ms=DEFAULT_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.target = threading.get_ident()
+        self.lines = Counter()
+        self.functions = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            self.samples += 1
+            code = frame.f_code
+            self.lines[(code.co_filename, frame.f_lineno, code.co_name)] += 1
+            seen = set()
+            while frame is not None:
+                key = (frame.f_code.co_filename, frame.f_code.co_firstlineno, frame.f_code.co_name)
+                if key not in seen:
+                    self.functions[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def report(self, top=DEFAULT_TOP):
+        total = self.samples or 1
+        lines = [f"Samples: {self.samples} at {self.interval * 1000:.1f} ms", "", "== Hot lines (self) =="]
+        for (filename, lineno, name), n in self.lines.most_common(top):
+            lines.append(f"{100 * n / total:6.1f}%  {Path(filename).name}:{lineno}  {name}")
+        lines += ["", "== Hot functions (inclusive) =="]
+        for (filename, lineno, name), n in self.functions.most_common(top):
+            lines.append(f"{100 * n / total:6.1f}%  {Path(filename).name}:{lineno}  {name}")
+        return "\n".join(lines) + "\n"
+
+
+def run_cli(main, stage=None):
+    """Entry point wrapper used by every script's __main__ block."""
+    opts = pop_profile_args(sys.argv)
+    if opts["dir"] is None:
+        return main()
+
+    stage = stage or Path(sys.argv[0]).stem
+    out_dir = Path(opts["dir"])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    if opts["sample"]:
+        sampler = Sampler(opts["interval_ms"])
+        sampler.start()
+        try:
+            return main()
+        finally:
+            sampler.stop()
+            path = out_dir / f"{stage}.samples.txt"
+            path.write_text(sampler.report(opts["top"]), encoding="utf-8")
+            print(f"[profile] {stage}: {time.perf_counter() - start:.2f}s, samples in {path}")
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return main()
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(out_dir / f"{stage}.pstats"))
+        summary = out_dir / f"{stage}.txt"
+        summary.write_text(summarize_stats(profiler, opts["top"]), encoding="utf-8")
+        print(f"[profile] {stage}: {time.perf_counter() - start:.2f}s, hotspots in {summary}")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Publish app/public/data for long-lived HTTP caching.
+
+Every top-level JSON file in app/public/data, every menu shard under menus/
+(including menus/manifest.json) and every recipe body under recipe_bodies/ is
+written once under a content-hashed name in app/public/data/hashed/
+(menus.3f2a9c1b7e.json, menus/2025.0c4e1d9a2b.json), JSON minified, with a
+pre-compressed .gz sibling. app/public/data/manifest.json maps each logical
+path to its current hashed path. The app fetches the small manifest with
+revalidation and then the hashed files, which never change under a given name
+and can be cached indefinitely.
+
+A hashed file that already exists is left alone, so unchanged data costs no
+writes. The manifest also records the previous distinct set ("previous"),
+which is kept so a page that loaded the old manifest can finish its fetches;
+everything else in hashed/ is removed, so at most two sets are ever on disk.
+The manifest and hashed/ are generated and untracked (see .gitignore): a
+committed manifest would point at hashed files that were never committed. The
+Pages deploy runs this script on the committed data before building the app.
+
+Usage:
+  python3 scripts/publish_data.py
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+from extract_menus import MENU_SHARDS_DIR_NAME, RECIPE_BODIES_DIR_NAME
+from generations import write_bytes_atomic
+from profiling import run_cli
+
+APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
+
+MANIFEST_NAME = "manifest.json"
+HASHED_DIR_NAME = "hashed"
+HASH_LENGTH = 10
+GZIP_LEVEL = 9
+# Subdirectories published alongside the top-level JSON files: the per-year
+# menu shards (with their manifest) and the recipe bodies.
+SUBDIRS = {MENU_SHARDS_DIR_NAME: "*.json", RECIPE_BODIES_DIR_NAME: "*.md"}
+
+
+def minify(raw):
+    return json.dumps(json.loads(raw), separators=(",", ":"), ensure_ascii=True).encode("utf-8")
+
+
+def hashed_name(name, body):
+    digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+    stem, suffix = name.rsplit(".", 1)
+    return f"{stem}.{digest}.{suffix}"
+
+
+def load_manifest(path):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {"files": {}}
+
+
+def iter_sources(data_dir):
+    """Yield every publishable file under data_dir: top-level JSON, menu shards, recipe bodies."""
+    for source in sorted(data_dir.glob("*.json")):
+        if source.name != MANIFEST_NAME:
+            yield source
+    for subdir, pattern in SUBDIRS.items():
+        yield from sorted((data_dir / subdir).glob(pattern))
+
+
+def publish(data_dir=APP_DATA_DIR):
+    """Write hashed/minified/gzipped copies and the manifest; return (manifest, written, removed)."""
+    data_dir = Path(data_dir)
+    hashed_dir = data_dir / HASHED_DIR_NAME
+    hashed_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = data_dir / MANIFEST_NAME
+    previous = load_manifest(manifest_path)
+
+    files = {}
+    written = 0
+    for source in iter_sources(data_dir):
+        rel = source.relative_to(data_dir).as_posix()
+        body = minify(source.read_bytes()) if source.suffix == ".json" else source.read_bytes()
+        name = hashed_name(rel, body)
+        target = hashed_dir / name
+        gz_target = hashed_dir / (name + ".gz")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not target.exists():
+            write_bytes_atomic(target, body)
+            written += 1
+        if not gz_target.exists():
+            # mtime=0 keeps the .gz bytes a pure function of the content.
+            write_bytes_atomic(gz_target, gzip.compress(body, GZIP_LEVEL, mtime=0))
+            written += 1
+        files[rel] = {
+            "path": f"{HASHED_DIR_NAME}/{name}",
+            "bytes": len(body),
+            "gzip_bytes": gz_target.stat().st_size,
+            "source_bytes": source.stat().st_size,
+        }
+
+    # Republishing unchanged data must not forget the set before it.
+    old_files = previous.get("files", {})
+    manifest = {
+        "version": 1,
+        "files": files,
+        "previous": old_files if old_files != files else previous.get("previous", {}),
+    }
+    if manifest != previous:
+        write_bytes_atomic(manifest_path, json.dumps(manifest, indent=2, ensure_ascii=True).encode("utf-8"))
+
+    keep = set()
+    for entries in (files, manifest["previous"]):
+        for entry in entries.values():
+            name = entry["path"][len(HASHED_DIR_NAME) + 1:]
+            keep |= {name, name + ".gz"}
+    removed = 0
+    for path in sorted(hashed_dir.rglob("*"), reverse=True):
+        if path.is_file() and path.relative_to(hashed_dir).as_posix() not in keep:
+            path.unlink()
+            removed += 1
+        elif path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+    return manifest, written, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish content-hashed, pre-compressed app data.")
+    parser.add_argument("--data-dir", default=str(APP_DATA_DIR), help="App data directory to publish")
+    args = parser.parse_args()
+
+    manifest, written, removed = publish(args.data_dir)
+    files = manifest["files"]
+    source = sum(f["source_bytes"] for f in files.values())
+    minified = sum(f["bytes"] for f in files.values())
+    gzipped = sum(f["gzip_bytes"] for f in files.values())
+    print(f"Published files: {len(files)} ({written} written, {removed} stale removed)")
+    if source:
+        print(f"Bytes: {source} source, {minified} minified ({minified / source:.0%}), "
+              f"{gzipped} gzip ({gzipped / source:.0%})")
+
+
+if __name__ == "__main__":
+    run_cli(main)
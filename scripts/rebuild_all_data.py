@@ -1,43 +1,516 @@
 #!/usr/bin/env python3
-"""Rebuild all derived data in the correct order.
-
-Order:
-1) extract_menus.py (base menus + recipes)
-2) auto_add_links.py (restore auto-added menu links)
-3) build_menu_items_refactored.py (refactored items)
-4) fix_refactored_item_titles.py (clean titles from URLs)
-5) merge_brats_entries.py (split brats/burgers sides)
-6) build_menu_sources.py (menu item sources by domain)
+"""Rebuild all derived data.
+
+Stages (declared in STAGES with the files they read and write):
+1) build_image_store.py (content-addressed recipe images and the export name map)
+2) extract_menus.py --normalize (base menus + recipes, notes normalized in memory)
+3) fix_recipe_titles.py (clean recipe titles that are URLs)
+4) auto_add_links.py (restore auto-added menu links)
+5) build_menu_items_refactored.py (refactored items)
+6) fix_refactored_item_titles.py (clean titles from URLs)
+7) merge_brats_entries.py (split brats/burgers sides)
+8) edit_journal.py (replay data/edit_journal.jsonl edits onto the rebuilt data)
+9) merge_menu_items.py --replay (re-apply recorded merge plans, see item_history.py)
+10) build_menu_sources.py (menu item sources by domain)
+11) build_item_cooccurrence.py (week x item matrix and pairing neighbors)
+12) build_recipe_matches.py (recipe notes <-> refactored items)
+13) build_search_index.py (full-text index over items and recipes)
+14) build_item_facets.py (facet counts and item bitmaps)
+15) normalization.py (key normalization rules exported for the app)
+16) publish_data.py (content-hashed, gzipped app data and its manifest)
+
+A stage waits only for earlier stages that touch the same files, so the recipe
+chain, menu sources and the refactored-items chain run concurrently (--jobs).
+After a successful run the digest of every declared file is stored in
+data/rebuild_state.json; a stage whose inputs and outputs still match those
+digests (and whose scripts are unchanged) is skipped. Use --force to rerun all.
+
+Each step is timed (wall and CPU), its peak RSS is recorded, and input/output
+record counts and bytes written are measured. The run report is written to
+data/rebuild_report.json with the critical path length; pass --history to also
+append it to a JSON-lines file. Pass --profile [DIR] (optionally with
+--profile-sample) to profile every step; see scripts/profiling.py for the
+per-step output files.
+
+Stages never write the live trees. They run in a staging workspace under
+data/generations: a copy of scripts/ and of every declared output, hardlinked
+(no bytes copied), plus symlinks to the remaining inputs. Scripts write their
+outputs atomically, so a stage's writes replace the workspace's links and
+leave the live files alone; a failed run leaves the live trees untouched.
+After a successful run that changed anything, the workspace's outputs are
+committed as a new generation (hardlinks, the CURRENT pointer flipped, the
+last --keep-generations kept for rollback) and published: each output outside
+app/public/data is replaced file by file, then app/public/data, which the app
+loads as one set, is swapped in with a single atomic exchange (see
+scripts/generations.py). The app, the desktop app's bundle and serve_data.py
+see either the old set or the new one, never a mix.
 """
 
+import argparse
+import hashlib
+import json
+import os
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from generations import KEEP, GenerationStore, exchange, link_or_copy, link_tree, sync_path
+from profiling import PROFILE_DIR
+
+_print_lock = threading.Lock()
+
 ROOT = Path(__file__).resolve().parents[1]
+REPORT_PATH = ROOT / "data" / "rebuild_report.json"
+STATE_PATH = ROOT / "data" / "rebuild_state.json"
+# Directories the app loads as one set; each is published with a single swap.
+SWAPPED_DIRS = ["app/public/data"]
+
+# Every stage declares the files and directories it reads and writes (relative
+# to the repo root), in the order a serial rebuild would run them. A stage
+# depends on each earlier stage whose outputs it reads or overwrites, or whose
+# inputs it overwrites; everything else may run concurrently.
+STAGES = {
+    "scripts/build_image_store.py": {
+        "inputs": ["Recipes/images", "data/image_names.json"],
+        "outputs": ["data/image_names.json", "app/public/images", "docs/data/recipes.json"],
+    },
+    "scripts/extract_menus.py": {
+        # Normalize note lines in memory so each note is read once per rebuild.
+        "args": ["--normalize"],
+        "inputs": ["Menus", "Recipes", "menu_item_decisions.json", "data/image_names.json"],
+        "outputs": [
+            "data/menus.json", "data/menus",
+            "data/recipes.json", "data/recipes_index.json", "data/recipe_bodies",
+        ],
+    },
+    "scripts/fix_recipe_titles.py": {
+        "inputs": ["data/recipes.json"],
+        "outputs": [
+            "data/recipes.json", "data/recipes_index.json", "data/recipe_bodies",
+            "app/public/data/recipes.json", "app/public/data/recipes_index.json",
+            "app/public/data/recipe_bodies",
+        ],
+    },
+    "scripts/auto_add_links.py": {
+        "inputs": ["data/menus.json"],
+        "outputs": [
+            "data/menus.json", "data/menus",
+            "app/public/data/menus.json", "app/public/data/menus",
+        ],
+    },
+    "scripts/build_menu_items_refactored.py": {
+        "inputs": ["data/menus.json"],
+        "outputs": [
+            "data/menu_items_refactored.json", "app/public/data/menu_items_refactored.json",
+            "data/menu_item_index.json", "app/public/data/menu_item_index.json",
+        ],
+    },
+    "scripts/fix_refactored_item_titles.py": {
+        "inputs": ["data/menu_items_refactored.json"],
+        "outputs": ["data/menu_items_refactored.json", "app/public/data/menu_items_refactored.json"],
+    },
+    "scripts/merge_brats_entries.py": {
+        "inputs": ["data/menu_items_refactored.json", "data/menus.json"],
+        "outputs": [
+            "data/menu_items_refactored.json", "app/public/data/menu_items_refactored.json",
+            "data/menu_item_index.json", "app/public/data/menu_item_index.json",
+        ],
+    },
+    "scripts/edit_journal.py": {
+        "inputs": [
+            "data/edit_journal.jsonl", "data/menu_items_refactored.json",
+            "data/menus.json", "data/menu_item_index.json",
+        ],
+        "outputs": [
+            "data/menu_items_refactored.json", "app/public/data/menu_items_refactored.json",
+            "data/menu_item_index.json", "app/public/data/menu_item_index.json",
+            "data/menus.json", "data/menus", "app/public/data/menus.json", "app/public/data/menus",
+        ],
+    },
+    "scripts/merge_menu_items.py": {
+        "args": ["--replay"],
+        "inputs": ["data/item_history", "data/menu_items_refactored.json", "data/menus.json"],
+        "outputs": [
+            "data/menu_items_refactored.json", "app/public/data/menu_items_refactored.json",
+            "data/menu_item_index.json", "app/public/data/menu_item_index.json",
+            "merge_items_tool.html", "data/item_history",
+        ],
+    },
+    "scripts/build_menu_sources.py": {
+        "inputs": ["data/menus.json"],
+        "outputs": ["data/menu_item_sources.json", "app/public/data/menu_item_sources.json"],
+    },
+    "scripts/build_item_cooccurrence.py": {
+        "inputs": ["data/menu_items_refactored.json"],
+        "outputs": ["data/item_cooccurrence.json"],
+    },
+    "scripts/build_recipe_matches.py": {
+        "inputs": ["data/menu_items_refactored.json", "data/recipes.json"],
+        "outputs": ["data/recipe_matches.json", "app/public/data/recipe_matches.json"],
+    },
+    "scripts/build_search_index.py": {
+        "inputs": ["data/menu_items_refactored.json", "data/recipes.json"],
+        "outputs": ["data/search_index.json", "app/public/data/search_index.json"],
+    },
+    "scripts/build_item_facets.py": {
+        "inputs": ["data/menu_items_refactored.json"],
+        "outputs": ["data/item_facets.json", "app/public/data/item_facets.json"],
+    },
+    "scripts/normalization.py": {
+        "inputs": [],
+        "outputs": ["app/public/data/normalization_rules.json"],
+    },
+    "scripts/publish_data.py": {
+        "inputs": [
+            "app/public/data/menus.json", "app/public/data/recipes.json",
+            "app/public/data/recipes_index.json", "app/public/data/menu_items_refactored.json",
+            "app/public/data/menu_item_index.json", "app/public/data/menu_item_sources.json",
+            "app/public/data/recipe_matches.json", "app/public/data/search_index.json",
+            "app/public/data/item_facets.json", "app/public/data/normalization_rules.json",
+            "app/public/data/menus", "app/public/data/recipe_bodies",
+        ],
+        "outputs": ["app/public/data/manifest.json", "app/public/data/hashed"],
+    },
+}
+
+
+def paths_overlap(a, b):
+    return a == b or a.startswith(b + "/") or b.startswith(a + "/")
+
+
+def conflicts(first, second):
+    """True if `second` must wait for `first` (read-after-write, write-after-read or write-after-write)."""
+    pairs = [
+        (first["outputs"], second["inputs"]),
+        (first["outputs"], second["outputs"]),
+        (first["inputs"], second["outputs"]),
+    ]
+    return any(paths_overlap(a, b) for xs, ys in pairs for a in xs for b in ys)
+
+
+def stage_dependencies(stages=STAGES):
+    """Map each stage to the set of earlier stages it has to wait for."""
+    order = list(stages)
+    return {
+        step: {prev for prev in order[:i] if conflicts(stages[prev], stages[step])}
+        for i, step in enumerate(order)
+    }
+
+
+def path_digest(path: Path):
+    """sha256 of a file, or of every file (relative name + bytes) under a directory."""
+    if path.is_file():
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    if not path.is_dir():
+        return None
+    h = hashlib.sha256()
+    for f in sorted(p for p in path.rglob("*") if p.is_file()):
+        h.update(f.relative_to(path).as_posix().encode("utf-8") + b"\0")
+        h.update(hashlib.sha256(f.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def code_digest():
+    """One digest over every pipeline script, so any code change reruns all stages."""
+    h = hashlib.sha256()
+    for f in sorted((ROOT / "scripts").glob("*.py")):
+        h.update(f.name.encode("utf-8") + b"\0")
+        h.update(f.read_bytes())
+    return h.hexdigest()
+
+
+def load_state(path: Path):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(path: Path, code, stages=STAGES):
+    files = sorted({p for io in stages.values() for p in io["inputs"] + io["outputs"]})
+    state = {"code": code, "files": {p: path_digest(ROOT / p) for p in files}}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(state, indent=2, ensure_ascii=True), encoding="utf-8")
+
+
+def is_up_to_date(step, state, code, stages=STAGES, root=ROOT):
+    """A stage can be skipped when the code and every file it touches match the last good run."""
+    if state.get("code") != code:
+        return False
+    recorded = state.get("files", {})
+    io = stages[step]
+    for p in io["inputs"] + io["outputs"]:
+        # A file that is still missing (e.g. an empty edit journal) counts as unchanged.
+        if p not in recorded or recorded[p] != path_digest(root / p):
+            return False
+    return True
+
+
+def critical_path(durations, deps):
+    """Length in seconds of the longest dependency chain given per-stage durations."""
+    finish = {}
+    for step in deps:
+        finish[step] = durations.get(step, 0.0) + max((finish[d] for d in deps[step]), default=0.0)
+    return round(max(finish.values(), default=0.0), 3)
 
-STEPS = [
-    "scripts/extract_menus.py",
-    "scripts/auto_add_links.py",
-    "scripts/build_menu_items_refactored.py",
-    "scripts/fix_refactored_item_titles.py",
-    "scripts/merge_brats_entries.py",
-    "scripts/build_menu_sources.py",
-]
 
+def count_records(path: Path):
+    """Number of records in a data file (first top-level collection) or files under a directory."""
+    if path.is_dir():
+        return sum(1 for p in path.rglob("*") if p.is_file())
+    if not path.exists() or path.suffix != ".json":
+        return None
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, (list, dict)):
+                return len(value)
+    return None
 
-def run(step):
-    print(f"\n==> Running {step}")
-    result = subprocess.run([sys.executable, str(ROOT / step)], check=False)
-    if result.returncode != 0:
-        raise SystemExit(result.returncode)
+
+def file_stamps(path: Path):
+    """(mtime_ns, size) of path, or of every file under it when it is a directory."""
+    files = (p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    stamps = {}
+    for f in files:
+        try:
+            stat = f.stat()
+        except FileNotFoundError:
+            continue
+        stamps[f] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+
+def maxrss_kb(usage):
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+
+def run_process(cmd):
+    """Run cmd and return (returncode, cpu_seconds, peak_rss_kb, output) for that child alone.
+
+    Output is captured so concurrent stages do not interleave their logs.
+    """
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    output = proc.stdout.read()
+    proc.stdout.close()
+    if resource is None or not hasattr(os, "wait4"):
+        return proc.wait(), None, None, output
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, round(usage.ru_utime + usage.ru_stime, 3), maxrss_kb(usage), output
+
+
+def run(step, extra_args=(), started_at=None, root=ROOT):
+    """Run one stage's script from root (the staging workspace) and measure it."""
+    io = STAGES.get(step, {"inputs": [], "outputs": []})
+    inputs = {p: count_records(root / p) for p in io["inputs"]}
+    before = {p: file_stamps(root / p) for p in io["outputs"]}
+
+    start = time.perf_counter()
+    returncode, cpu_s, peak_rss_kb, output = run_process(
+        [sys.executable, str(root / step), *io.get("args", []), *extra_args]
+    )
+    wall_s = time.perf_counter() - start
+
+    outputs = {}
+    bytes_written = 0
+    for p in io["outputs"]:
+        # Every new or changed file counts, including those under output directories.
+        for f, stamp in file_stamps(root / p).items():
+            if before[p].get(f) != stamp:
+                bytes_written += stamp[1]
+        outputs[p] = count_records(root / p)
+
+    stats = {
+        "step": step,
+        "returncode": returncode,
+        "wall_s": round(wall_s, 3),
+        "cpu_s": cpu_s,
+        "peak_rss_kb": peak_rss_kb,
+        "input_records": inputs,
+        "output_records": outputs,
+        "bytes_written": bytes_written,
+    }
+    if started_at is not None:
+        stats["start_offset_s"] = round(start - started_at, 3)
+    with _print_lock:
+        print(f"\n==> Ran {step}")
+        if output:
+            print(output, end="" if output.endswith("\n") else "\n")
+        print(f"    {wall_s:.2f}s wall, {cpu_s if cpu_s is not None else '?'}s cpu, "
+              f"{peak_rss_kb if peak_rss_kb is not None else '?'} KB peak RSS, {bytes_written} bytes written")
+    return stats
+
+
+def schedule(stages, deps, extra_args, jobs, state, code, force=False, root=ROOT):
+    """Run stages as their dependencies finish; return (step stats, skipped steps, failed step)."""
+    started_at = time.perf_counter()
+    pending = list(stages)
+    done = set()
+    running = {}
+    results = []
+    skipped = []
+    failed = None
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            if failed is None:
+                for step in [s for s in pending if deps[s] <= done]:
+                    if len(running) >= jobs:
+                        break
+                    pending.remove(step)
+                    if not force and is_up_to_date(step, state, code, stages, root):
+                        with _print_lock:
+                            print(f"\n==> Skipped {step} (inputs unchanged)")
+                        skipped.append(step)
+                        done.add(step)
+                        continue
+                    running[pool.submit(run, step, extra_args, started_at, root)] = step
+            if not running:
+                # Either a failure stopped scheduling, or skips just made more stages ready.
+                if failed is not None or not pending:
+                    break
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step = running.pop(future)
+                stats = future.result()
+                results.append(stats)
+                if stats["returncode"] != 0:
+                    failed = failed or step
+                else:
+                    done.add(step)
+    return results, skipped, failed
+
+
+def declared_outputs(stages=STAGES):
+    return list(dict.fromkeys(p for io in stages.values() for p in io["outputs"]))
+
+
+def stage_workspace(workspace: Path, stages=STAGES):
+    """Mirror what the stages read and write into workspace, laid out like the repo.
+
+    Scripts and outputs (and the whole of each SWAPPED_DIRS) are hardlinked,
+    so stages run against the live contents without being able to change
+    them; inputs no stage writes are symlinked.
+    """
+    if workspace.exists():
+        shutil.rmtree(workspace)
+    (workspace / "scripts").mkdir(parents=True)
+    for script in (ROOT / "scripts").glob("*.py"):
+        link_or_copy(script, workspace / "scripts" / script.name)
+    outputs = list(dict.fromkeys(SWAPPED_DIRS + declared_outputs(stages)))
+    for rel in outputs:
+        if not any(rel.startswith(other + "/") for other in outputs):
+            link_tree(ROOT / rel, workspace / rel)
+    inputs = sorted({p for io in stages.values() for p in io["inputs"]})
+    for rel in inputs:
+        covered = any(paths_overlap(rel, out) for out in outputs)
+        nested = any(rel.startswith(other + "/") for other in inputs)
+        if covered or nested or not (ROOT / rel).exists():
+            continue
+        (workspace / rel).parent.mkdir(parents=True, exist_ok=True)
+        (workspace / rel).symlink_to(ROOT / rel, target_is_directory=(ROOT / rel).is_dir())
+
+
+def publish_workspace(workspace: Path, stages=STAGES):
+    """Publish the workspace's outputs to the live trees, the swapped directories last."""
+    for rel in declared_outputs(stages):
+        if not any(paths_overlap(rel, swapped) for swapped in SWAPPED_DIRS):
+            sync_path(workspace / rel, ROOT / rel)
+    for rel in SWAPPED_DIRS:
+        if (workspace / rel).exists():
+            exchange(workspace / rel, ROOT / rel)
+
+
+def write_report(report, report_path: Path, history_path=None):
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2, ensure_ascii=True), encoding="utf-8")
+    if history_path:
+        with open(history_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=True) + "\n")
 
 
 def main():
-    for step in STEPS:
-        run(step)
-    print("\nAll data rebuilt successfully.")
+    parser = argparse.ArgumentParser(description="Rebuild all derived data.")
+    parser.add_argument("--report", default=str(REPORT_PATH), help="Run report JSON path")
+    parser.add_argument("--history", help="Append the run report to this JSON-lines file")
+    parser.add_argument("--profile", nargs="?", const=str(PROFILE_DIR), metavar="DIR",
+                        help="Profile every step with cProfile, writing .pstats and hotspot reports to DIR")
+    parser.add_argument("--profile-sample", action="store_true",
+                        help="Use the low-overhead sampling profiler instead of cProfile")
+    parser.add_argument("--profile-top", type=int, help="Rows per hotspot report")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Maximum stages run at once (1 runs them serially in declaration order)")
+    parser.add_argument("--force", action="store_true", help="Rerun every stage even if its inputs are unchanged")
+    parser.add_argument("--state", default=str(STATE_PATH), help="Input digest state JSON path")
+    parser.add_argument("--keep-generations", type=int, default=KEEP,
+                        help="Published generations to keep for rollback (0 disables generations)")
+    args = parser.parse_args()
+
+    step_args = []
+    if args.profile or args.profile_sample:
+        step_args += ["--profile", args.profile or str(PROFILE_DIR)]
+    if args.profile_sample:
+        step_args.append("--profile-sample")
+    if args.profile_top:
+        step_args += ["--profile-top", str(args.profile_top)]
+
+    # Skipped stages would leave holes in a profile, so profiling reruns everything.
+    force = args.force or bool(step_args)
+    deps = stage_dependencies()
+    state_path = Path(args.state)
+    state = {} if force else load_state(state_path)
+    code = code_digest()
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "jobs": args.jobs,
+    }
+    store = GenerationStore(keep=args.keep_generations)
+    workspace = store.directory / f".stage-{os.getpid()}"
+    start = time.perf_counter()
+    try:
+        stage_workspace(workspace)
+        steps, skipped, failed = schedule(STAGES, deps, step_args, args.jobs, state, code, force, workspace)
+        report["wall_s"] = round(time.perf_counter() - start, 3)
+        report["steps"] = sorted(steps, key=lambda s: list(STAGES).index(s["step"]))
+        report["skipped"] = skipped
+        report["critical_path_s"] = critical_path({s["step"]: s["wall_s"] for s in steps}, deps)
+        if failed:
+            report["failed_step"] = failed
+            write_report(report, Path(args.report), args.history)
+            raise SystemExit(next(s["returncode"] for s in steps if s["step"] == failed))
 
+        if steps:
+            if args.keep_generations > 0:
+                staged = GenerationStore(root=workspace, directory=store.directory, keep=args.keep_generations)
+                report["generation"] = staged.commit(declared_outputs(), {"started_at": report["started_at"]})
+            publish_workspace(workspace)
+            if "generation" in report:
+                print(f"\nPublished generation {report['generation']}")
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+    save_state(state_path, code)
+    write_report(report, Path(args.report), args.history)
+    print(f"\nAll data rebuilt successfully in {report['wall_s']:.2f}s "
+          f"(critical path {report['critical_path_s']:.2f}s, {len(skipped)} stages skipped).")
 
 if __name__ == "__main__":
     main()
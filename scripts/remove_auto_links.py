@@ -1,6 +1,10 @@
 import json
 from pathlib import Path
 
+from extract_menus import write_menu_shards
+from generations import write_text_atomic
+from profiling import run_cli
+
 DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "menus.json"
 APP_DATA_PATH = Path(__file__).resolve().parents[1] / "app" / "public" / "data" / "menus.json"
 
@@ -34,11 +38,13 @@ def main():
     menus = data.get("menus", [])
     removed = prune(menus)
 
-    DATA_PATH.write_text(json.dumps({"menus": menus}, indent=2, ensure_ascii=True), encoding="utf-8")
-    APP_DATA_PATH.write_text(json.dumps({"menus": menus}, indent=2, ensure_ascii=True), encoding="utf-8")
+    write_text_atomic(DATA_PATH, json.dumps({"menus": menus}, indent=2, ensure_ascii=True))
+    write_text_atomic(APP_DATA_PATH, json.dumps({"menus": menus}, indent=2, ensure_ascii=True))
+    write_menu_shards(menus, DATA_PATH.parent)
+    write_menu_shards(menus, APP_DATA_PATH.parent)
 
     print(f"Removed auto-added links: {removed}")
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
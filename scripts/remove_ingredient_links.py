@@ -2,12 +2,26 @@
 """
 Script to remove URLs from ingredient bullets in recipe markdown files.
 Also removes incorrect main recipe links at the end of files.
+
+The sha256 of every file known to be clean is kept in
+data/recipe_cleanup_cache.json, so only new or edited recipes are scanned.
+Those are cleaned over a process pool (--jobs) and all changes are reported
+together at the end (--dry-run reports without writing).
 """
 
+import argparse
+import hashlib
+import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-RECIPES_DIR = Path(__file__).resolve().parents[1] / "Recipes"
+from profiling import run_cli
+
+ROOT = Path(__file__).resolve().parents[1]
+RECIPES_DIR = ROOT / "Recipes"
+CACHE_PATH = ROOT / "data" / "recipe_cleanup_cache.json"
 
 # Pattern to match markdown links: [text](url)
 MD_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
@@ -20,6 +34,13 @@ UNDERLINED_LINK_PATTERN = re.compile(r'<u>\[([^\]]+)\]\(([^)]+)\)</u>')
 # https://url](https://url)
 MALFORMED_LINK_PATTERN = re.compile(r'\[\s*\n\s*(https?://[^\]]+)\]\([^)]+\)\s*$', re.MULTILINE)
 
+# Underlined and plain links in one pass over the whole file. Links never span
+# lines, which keeps this equivalent to running both patterns line by line.
+ANY_LINK_PATTERN = re.compile(
+    r'<u>\[(?P<u_text>[^\]\r\n]+)\]\((?P<u_url>[^)\r\n]+)\)</u>'
+    r'|\[(?P<text>[^\]\r\n]+)\]\((?P<url>[^)\r\n]+)\)'
+)
+
 
 def should_keep_link(url):
     """
@@ -55,60 +76,119 @@ def remove_links_from_line(line):
     return line
 
 
+def _replace_any_link(match):
+    url = match.group('u_url') or match.group('url')
+    if should_keep_link(url):
+        return match.group(0)
+    return match.group('u_text') or match.group('text')
+
+
+def clean_recipe_text(content):
+    """Return content with malformed trailing links and non-attachment links removed."""
+    content = MALFORMED_LINK_PATTERN.sub('', content)
+    return ANY_LINK_PATTERN.sub(_replace_any_link, content)
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
 def clean_recipe_file(file_path):
     """
     Clean a recipe file by removing ingredient links and malformed recipe links.
     Returns True if changes were made.
     """
     content = file_path.read_text(encoding='utf-8')
-    original_content = content
-    
-    # Remove malformed links at end of file
-    content = MALFORMED_LINK_PATTERN.sub('', content)
-    
-    # Process line by line to remove ingredient links
-    lines = content.splitlines(keepends=True)
-    new_lines = []
-    
-    for line in lines:
-        new_line = remove_links_from_line(line)
-        new_lines.append(new_line)
-    
-    content = ''.join(new_lines)
-    
-    # Check if changes were made
-    if content != original_content:
-        file_path.write_text(content, encoding='utf-8')
+    cleaned = clean_recipe_text(content)
+    if cleaned != content:
+        file_path.write_text(cleaned, encoding='utf-8')
         return True
-    
     return False
 
 
+def _clean_job(job):
+    name, content = job
+    cleaned = clean_recipe_text(content)
+    return name, cleaned if cleaned != content else None
+
+
+def load_cache(path=CACHE_PATH):
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8')).get('clean', {})
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(clean, path=CACHE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({'clean': dict(sorted(clean.items()))}, indent=2, ensure_ascii=True), encoding='utf-8')
+
+
+def clean_recipes(recipe_files, cache=None, jobs=1):
+    """
+    Clean every file whose content hash is not already recorded as clean.
+    Returns ({name: cleaned_content} for files that change, updated cache, skipped count).
+    Nothing is written here; the caller applies the changes in one go.
+    """
+    cache = dict(cache or {})
+    contents = {}
+    skipped = 0
+    for path in recipe_files:
+        content = path.read_text(encoding='utf-8')
+        if cache.get(path.name) == content_hash(content):
+            skipped += 1
+            continue
+        contents[path.name] = content
+
+    jobs_list = sorted(contents.items())
+    if jobs > 1 and len(jobs_list) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_clean_job, jobs_list, chunksize=max(1, len(jobs_list) // (jobs * 4))))
+    else:
+        results = [_clean_job(job) for job in jobs_list]
+
+    changes = {}
+    for name, cleaned in results:
+        if cleaned is not None:
+            changes[name] = cleaned
+        cache[name] = content_hash(cleaned if cleaned is not None else contents[name])
+    present = {path.name for path in recipe_files}
+    cache = {name: digest for name, digest in cache.items() if name in present}
+    return changes, cache, skipped
+
+
 def main():
     """
     Process all recipe markdown files and remove ingredient/recipe links.
     """
+    parser = argparse.ArgumentParser(description="Remove ingredient and malformed links from recipe notes.")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Rescan files already recorded as clean")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing files")
+    args = parser.parse_args()
+
     recipe_files = sorted(RECIPES_DIR.glob("*.md"))
-    
     print(f"Processing {len(recipe_files)} recipe files...")
-    
-    modified_count = 0
-    modified_files = []
-    
-    for recipe_file in recipe_files:
-        if clean_recipe_file(recipe_file):
-            modified_count += 1
-            modified_files.append(recipe_file.name)
-            print(f"  ✓ Cleaned: {recipe_file.name}")
-    
-    print(f"\nModified {modified_count} recipe files:")
-    for name in modified_files:
+
+    cache = {} if args.force else load_cache()
+    changes, cache, skipped = clean_recipes(recipe_files, cache, args.jobs)
+
+    if not args.dry_run:
+        for name, content in changes.items():
+            (RECIPES_DIR / name).write_text(content, encoding='utf-8')
+        save_cache(cache)
+
+    print(f"Skipped {skipped} files already recorded as clean.")
+    verb = "Would modify" if args.dry_run else "Modified"
+    print(f"\n{verb} {len(changes)} recipe files:")
+    for name in sorted(changes):
         print(f"  - {name}")
-    
-    if modified_count > 0:
+
+    if changes and not args.dry_run:
         print("\nRemember to regenerate data files by running:")
         print("  python scripts/extract_menus.py")
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Optional local data server for the app: indexed, paginated queries over the
+published pipeline outputs instead of whole-file downloads.
+
+The published files in app/public/data are loaded once into memory (items with
+a FacetIndex, menus newest first, recipes by file, and the prebuilt
+search_index.json, which is only rebuilt here when it is missing or older than
+the items or recipes it indexes) and served
+over a small asyncio HTTP/1.1 server with keep-alive, gzip and ETags. Every
+response carries an ETag derived from the loaded data version, so clients
+revalidate with If-None-Match and get a 304 until the pipeline publishes new
+data; the files are polled and reloaded in the background when they change.
+With --generations the server reads the current rebuild generation (see
+generations.py) instead, so it only ever loads a complete output set and
+reloads when the CURRENT pointer flips.
+
+Endpoints (all GET):
+  /api/version
+  /api/items?season=&meal_type=&protein=&domain=&tag=&has_link=&q=&sort=count|title&offset=&limit=&facets=1
+  /api/items/<id>
+  /api/facets?<same filters>
+  /api/menus?season=&offset=&limit=          (newest first, without items)
+  /api/menus/<file>                          (e.g. /api/menus/Menus/Menu%20week%20of%201-16-26.md)
+  /api/recipes?q=&offset=&limit=             (without note text)
+  /api/recipes/<file>
+  /data/<name>.json                          (the published file as-is)
+
+Usage:
+  python3 scripts/serve_data.py --port 8765
+  python3 scripts/serve_data.py --generations
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import time
+import traceback
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from build_item_facets import FacetIndex, normalize_value
+from build_search_index import SearchIndex, build_index
+from generations import GenerationStore
+from profiling import run_cli
+
+APP_DATA_DIR = Path(__file__).resolve().parents[1] / "app" / "public" / "data"
+
+ITEMS_NAME = "menu_items_refactored.json"
+MENUS_NAME = "menus.json"
+RECIPES_NAME = "recipes.json"
+SEARCH_INDEX_NAME = "search_index.json"
+
+HOST = "127.0.0.1"
+PORT = 8765
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+GZIP_MIN_BYTES = 1024
+RELOAD_INTERVAL = 1.0
+
+# Query parameter -> FacetIndex facet.
+FILTER_PARAMS = {
+    "season": "season",
+    "meal_type": "meal_type",
+    "protein": "main_protein",
+    "domain": "domain",
+    "tag": "recipe_tag",
+    "has_link": "has_link",
+}
+
+STATUS_TEXT = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _read_json(path, key):
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8")).get(key, [])
+
+
+def load_search_index(data_dir, items, recipes):
+    """The published search index, or one built from items/recipes if it is missing or stale.
+
+    The rebuild writes search_index.json after the items and recipes, so an
+    index older than either (an edit folded in since) no longer matches them.
+    """
+    path = Path(data_dir) / SEARCH_INDEX_NAME
+    sources = [Path(data_dir) / name for name in (ITEMS_NAME, RECIPES_NAME)]
+    try:
+        mtime = path.stat().st_mtime_ns
+        if all(mtime >= p.stat().st_mtime_ns for p in sources if p.exists()):
+            index = SearchIndex.load(path)
+            if len(index.docs) == len(items) + len(recipes):
+                return index
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    return SearchIndex(build_index(items, recipes))
+
+
+def data_stamp(data_dir):
+    """(name, mtime_ns, size) of every published JSON file; a change triggers a reload."""
+    return tuple(
+        (p.name, p.stat().st_mtime_ns, p.stat().st_size)
+        for p in sorted(Path(data_dir).glob("*.json"))
+    )
+
+
+class DataStore:
+    """Everything one data version serves, built once per (re)load."""
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        self.stamp = data_stamp(self.data_dir)
+        self.items = _read_json(self.data_dir / ITEMS_NAME, "items")
+        self.menus = sorted(
+            _read_json(self.data_dir / MENUS_NAME, "menus"),
+            key=lambda m: (m.get("week_of_date") or "", m.get("file") or ""),
+            reverse=True,
+        )
+        self.recipes = _read_json(self.data_dir / RECIPES_NAME, "recipes")
+        self.menus_by_file = {m.get("file"): m for m in self.menus}
+        self.recipes_by_file = {r.get("file"): r for r in self.recipes}
+        self.facets = FacetIndex.from_items(self.items)
+        self.search = load_search_index(self.data_dir, self.items, self.recipes)
+        digest = hashlib.sha256(repr(self.stamp).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+        self.loaded_at = time.time()
+        self._static = {}
+
+    def static_file(self, name):
+        """Return (body, gzipped body) for a published JSON file, compressed once per version."""
+        if name not in self._static:
+            path = self.data_dir / name
+            if "/" in name or not name.endswith(".json") or not path.is_file():
+                raise HTTPError(404, f"no such data file: {name}")
+            body = path.read_bytes()
+            self._static[name] = (body, gzip.compress(body, 6))
+        return self._static[name]
+
+
+def query_filters(params):
+    filters = {}
+    for param, facet in FILTER_PARAMS.items():
+        values = [v for raw in params.get(param, []) for v in raw.split(",") if v]
+        if values:
+            filters[facet] = [normalize_value(v) for v in values]
+    return filters
+
+
+def page_params(params):
+    try:
+        offset = max(0, int(params.get("offset", ["0"])[0]))
+        limit = min(MAX_LIMIT, max(1, int(params.get("limit", [str(DEFAULT_LIMIT)])[0])))
+    except ValueError:
+        raise HTTPError(400, "offset and limit must be integers")
+    return offset, limit
+
+
+def page(rows, offset, limit):
+    return {"total": len(rows), "offset": offset, "limit": limit, "results": rows[offset:offset + limit]}
+
+
+def search_ids(store, query, doc_type):
+    hits = store.search.search(query, limit=len(store.search.docs))
+    if doc_type == "item":
+        return [h["id"] for h in hits if h["type"] == "item"]
+    return [h["file"] for h in hits if h["type"] == "recipe"]
+
+
+def api_items(store, params):
+    filters = query_filters(params)
+    ids = store.facets.item_ids(filters)
+    query = params.get("q", [""])[0]
+    if query:
+        matched = set(search_ids(store, query, "item"))
+        ids = [i for i in ids if i in matched]
+    sort = params.get("sort", ["count"])[0]
+    if sort == "title":
+        ids.sort(key=lambda i: ((store.items[i].get("item_texts") or [""])[0].lower(), i))
+    elif sort == "count":
+        ids.sort(key=lambda i: (-(store.items[i].get("count") or 0), i))
+    else:
+        raise HTTPError(400, "sort must be count or title")
+    offset, limit = page_params(params)
+    out = page([{"id": i, **store.items[i]} for i in ids[offset:offset + limit]], 0, limit)
+    out.update(total=len(ids), offset=offset)
+    if params.get("facets", ["0"])[0] == "1":
+        out["facets"] = store.facets.counts(filters)
+    return out
+
+
+def api_menus(store, params):
+    seasons = {normalize_value(v) for raw in params.get("season", []) for v in raw.split(",") if v}
+    rows = [
+        {
+            "file": m.get("file"),
+            "title": m.get("title"),
+            "week_of_date": m.get("week_of_date"),
+            "season": m.get("season"),
+            "item_count": len(m.get("items", [])),
+        }
+        for m in store.menus
+        if not seasons or normalize_value(m.get("season")) in seasons
+    ]
+    return page(rows, *page_params(params))
+
+
+def api_recipes(store, params):
+    query = params.get("q", [""])[0]
+    recipes = store.recipes
+    if query:
+        matched = set(search_ids(store, query, "recipe"))
+        recipes = [r for r in recipes if r.get("file") in matched]
+    rows = [{k: v for k, v in r.items() if k != "text"} for r in recipes]
+    return page(rows, *page_params(params))
+
+
+def route(store, path, params):
+    """Return the JSON-serializable payload for an /api path."""
+    parts = [unquote(p) for p in path.strip("/").split("/")]
+    if parts[:1] != ["api"] or len(parts) < 2:
+        raise HTTPError(404, "not found")
+    name, rest = parts[1], "/".join(parts[2:])
+    if name == "version" and not rest:
+        return {"version": store.version, "loaded_at": store.loaded_at}
+    if name == "items":
+        if not rest:
+            return api_items(store, params)
+        if rest.isdigit() and int(rest) < len(store.items):
+            return {"id": int(rest), **store.items[int(rest)]}
+        raise HTTPError(404, f"no item {rest}")
+    if name == "facets" and not rest:
+        return store.facets.counts(query_filters(params))
+    if name == "menus":
+        if not rest:
+            return api_menus(store, params)
+        if rest in store.menus_by_file:
+            return store.menus_by_file[rest]
+        raise HTTPError(404, f"no menu {rest}")
+    if name == "recipes":
+        if not rest:
+            return api_recipes(store, params)
+        if rest in store.recipes_by_file:
+            return store.recipes_by_file[rest]
+        raise HTTPError(404, f"no recipe {rest}")
+    raise HTTPError(404, "not found")
+
+
+class DataServer:
+    def __init__(self, data_dir=APP_DATA_DIR, reload_interval=RELOAD_INTERVAL, generations=None):
+        self._data_dir = Path(data_dir)
+        self.generations = generations
+        self.reload_interval = reload_interval
+        self.store = DataStore(self.data_dir)
+
+    @property
+    def data_dir(self):
+        """The published directory, or its copy in the current generation."""
+        if self.generations is None:
+            return self._data_dir
+        current = self.generations.path()
+        if current is None:
+            raise SystemExit("No data generation has been published yet; run rebuild_all_data.py")
+        return current / APP_DATA_DIR.relative_to(self.generations.root)
+
+    async def watch(self):
+        """Poll the published files and swap in a freshly built store when they change."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                data_dir = self.data_dir
+                if data_dir == self.store.data_dir and data_stamp(data_dir) == self.store.stamp:
+                    continue
+                store = await loop.run_in_executor(None, DataStore, data_dir)
+            except (OSError, ValueError) as exc:
+                # Mid-publish files can be missing or half written; try again next tick.
+                print(f"Reload skipped: {exc}")
+                continue
+            self.store = store
+            print(f"Reloaded data version {store.version}")
+
+    def respond(self, method, target, headers):
+        """Return (status, extra headers, body bytes) for one request."""
+        if method not in ("GET", "HEAD"):
+            raise HTTPError(405, "only GET and HEAD are supported")
+        store = self.store
+        url = urlsplit(target)
+        etag = '"{}-{}"'.format(store.version, hashlib.sha1(target.encode("utf-8")).hexdigest()[:12])
+        if etag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+            return 304, {"ETag": etag}, b""
+
+        accepts_gzip = "gzip" in headers.get("accept-encoding", "")
+        if url.path.startswith("/data/"):
+            body, gz = store.static_file(unquote(url.path[len("/data/"):]))
+            if accepts_gzip:
+                return 200, {"ETag": etag, "Content-Encoding": "gzip"}, gz
+            return 200, {"ETag": etag}, body
+
+        payload = route(store, url.path, parse_qs(url.query))
+        body = json.dumps(payload, separators=(",", ":"), ensure_ascii=True).encode("utf-8")
+        if accepts_gzip and len(body) >= GZIP_MIN_BYTES:
+            return 200, {"ETag": etag, "Content-Encoding": "gzip"}, gzip.compress(body, 6)
+        return 200, {"ETag": etag}, body
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                try:
+                    status, extra, body = self.respond(method, target, headers)
+                except HTTPError as exc:
+                    status, extra = exc.status, {}
+                    body = json.dumps({"error": str(exc)}).encode("utf-8")
+                except Exception:  # noqa: BLE001 - answer the client, log, keep serving
+                    print(f"Error handling {method} {target}:")
+                    traceback.print_exc()
+                    status, extra = 500, {}
+                    body = json.dumps({"error": "internal server error"}).encode("utf-8")
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                head = [
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                    "Content-Type: application/json; charset=utf-8",
+                    f"Content-Length: {len(body) if status != 304 else 0}",
+                    "Cache-Control: no-cache",
+                    "Vary: Accept-Encoding",
+                    "Access-Control-Allow-Origin: *",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                ] + [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD" and status != 304:
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        watcher = asyncio.create_task(self.watch())
+        addr = server.sockets[0].getsockname()
+        print(f"Serving {self.data_dir} on http://{addr[0]}:{addr[1]} (data version {self.store.version})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve indexed app data over HTTP.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--data-dir", default=str(APP_DATA_DIR), help="Published data directory")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                        help="Seconds between checks for newly published data")
+    parser.add_argument("--generations", action="store_true",
+                        help="Serve the current rebuild generation instead of --data-dir")
+    args = parser.parse_args()
+
+    generations = GenerationStore() if args.generations else None
+    server = DataServer(args.data_dir, args.reload_interval, generations)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    run_cli(main)
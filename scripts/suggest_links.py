@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Suggest recipe URLs for refactored items that have no link.
+
+Every known URL (refactored items, auto_add_links.MAPPING and recipe notes) is
+indexed by the tokens of its slug and link texts. Unlinked items are scored
+against that inverted index with TF-IDF cosine similarity in one batch, and the
+ranked candidates are written to data/link_suggestions.json for review.
+"""
+
+import argparse
+import json
+import math
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from auto_add_links import MAPPING
+from build_menu_items_refactored import get_primary_title
+from fix_refactored_item_titles import title_from_url
+from generations import write_text_atomic
+from normalization import tokenize
+from profiling import run_cli
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+ITEMS_PATH = DATA_DIR / "menu_items_refactored.json"
+RECIPES_PATH = DATA_DIR / "recipes.json"
+OUT_PATH = DATA_DIR / "link_suggestions.json"
+
+TOP_N = 3
+MIN_SCORE = 0.35
+
+
+def collect_url_documents(items, recipes):
+    """Map url -> {"title": str, "texts": [str]} from every source that knows a URL."""
+    docs = {}
+
+    def add(url, text=None):
+        if not url or not url.startswith(("http://", "https://")):
+            return
+        doc = docs.setdefault(url, {"title": None, "texts": []})
+        slug_title = title_from_url(url)
+        if slug_title and slug_title not in doc["texts"]:
+            doc["texts"].append(slug_title)
+        if text and text not in doc["texts"] and not text.startswith(("http://", "https://")):
+            doc["texts"].append(text)
+        doc["title"] = doc["title"] or text or slug_title
+
+    for item in items:
+        for url in [item.get("url")] + item.get("urls", []):
+            add(url, get_primary_title(item))
+            for text in item.get("link_texts", []):
+                add(url, text)
+    for info in MAPPING.values():
+        add(info["url"], info["title"])
+    for recipe in recipes:
+        for link in recipe.get("links", []):
+            add(link.get("url"), recipe.get("title"))
+        for url in recipe.get("urls", []):
+            add(url, recipe.get("title"))
+    return docs
+
+
+def build_index(docs):
+    """Return (postings, idf, norms): token -> [(url, weight)], token -> idf, url -> norm."""
+    tfs = {url: Counter(t for text in doc["texts"] for t in set(tokenize(text))) for url, doc in docs.items()}
+    df = Counter(t for tf in tfs.values() for t in tf)
+    total = len(tfs)
+    idf = {t: math.log((1 + total) / (1 + n)) + 1 for t, n in df.items()}
+
+    postings = defaultdict(list)
+    norms = {}
+    for url, tf in tfs.items():
+        weights = {t: (1 + math.log(c)) * idf[t] for t, c in tf.items()}
+        norms[url] = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        for t, w in weights.items():
+            postings[t].append((url, w))
+    return postings, idf, norms
+
+
+def rank_candidates(query_texts, postings, idf, norms, top_n=TOP_N, min_score=MIN_SCORE):
+    tf = Counter(t for text in query_texts for t in set(tokenize(text)))
+    weights = {t: (1 + math.log(c)) * idf[t] for t, c in tf.items() if t in idf}
+    q_norm = math.sqrt(sum(w * w for w in weights.values()))
+    if not q_norm:
+        return []
+    scores = defaultdict(float)
+    for t, qw in weights.items():
+        for url, dw in postings[t]:
+            scores[url] += qw * dw
+    ranked = sorted(
+        ((score / (q_norm * norms[url]), url) for url, score in scores.items()),
+        key=lambda x: (-x[0], x[1]),
+    )
+    return [(url, round(score, 3)) for score, url in ranked[:top_n] if score >= min_score]
+
+
+def suggest(items, recipes, top_n=TOP_N, min_score=MIN_SCORE):
+    docs = collect_url_documents(items, recipes)
+    postings, idf, norms = build_index(docs)
+    suggestions = []
+    for idx, item in enumerate(items):
+        if item.get("url") or item.get("urls"):
+            continue
+        ranked = rank_candidates(item.get("item_texts", []), postings, idf, norms, top_n, min_score)
+        if not ranked:
+            continue
+        suggestions.append({
+            "id": idx,
+            "title": get_primary_title(item),
+            "count": item.get("count", 0),
+            "candidates": [
+                {"url": url, "title": docs[url]["title"], "score": score}
+                for url, score in ranked
+            ],
+        })
+    suggestions.sort(key=lambda s: (-s["candidates"][0]["score"], -s["count"]))
+    return suggestions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suggest URLs for unlinked menu items.")
+    parser.add_argument("--top", type=int, default=TOP_N, help="Candidates per item")
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE, help="Minimum cosine score")
+    args = parser.parse_args()
+
+    items = json.loads(ITEMS_PATH.read_text(encoding="utf-8")).get("items", [])
+    recipes = json.loads(RECIPES_PATH.read_text(encoding="utf-8")).get("recipes", [])
+    suggestions = suggest(items, recipes, args.top, args.min_score)
+
+    write_text_atomic(OUT_PATH, json.dumps({"suggestions": suggestions}, indent=2, ensure_ascii=True))
+
+    unlinked = sum(1 for item in items if not (item.get("url") or item.get("urls")))
+    print(f"Unlinked items: {unlinked}")
+    print(f"Items with suggestions: {len(suggestions)}")
+
+
+if __name__ == "__main__":
+    run_cli(main)
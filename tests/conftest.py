@@ -0,0 +1,61 @@
+"""Shared fixtures: a rebuilt copy of the repository to run pipeline scripts in.
+
+The scripts derive every path from their own location, so tests run them in a
+copy of the repo (scripts, notes, decisions and the tracked data) rather than
+against the working tree.
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO / "scripts"))
+
+COPIED = [
+    "scripts", "Menus", "Recipes", "data", "app/public", "docs",
+    "menu_item_decisions.json", "merge_items_tool.html",
+]
+# Local state a developer's earlier rebuilds leave behind.
+IGNORED = shutil.ignore_patterns(
+    "__pycache__", "generations", "http_cache", "item_history",
+    "rebuild_state.json", "rebuild_report.json", "edit_journal.jsonl",
+)
+
+
+def run_script(root, script, *args):
+    """Run scripts/<script> in root; returns its stdout and fails the test on a non-zero exit."""
+    result = subprocess.run(
+        [sys.executable, f"scripts/{script}", *args],
+        cwd=root, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, f"{script} {' '.join(args)} failed:\n{result.stdout}{result.stderr}"
+    return result.stdout
+
+
+def copy_tree(src, dst, ignore=None):
+    for name in COPIED:
+        path = src / name
+        if path.is_dir():
+            shutil.copytree(path, dst / name, ignore=ignore, symlinks=True)
+        elif path.exists():
+            (dst / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, dst / name)
+    return dst
+
+
+@pytest.fixture(scope="session")
+def rebuilt_repo(tmp_path_factory):
+    """A repo copy after one full rebuild; shared, so tests must not modify it."""
+    root = copy_tree(REPO, tmp_path_factory.mktemp("repo"), IGNORED)
+    run_script(root, "rebuild_all_data.py", "--force")
+    return root
+
+
+@pytest.fixture
+def repo(rebuilt_repo, tmp_path):
+    """A private copy of the rebuilt repo for one test to modify."""
+    return copy_tree(rebuilt_repo, tmp_path / "repo")
@@ -0,0 +1,51 @@
+import hashlib
+import json
+
+from conftest import run_script
+
+
+def image_names(root):
+    return json.loads((root / "data/image_names.json").read_text(encoding="utf-8"))["images"]
+
+
+def test_every_tree_references_the_one_stored_copy(rebuilt_repo):
+    stored = set(image_names(rebuilt_repo).values())
+    images = rebuilt_repo / "app/public/images"
+    assert stored == {p.name for p in images.iterdir()}
+    for name in stored:
+        assert name.split(".")[0] == hashlib.sha256((images / name).read_bytes()).hexdigest()[:16]
+    assert (rebuilt_repo / "docs/images").resolve() == images.resolve()
+
+    for data in ("app/public/data/recipes_index.json", "app/public/data/recipes.json", "docs/data/recipes.json"):
+        recipes = json.loads((rebuilt_repo / data).read_text(encoding="utf-8"))["recipes"]
+        urls = [a["url"] for r in recipes for a in r.get("attachments", [])]
+        assert urls, data
+        assert {u.rpartition("/")[2] for u in urls} <= stored, data
+
+
+def test_exports_are_copied_in_and_replaced_objects_pruned(repo):
+    source_dir = repo / "Recipes/images"
+    source_dir.mkdir(exist_ok=True)
+    source = source_dir / "0000-NEW.jpeg"
+    source.write_bytes(b"first")
+    run_script(repo, "build_image_store.py")
+    old = repo / "app/public/images" / image_names(repo)["0000-NEW.jpeg"]
+    assert old.read_bytes() == b"first"
+
+    source.write_bytes(b"second")  # edit the export in place
+    run_script(repo, "build_image_store.py")
+    new = repo / "app/public/images" / image_names(repo)["0000-NEW.jpeg"]
+    assert new.read_bytes() == b"second"
+    assert not old.exists()
+
+
+def test_missing_exports_keep_the_store(repo):
+    before = image_names(repo)
+    source_dir = repo / "Recipes/images"
+    if source_dir.exists():
+        for path in source_dir.iterdir():
+            path.unlink()
+        source_dir.rmdir()
+    run_script(repo, "build_image_store.py")
+    assert image_names(repo) == before
+    assert {p.name for p in (repo / "app/public/images").iterdir()} == set(before.values())
@@ -0,0 +1,27 @@
+from build_item_cooccurrence import CooccurrenceMatrix
+
+
+def item(key, *menu_files):
+    return {"url": f"https://example.com/{key}", "menu_files": list(menu_files)}
+
+
+ITEMS = [
+    item("tacos", "w1", "w2"),
+    item("rice", "w1", "w2"),
+    item("salad", "w1"),
+    item("soup", "w2"),
+]
+
+
+def test_loaded_matrix_takes_new_top_k(tmp_path):
+    path = tmp_path / "item_cooccurrence.json"
+    CooccurrenceMatrix.from_items(ITEMS, top_k=1).save(path)
+    matrix = CooccurrenceMatrix.load(path)
+    matrix.set_top_k(3)
+    matrix.set_week("w3", ["https://example.com/tacos", "https://example.com/soup"])
+    assert matrix.to_dict()["top_k"] == 3
+    assert matrix.pairings("https://example.com/tacos") == [
+        ("https://example.com/rice", 2),
+        ("https://example.com/soup", 2),
+        ("https://example.com/salad", 1),
+    ]
@@ -0,0 +1,19 @@
+from build_recipe_matches import build_matches
+
+
+def test_every_url_of_a_matched_item_resolves_to_its_recipe():
+    items = [
+        {"url": "https://a.example/tacos", "urls": ["https://a.example/tacos", "https://b.example/tacos"],
+         "item_texts": ["Chicken tacos"]},
+        {"url": None, "urls": [], "item_texts": ["Baja grain bowls"]},
+    ]
+    recipes = [
+        {"file": "Recipes/Tacos.md", "title": "Tacos", "links": [], "urls": ["https://b.example/tacos/"]},
+        {"file": "Recipes/Baja grain bowls.md", "title": "Baja grain bowls", "links": [], "urls": []},
+    ]
+    matches = build_matches(recipes, items)
+
+    assert matches["item_to_recipe"]["https://a.example/tacos"]["recipe"] == "Recipes/Tacos.md"
+    assert matches["url_to_item"] == {"https://b.example/tacos": "https://a.example/tacos"}
+    assert matches["item_to_recipe"]["title::baja grain bowls"]["recipe"] == "Recipes/Baja grain bowls.md"
+    assert matches["recipe_to_items"]["Recipes/Baja grain bowls.md"]["items"] == ["title::baja grain bowls"]
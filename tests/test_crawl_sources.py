@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawl_sources import Checkpoint, CrawlScheduler
+from fetch_recipes import ConnectionPool, Fetcher, HTTPCache
+
+PAGE = b"""<html><head><title>Chili</title></head>
+<body><ul class="ingredients"><li>1 lb beef</li><li>1 can beans</li></ul></body></html>"""
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Fail the first `failures` requests for each path with a 503, then serve the page."""
+
+    protocol_version = "HTTP/1.1"
+    failures = 0
+    seen = {}
+
+    def do_GET(self):
+        self.seen[self.path] = self.seen.get(self.path, 0) + 1
+        ok = self.seen[self.path] > self.failures
+        body = PAGE if ok else b""
+        self.send_response(200 if ok else 503)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FlakyHandler.seen = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def crawl(server, tmp_path, failures, max_attempts):
+    FlakyHandler.failures = failures
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json", reset=True)
+    fetcher = Fetcher(HTTPCache(tmp_path / "cache"), ConnectionPool(), 0)
+    scheduler = CrawlScheduler(fetcher, checkpoint, delay=0, max_attempts=max_attempts, backoff=0.05)
+    urls = [f"{server}/chili", f"{server}/stew"]
+    asyncio.run(scheduler.run({"127.0.0.1": urls}))
+    return checkpoint, scheduler.stats()["127.0.0.1"]
+
+
+def test_failed_urls_are_retried_within_the_run(server, tmp_path):
+    checkpoint, stats = crawl(server, tmp_path, failures=2, max_attempts=3)
+
+    assert sorted(checkpoint.completed) == [f"{server}/chili", f"{server}/stew"]
+    assert checkpoint.failed == {}
+    assert FlakyHandler.seen == {"/chili": 3, "/stew": 3}
+    assert (stats["ok"], stats["failed"]) == (2, 4)
+
+
+def test_retries_stop_at_max_attempts(server, tmp_path):
+    checkpoint, _ = crawl(server, tmp_path, failures=5, max_attempts=2)
+
+    assert checkpoint.completed == {}
+    assert {url: entry["attempts"] for url, entry in checkpoint.failed.items()} == {
+        f"{server}/chili": 2,
+        f"{server}/stew": 2,
+    }
+    assert FlakyHandler.seen == {"/chili": 2, "/stew": 2}
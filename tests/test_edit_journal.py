@@ -0,0 +1,100 @@
+import json
+import subprocess
+import sys
+
+from conftest import run_script
+
+URL = "https://pinchofyum.com/the-best-chicken-tinga-tacos"
+
+
+def load_items(root):
+    return json.loads((root / "data" / "menu_items_refactored.json").read_text(encoding="utf-8"))["items"]
+
+
+def find_item(root, url):
+    return next(item for item in load_items(root) if item.get("url") == url)
+
+
+def apply_edits(root, entries):
+    """Call edit_journal.apply_edits inside the repo copy, as fetch/crawl/import do."""
+    code = (
+        "import json, sys; sys.path.insert(0, 'scripts'); "
+        "from edit_journal import apply_edits; print(apply_edits(json.loads(sys.argv[1])))"
+    )
+    subprocess.run([sys.executable, "-c", code, json.dumps(entries)], cwd=root, check=True)
+
+
+def test_applied_edits_show_now_and_survive_a_rebuild(repo):
+    apply_edits(repo, [{"op": "set_item_fields", "key": URL, "fields": {"ingredients": ["chicken", "chipotle"]}}])
+    assert find_item(repo, URL)["ingredients"] == ["chicken", "chipotle"]
+
+    run_script(repo, "rebuild_all_data.py")
+    assert find_item(repo, URL)["ingredients"] == ["chicken", "chipotle"]
+
+
+def load_menus(root):
+    return json.loads((root / "data" / "menus.json").read_text(encoding="utf-8"))["menus"]
+
+
+def write_journal(root, entries):
+    (root / "data" / "edit_journal.jsonl").write_text(
+        "".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8"
+    )
+
+
+def test_rebuild_replays_every_journal_operation(repo):
+    items = load_items(repo)
+    titled = [item for item in items if not item.get("url")]
+    merged, deleted, edited = titled[0], titled[1], titled[2]
+    merged_with = next(item for item in titled[3:] if item["item_texts"][0] != merged["item_texts"][0])
+    removed_menu = next(m for m in load_menus(repo) if m.get("week_of_date") and m["file"] in merged["menu_files"])
+    new_menu = {"file": "Menus/Week of 1-6-30.md", "title": "Week of 1-6-30", "week_of_date": "2030-01-06", "items": []}
+    new_url = "https://example.com/journal-chili"
+    title = edited["item_texts"][0]
+    write_journal(repo, [
+        {"op": "delete_menu", "file": removed_menu["file"]},
+        {"op": "add_menu", "menu": new_menu, "item_keys": [URL]},
+        {"op": "upsert_item", "item": {"url": new_url, "urls": [new_url], "item_texts": ["Journal chili"]}},
+        # A key written with other punctuation and case still resolves.
+        {"op": "set_item_fields", "key": f"title::{title.upper()}!", "fields": {"main_protein": "tofu"}},
+        {"op": "merge_items", "keys": [f"title::{merged['item_texts'][0]}", f"title::{merged_with['item_texts'][0]}"],
+         "title": "Journal merged"},
+        {"op": "delete_item", "key": f"title::{deleted['item_texts'][0]}"},
+    ])
+
+    def check(root):
+        items = load_items(root)
+        files = {m["file"] for m in load_menus(root)}
+        assert removed_menu["file"] not in files and new_menu["file"] in files
+        assert all(removed_menu["file"] not in item.get("menu_files", []) for item in items)
+        tacos = find_item(root, URL)
+        assert new_menu["file"] in tacos["menu_files"] and "2030-01-06" in tacos["menu_weeks"]
+        assert "winter" in tacos["menu_seasons"]
+        assert find_item(root, new_url)["item_texts"] == ["Journal chili"]
+        texts = [item.get("item_texts", []) for item in items]
+        assert next(item for item in items if item.get("item_texts") == edited["item_texts"])["main_protein"] == "tofu"
+        assert sum("Journal merged" in t for t in texts) == 1
+        assert not any(t == deleted["item_texts"] for t in texts)
+
+    run_script(repo, "rebuild_all_data.py")
+    check(repo)
+    first = load_items(repo)
+    # Replaying onto data that already holds the edits changes nothing.
+    run_script(repo, "edit_journal.py")
+    assert load_items(repo) == first
+    run_script(repo, "rebuild_all_data.py", "--force")
+    check(repo)
+
+
+def test_compaction_keeps_the_replay_result():
+    from edit_journal import compact_entries
+
+    entries = [
+        {"op": "set_item_fields", "key": URL, "fields": {"main_protein": "beef"}},
+        {"op": "add_menu", "menu": {"file": "Menus/a.md"}, "item_keys": []},
+        {"op": "set_item_fields", "key": URL, "fields": {"main_protein": "chicken"}},
+        {"op": "delete_menu", "file": "Menus/a.md"},
+        {"op": "delete_item", "key": "title::x"},
+        {"op": "set_item_fields", "key": URL, "fields": {"main_protein": "pork"}},
+    ]
+    assert compact_entries(entries) == [entries[2], entries[3], entries[4], entries[5]]
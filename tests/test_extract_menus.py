@@ -0,0 +1,76 @@
+import json
+
+from extract_menus import load_decision_index, parse_menu_file
+
+NOTE = """# Menu week of 1-5-26
+
+- [ ] Chicken tacos with [Cilantro lime rice](https://example.com/rice)
+- [ ] [Cilantro lime rice](https://example.com/rice)
+- [ ] [Sheet pan salmon](https://example.com/salmon) and [Lemons](https://example.com/lemons)
+"""
+DECISIONS = {"cilantro lime rice": "ingredient", "lemons": "delete"}
+
+
+def parse(tmp_path, note=NOTE, decisions=DECISIONS):
+    path = tmp_path / "Menus" / "Menu week of 1-5-26.md"
+    path.parent.mkdir()
+    path.write_text(note, encoding="utf-8")
+    return parse_menu_file(path, decisions)
+
+
+def test_mixed_line_keeps_its_other_dishes(tmp_path):
+    items = parse(tmp_path)["items"]
+    assert [item["text"] for item in items] == [
+        "Chicken tacos with Cilantro lime rice",
+        "Sheet pan salmon and Lemons",
+    ]
+    # Only the dropped links go; the line and its other links stay.
+    assert items[0]["links"] == []
+    assert items[1]["links"] == [{"text": "Sheet pan salmon", "url": "https://example.com/salmon"}]
+
+
+def test_line_that_is_only_a_dropped_dish_is_dropped(tmp_path):
+    texts = [item["text"] for item in parse(tmp_path)["items"]]
+    assert "Cilantro lime rice" not in texts
+
+
+def test_weekday_prefixed_lines_match_their_decisions(tmp_path):
+    decisions_path = tmp_path / "menu_item_decisions.json"
+    decisions_path.write_text(json.dumps([
+        {"id": 1, "title": "France 44", "decision": "delete"},
+        {"id": 2, "title": "Thursday: leftovers", "decision": "delete"},
+    ]), encoding="utf-8")
+    note = """# Menu week of 1-5-26
+
+- [x] Saturday: France 44
+- [ ] Thu - leftovers
+- [ ] Dinner: Sun-dried tomato pasta
+"""
+    items = parse(tmp_path, note, load_decision_index(decisions_path))["items"]
+    assert [(item["text"], item["meal_type"]) for item in items] == [("Sun-dried tomato pasta", "dinner")]
+
+
+def test_each_line_is_tokenized_for_links_once(tmp_path, monkeypatch):
+    import normalize_menus
+
+    calls = []
+    tokenize = normalize_menus.extract_link_tokens
+    monkeypatch.setattr(normalize_menus, "extract_link_tokens", lambda text: calls.append(text) or tokenize(text))
+    note = """# Menu week of 1-5-26
+
+- [ ] Chicken tacos with [Cilantro lime rice](https://example.com/rice)
+- [ ] [Sheet pan salmon](https://example.com/salmon)
+- [ ] Soup https://example.com/soup
+"""
+    for normalize in (False, True):
+        calls.clear()
+        path = tmp_path / str(normalize) / "Menus" / "Menu week of 1-5-26.md"
+        path.parent.mkdir(parents=True)
+        path.write_text(note, encoding="utf-8")
+        items = parse_menu_file(path, {}, normalize)["items"]
+        assert len(calls) == 3, normalize
+        assert [item["links"] or item["urls"] for item in items] == [
+            [{"text": "Cilantro lime rice", "url": "https://example.com/rice"}],
+            [{"text": "Sheet pan salmon", "url": "https://example.com/salmon"}],
+            ["https://example.com/soup"],
+        ]
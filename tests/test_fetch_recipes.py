@@ -0,0 +1,109 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fetch_recipes import ConnectionPool, Fetcher, HTTPCache, result_edits, scrape_html
+
+PAGE = b"""<html><head><title>Sheet Pan Salmon</title>
+<meta name="keywords" content="salmon, weeknight"></head>
+<body><ul class="ingredients"><li>1 lb salmon</li><li>2 lemons</li></ul></body></html>"""
+ETAG = '"v1"'
+
+
+class RecipeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/moved":
+            self.send_response(301)
+            self.send_header("Location", "/salmon")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RecipeHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RecipeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetcher(cache_dir, max_age=0):
+    return Fetcher(HTTPCache(cache_dir), ConnectionPool(), max_age)
+
+
+def test_cached_page_is_revalidated_with_its_etag(server, tmp_path):
+    first = fetcher(tmp_path)
+    html, final_url = first.fetch(f"{server}/salmon")
+    first.cache.save()
+    first.pool.close()
+    assert final_url == f"{server}/salmon"
+    assert first.stats["network"] == 1
+
+    # A new run loads the saved index and sends a conditional request.
+    second = fetcher(tmp_path)
+    again, _ = second.fetch(f"{server}/salmon")
+    second.pool.close()
+    assert again == html
+    assert second.stats == {"network": 0, "revalidated": 1, "fresh": 0}
+    assert RecipeHandler.requests == [("/salmon", None), ("/salmon", ETAG)]
+
+
+def test_fresh_cache_entry_skips_the_network(server, tmp_path):
+    first = fetcher(tmp_path)
+    first.fetch(f"{server}/salmon")
+    first.pool.close()
+    second = Fetcher(first.cache, ConnectionPool(), max_age=3600)
+    second.fetch(f"{server}/salmon")
+    second.pool.close()
+    assert second.stats["fresh"] == 1
+    assert len(RecipeHandler.requests) == 1
+
+
+def test_redirects_are_followed_and_cached_under_the_requested_url(server, tmp_path):
+    f = fetcher(tmp_path)
+    _, final_url = f.fetch(f"{server}/moved")
+    f.pool.close()
+    assert final_url == f"{server}/salmon"
+    assert f.cache.get(f"{server}/moved")["final_url"] == final_url
+
+
+def test_results_become_set_item_fields_edits():
+    url = "https://example.com/salmon"
+    items = [
+        {"url": url, "urls": [url], "link_texts": ["Sheet Pan Salmon"]},
+        {"url": "https://example.com/done", "urls": [], "ingredients": ["x"]},
+    ]
+    results = {url: scrape_html(PAGE.decode()), "https://example.com/done": scrape_html(PAGE.decode())}
+    assert result_edits(items, results) == [{
+        "op": "set_item_fields",
+        "key": url,
+        "fields": {
+            "ingredients": ["1 lb salmon", "2 lemons"],
+            "recipe_tags": ["salmon", "weeknight"],
+            "main_protein": "meat",
+        },
+    }]
@@ -0,0 +1,26 @@
+from find_near_duplicates import find_groups
+
+
+def item(text, url=None):
+    return {"url": url, "item_texts": [text], "link_texts": []}
+
+
+def test_url_less_item_does_not_bridge_distinct_urls():
+    items = [
+        item("Chicken tinga tacos", "https://example.com/tinga"),
+        item("Chicken tinga tacos"),
+        item("Chicken tinga tacos", "https://example.org/tinga-tacos"),
+    ]
+    groups = [ids for ids, _ in find_groups(items)]
+    assert groups
+    for ids in groups:
+        assert len({items[i]["url"] for i in ids if items[i]["url"]}) <= 1
+
+
+def test_allow_distinct_urls_groups_all():
+    items = [
+        item("Chicken tinga tacos", "https://example.com/tinga"),
+        item("Chicken tinga tacos"),
+        item("Chicken tinga tacos", "https://example.org/tinga-tacos"),
+    ]
+    assert [ids for ids, _ in find_groups(items, allow_distinct_urls=True)] == [[0, 1, 2]]
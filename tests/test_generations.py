@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import run_script
+from generations import GenerationStore, exchange, generation_order, write_text_atomic
+from merge_menu_items import regenerate_merge_tool
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "out").mkdir()
+    return GenerationStore(root=tmp_path, directory=tmp_path / "generations")
+
+
+def test_rollback_restores_atomically_written_outputs(store, tmp_path):
+    out = tmp_path / "out" / "data.json"
+    write_text_atomic(out, "one")
+    first = store.commit(["out"])
+    write_text_atomic(out, "two")
+    (tmp_path / "out" / "new.json").write_text("shard", encoding="utf-8")
+    store.commit(["out"])
+
+    store.checkout(first)
+    assert out.read_text(encoding="utf-8") == "one"
+    assert not (tmp_path / "out" / "new.json").exists()
+    assert store.current() == first
+
+
+def test_in_place_writes_are_detected_and_not_linked_again(store, tmp_path):
+    out = tmp_path / "out" / "data.json"
+    write_text_atomic(out, "one")
+    first = store.commit(["out"])
+    out.write_text("two, in place", encoding="utf-8")  # shares the inode with the first generation
+
+    assert store.changed_files(first) == ["out/data.json"]
+    with pytest.raises(ValueError):
+        store.checkout(first)
+
+    second = store.commit(["out"])
+    assert not os.path.samefile(out, store.path(second) / "out" / "data.json")
+    out.write_text("three, in place", encoding="utf-8")
+    assert store.changed_files(second) == []
+    assert (store.path(second) / "out" / "data.json").read_text(encoding="utf-8") == "two, in place"
+
+    store.checkout(first, force=True)
+    assert store.current() == first
+
+
+def test_merge_tool_is_replaced_not_rewritten(tmp_path):
+    items = tmp_path / "items.json"
+    items.write_text(json.dumps({"items": [{"item_texts": ["Tacos"], "count": 2}]}), encoding="utf-8")
+    tool = tmp_path / "merge_items_tool.html"
+    tool.write_text("old", encoding="utf-8")
+    link = tmp_path / "generation_copy.html"
+    os.link(tool, link)
+
+    regenerate_merge_tool(items, tool)
+    assert "Tacos" in tool.read_text(encoding="utf-8")
+    assert link.read_text(encoding="utf-8") == "old"
+
+
+def test_copied_generations_still_verify(store, tmp_path):
+    write_text_atomic(tmp_path / "out" / "data.json", "one")
+    first = store.commit(["out"])
+    shutil.copytree(store.directory, tmp_path / "copy")
+    copied = GenerationStore(root=tmp_path, directory=tmp_path / "copy")
+    assert copied.changed_files(first) == []
+
+
+def load_items(root):
+    return json.loads((root / "data" / "menu_items_refactored.json").read_text(encoding="utf-8"))["items"]
+
+
+def test_rebuild_then_rollback_restores_the_previous_generation(repo):
+    generations = GenerationStore(root=repo, directory=repo / "data" / "generations")
+    first = generations.current()
+    before = load_items(repo)
+    (repo / "data" / "edit_journal.jsonl").write_text(
+        json.dumps({"op": "delete_item", "key": before[0]["url"] or f"title::{before[0]['item_texts'][0]}"}) + "\n",
+        encoding="utf-8",
+    )
+    run_script(repo, "rebuild_all_data.py")
+    assert generations.current() != first
+    assert len(load_items(repo)) == len(before) - 1
+
+    out = run_script(repo, "generations.py", "--rollback")
+    assert f"Rolled back to generation {first}" in out
+    assert load_items(repo) == before
+    assert generations.current() == first
+
+
+def test_generation_ids_order_by_time_then_suffix(tmp_path):
+    ids = ["20261019T120000Z-10", "20261019T120000Z-2", "20261019T115959Z", "20261019T120000Z"]
+    for gen_id in ids:
+        (tmp_path / gen_id).mkdir()
+        (tmp_path / gen_id / "generation.json").write_text("{}", encoding="utf-8")
+    assert sorted(ids, key=generation_order) == GenerationStore(directory=tmp_path).generations() == [
+        "20261019T115959Z", "20261019T120000Z", "20261019T120000Z-2", "20261019T120000Z-10",
+    ]
+
+
+def test_exchange_swaps_directories(tmp_path):
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new" / "a.json").write_text("new", encoding="utf-8")
+    (tmp_path / "live").mkdir()
+    (tmp_path / "live" / "a.json").write_text("old", encoding="utf-8")
+    (tmp_path / "live" / "stale.json").write_text("old", encoding="utf-8")
+
+    exchange(tmp_path / "new", tmp_path / "live")
+    assert sorted(p.name for p in (tmp_path / "live").iterdir()) == ["a.json"]
+    assert (tmp_path / "live" / "a.json").read_text(encoding="utf-8") == "new"
+    assert (tmp_path / "new" / "stale.json").exists()
+
+
+def live_state(root):
+    files = ["data/menus.json", "data/menu_items_refactored.json",
+             "app/public/data/menus.json", "app/public/data/menu_items_refactored.json"]
+    return {f: ((root / f).stat().st_ino, (root / f).read_bytes()) for f in files}
+
+
+def test_a_failed_rebuild_leaves_the_live_trees_alone(repo):
+    before = live_state(repo)
+    # Unparseable before its last line, so the journal stage fails after earlier stages ran.
+    (repo / "data" / "edit_journal.jsonl").write_text("{not json\n{}\n", encoding="utf-8")
+    result = subprocess.run([sys.executable, "scripts/rebuild_all_data.py", "--force"], cwd=repo, capture_output=True)
+    assert result.returncode != 0
+
+    report = json.loads((repo / "data" / "rebuild_report.json").read_text(encoding="utf-8"))
+    assert report["failed_step"] == "scripts/edit_journal.py"
+    assert any(s["step"] == "scripts/extract_menus.py" and s["bytes_written"] for s in report["steps"])
+    assert live_state(repo) == before
+    assert not list((repo / "data" / "generations").glob(".stage-*"))
+
+
+def test_app_data_is_swapped_in_whole(repo):
+    app_data = repo / "app" / "public" / "data"
+    inode = app_data.stat().st_ino
+    run_script(repo, "rebuild_all_data.py", "--force")
+    assert app_data.stat().st_ino != inode
+
+    generations = GenerationStore(root=repo, directory=repo / "data" / "generations")
+    gen_dir = generations.path()
+    for rel_file in generations.manifest(generations.current())["files"]:
+        assert (repo / rel_file).read_bytes() == (gen_dir / rel_file).read_bytes(), rel_file
+    assert not list((repo / "data" / "generations").glob(".stage-*"))
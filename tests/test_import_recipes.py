@@ -0,0 +1,66 @@
+import json
+
+from conftest import run_script
+
+NEW_URL = "https://example.com/imported-lentil-soup"
+COPY_URL = "https://example.com/copied-recipe"
+EGGPLANT = ["1 eggplant", "1 can crushed tomatoes"]
+
+
+def load_items(root):
+    return json.loads((root / "data" / "menu_items_refactored.json").read_text(encoding="utf-8"))["items"]
+
+
+def item_with(items, url):
+    return next(item for item in items if url in (item.get("urls") or []))
+
+
+def recipe(name, url, ingredients):
+    return {"@context": "https://schema.org", "@type": "Recipe", "name": name, "url": url,
+            "recipeIngredient": ingredients}
+
+
+def write_dump(directory, *recipes):
+    directory.mkdir()
+    (directory / "recipes.jsonld").write_text(json.dumps(list(recipes)), encoding="utf-8")
+    return str(directory)
+
+
+def bare_item(root):
+    return next(item for item in load_items(root) if item.get("url") and not item.get("ingredients"))
+
+
+def test_imports_are_journaled_and_survive_a_rebuild(repo, tmp_path):
+    bare = bare_item(repo)
+    dump = write_dump(
+        tmp_path / "dump",
+        recipe("Backfilled", bare["url"], EGGPLANT),
+        recipe("Copy", COPY_URL, EGGPLANT),  # same recipe as the back-fill, under another URL
+        recipe("Imported Lentil Soup", NEW_URL, ["1 cup lentils", "1 quart stock", "2 carrots"]),
+    )
+
+    out = run_script(repo, "import_recipes.py", dump, "-j", "1")
+    assert "New items: 1" in out and "Back-filled items: 1" in out and "URLs added to known items: 1" in out
+
+    def check(items):
+        assert item_with(items, bare["url"])["ingredients"] == EGGPLANT
+        assert item_with(items, COPY_URL)["url"] == bare["url"]
+        assert item_with(items, NEW_URL)["item_texts"] == ["Imported Lentil Soup"]
+        assert sum(NEW_URL in (item.get("urls") or []) for item in items) == 1
+
+    check(load_items(repo))
+    run_script(repo, "rebuild_all_data.py")
+    check(load_items(repo))
+
+    # Everything is known now, so a second import changes nothing.
+    out = run_script(repo, "import_recipes.py", dump, "-j", "1")
+    assert "Duplicates skipped: 3" in out
+
+
+def test_url_only_import_is_written(repo, tmp_path):
+    bare = bare_item(repo)
+    run_script(repo, "import_recipes.py", write_dump(tmp_path / "first", recipe("Original", bare["url"], EGGPLANT)))
+
+    out = run_script(repo, "import_recipes.py", write_dump(tmp_path / "second", recipe("Copy", COPY_URL, EGGPLANT)))
+    assert "New items: 0" in out and "Back-filled items: 0" in out and "URLs added to known items: 1" in out
+    assert item_with(load_items(repo), COPY_URL)["url"] == bare["url"]
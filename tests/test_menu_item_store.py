@@ -0,0 +1,72 @@
+import json
+from collections import Counter
+
+from build_menu_items_refactored import item_key
+from conftest import REPO, run_script
+from menu_item_store import MenuItemStore, parse_menu
+
+# Weeks whose lines fold into URL items and title-merged items on a rebuild
+# ("Chicken Tinga Tacos", "Turkey", "Blue apron chicken", ...).
+MENUS = [
+    "Menus/Menu week of 11-19-22.md",
+    "Menus/Menu week of 4-16-18.md",
+    "Menus/Menu week of 1-31-22.md",
+    "Menus/Menu week of 4-10-22.md",
+]
+
+
+def signature(items):
+    """Items as a multiset, ignoring list order and the duplicates clean-up leaves."""
+    fields = ("menu_files", "urls", "link_texts", "item_texts", "meal_types", "side_dish")
+    return Counter(
+        (item_key(item),) + tuple(tuple(sorted(set(item.get(f) or []))) for f in fields)
+        for item in items
+    )
+
+
+def load_items(root):
+    return json.loads((root / "data" / "menu_items_refactored.json").read_text(encoding="utf-8"))["items"]
+
+
+def test_delete_then_replace_matches_rebuild(repo):
+    rebuilt = load_items(repo)
+    for menu_file in MENUS:
+        run_script(repo, "menu_item_store.py", "--delete", menu_file)
+    remaining = load_items(repo)
+    assert not any(set(MENUS) & set(item["menu_files"]) for item in remaining)
+    for menu_file in MENUS:
+        run_script(repo, "menu_item_store.py", "--replace", menu_file)
+    assert signature(load_items(repo)) == signature(rebuilt)
+
+
+def test_replacing_every_menu_matches_rebuild(rebuilt_repo):
+    store = MenuItemStore.load(rebuilt_repo / "data")
+    rebuilt = json.loads(json.dumps(store.items))
+    menu_files = list(store.menu_index)
+    for menu_file in menu_files:
+        store.remove_menu(menu_file)
+    assert store.compacted_items() == []
+    for menu_file in menu_files:
+        store.add_menu(parse_menu(menu_file))
+    assert Counter((item_key(i), tuple(sorted(i["menu_files"]))) for i in store.compacted_items()) == \
+        Counter((item_key(i), tuple(sorted(i["menu_files"]))) for i in rebuilt)
+
+
+def test_find_resolves_punctuation_variants(rebuilt_repo):
+    store = MenuItemStore.load(rebuilt_repo / "data")
+    item = store.find("title::Blue apron chicken")
+    assert item is not None
+    assert store.find("title::Blue apron: chicken") is item
+
+
+def test_save_writes_where_the_store_was_loaded(repo):
+    live = (REPO / "data" / "menu_items_refactored.json").read_bytes()
+    store = MenuItemStore.load(repo / "data")
+    store.remove_menu(MENUS[0])
+    store.save()
+    assert (REPO / "data" / "menu_items_refactored.json").read_bytes() == live
+    for data_dir in (repo / "data", repo / "app" / "public" / "data"):
+        items = json.loads((data_dir / "menu_items_refactored.json").read_text(encoding="utf-8"))["items"]
+        assert not any(MENUS[0] in item["menu_files"] for item in items)
+        index = json.loads((data_dir / "menu_item_index.json").read_text(encoding="utf-8"))["menus"]
+        assert MENUS[0] not in index
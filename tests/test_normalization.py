@@ -0,0 +1,41 @@
+import json
+
+from build_menu_items_refactored import canonical_item_key, item_key
+from conftest import REPO
+from normalization import ingredient_key, rules, title_key
+
+
+def test_punctuation_variants_share_one_item_key():
+    a = {"url": None, "item_texts": ["Blue apron: chicken"]}
+    b = {"url": None, "item_texts": ["Blue apron chicken"]}
+    assert item_key(a) == item_key(b) == f"title::{title_key('Blue apron chicken')}"
+    # Keys written before title_key (title::<lowercased title>) still resolve.
+    assert canonical_item_key("title::blue apron: chicken") == item_key(a)
+
+
+def test_app_defaults_match_the_exported_rules():
+    # The app uses these defaults until normalization_rules.json has loaded.
+    key = json.loads(json.dumps(rules()))["key"]
+    source = (REPO / "app" / "src" / "normalization.ts").read_text(encoding="utf-8")
+    assert f"new Set('{key['keep']}')" in source
+    for variant, canonical in key["fixups"]:
+        assert f"['{variant}', '{canonical}']" in source
+
+
+def test_app_ingredient_defaults_match_the_exported_rules():
+    ingredient = json.loads(json.dumps(rules()))["ingredient"]
+    source = (REPO / "app" / "src" / "normalization.ts").read_text(encoding="utf-8")
+    for dash, replacement in ingredient["dashes"].items():
+        assert f"'{dash}': '{replacement}'" in source
+    for unit, canonical in ingredient["unit_synonyms"].items():
+        assert f"{unit}: '{canonical}'" in source
+    # The shopping list filters removed ingredients through the shared key only.
+    page = (REPO / "app" / "src" / "MenuItemsPage.tsx").read_text(encoding="utf-8")
+    assert "import { ingredientKey } from './normalization'" in page
+    assert "normalizeIngredientKey" not in page
+
+
+def test_ingredient_key_folds_case_dashes_spacing_and_units():
+    assert ingredient_key("  2 Tablespoons  Olive oil ") == "2 tablespoon olive oil"
+    assert ingredient_key("1 teaspoons salt — fine") == "1 teaspoon salt - fine"
+    assert ingredient_key("tablespoonsful") == "tablespoonsful"
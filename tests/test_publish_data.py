@@ -0,0 +1,61 @@
+import json
+
+from publish_data import HASHED_DIR_NAME, MANIFEST_NAME, publish
+
+
+def publish_version(data_dir, n):
+    (data_dir / "menus.json").write_text(json.dumps({"menus": [n]}), encoding="utf-8")
+    manifest, _, _ = publish(data_dir)
+    return manifest["files"]["menus.json"]["path"].split("/")[-1]
+
+
+def hashed_names(data_dir):
+    return sorted(p.name for p in (data_dir / HASHED_DIR_NAME).iterdir())
+
+
+def test_only_the_current_and_previous_sets_are_kept(tmp_path):
+    first = publish_version(tmp_path, 1)
+    second = publish_version(tmp_path, 2)
+    assert hashed_names(tmp_path) == sorted([first, first + ".gz", second, second + ".gz"])
+
+    third = publish_version(tmp_path, 3)
+    assert hashed_names(tmp_path) == sorted([second, second + ".gz", third, third + ".gz"])
+
+    # Republishing unchanged data keeps the previous set rather than dropping it.
+    assert publish_version(tmp_path, 3) == third
+    assert hashed_names(tmp_path) == sorted([second, second + ".gz", third, third + ".gz"])
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert manifest["previous"]["menus.json"]["path"] == f"{HASHED_DIR_NAME}/{second}"
+
+
+def test_stray_hashed_files_are_pruned(tmp_path):
+    current = publish_version(tmp_path, 1)
+    (tmp_path / HASHED_DIR_NAME / "menus.0123456789.json").write_text("{}", encoding="utf-8")
+
+    publish_version(tmp_path, 1)
+    assert hashed_names(tmp_path) == sorted([current, current + ".gz"])
+
+
+def test_menu_shards_and_recipe_bodies_are_hashed(tmp_path):
+    (tmp_path / "menus").mkdir()
+    (tmp_path / "menus" / "2024.json").write_text(json.dumps({"menus": [1]}), encoding="utf-8")
+    (tmp_path / "menus" / "manifest.json").write_text(
+        json.dumps({"shards": [{"shard": "menus/2024.json"}]}), encoding="utf-8"
+    )
+    (tmp_path / "recipe_bodies").mkdir()
+    (tmp_path / "recipe_bodies" / "abc.md").write_text("# Soup\n", encoding="utf-8")
+
+    manifest, _, _ = publish(tmp_path)
+    for name in ("menus/2024.json", "menus/manifest.json", "recipe_bodies/abc.md"):
+        path = manifest["files"][name]["path"]
+        assert path.startswith(f"{HASHED_DIR_NAME}/{name.split('/')[0]}/")
+        assert (tmp_path / path).is_file()
+    body = manifest["files"]["recipe_bodies/abc.md"]["path"]
+    assert (tmp_path / body).read_text(encoding="utf-8") == "# Soup\n"
+
+    # A body that goes away is pruned once it is two sets old, and so is its empty directory.
+    (tmp_path / "recipe_bodies" / "abc.md").unlink()
+    publish(tmp_path)
+    (tmp_path / "menus" / "2024.json").write_text(json.dumps({"menus": [2]}), encoding="utf-8")
+    publish(tmp_path)
+    assert not (tmp_path / HASHED_DIR_NAME / "recipe_bodies").exists()
@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import subprocess
+
+from conftest import REPO, run_script
+from rebuild_all_data import STAGES
+
+
+def load_items(root):
+    return json.loads((root / "data" / "menu_items_refactored.json").read_text(encoding="utf-8"))["items"]
+
+
+def apply_plan(root, tmp_path, title):
+    items = load_items(root)
+    ids = [i for i, item in enumerate(items) if not item.get("url")][:2]
+    plan = tmp_path / "merge_plan_test.json"
+    plan.write_text(json.dumps({"groups": [{"title": title, "itemIds": ids}]}), encoding="utf-8")
+    run_script(root, "merge_menu_items.py", "--plan", str(plan))
+
+
+def test_item_history_is_declared_and_ignored(repo, tmp_path):
+    assert "data/item_history" in STAGES["scripts/merge_menu_items.py"]["outputs"]
+    apply_plan(repo, tmp_path, "Merged test item")
+    objects = sorted((repo / "data/item_history/objects").iterdir())
+    assert objects
+    for path in (objects[0], *sorted((repo / "data/item_history/snapshots").iterdir())):
+        rel = path.relative_to(repo).as_posix()
+        assert subprocess.run(["git", "check-ignore", "-q", rel], cwd=REPO).returncode == 0, rel
+
+
+def test_rebuild_replays_plans_and_leaves_the_merge_tool_alone(repo, tmp_path):
+    apply_plan(repo, tmp_path, "Merged test item")
+    tool = repo / "merge_items_tool.html"
+    before = (tool.stat().st_ino, tool.read_text(encoding="utf-8"))
+
+    run_script(repo, "rebuild_all_data.py")
+
+    titles = [text for item in load_items(repo) for text in item.get("item_texts", [])]
+    assert "Merged test item" in titles
+    assert (tool.stat().st_ino, tool.read_text(encoding="utf-8")) == before
+
+
+def test_undo_restores_the_items_before_the_plan(repo, tmp_path):
+    before = load_items(repo)
+    apply_plan(repo, tmp_path, "Merged test item")
+    assert load_items(repo) != before
+
+    run_script(repo, "merge_menu_items.py", "--undo")
+    assert load_items(repo) == before
+
+
+def test_report_measures_every_step(repo, tmp_path):
+    shutil.rmtree(repo / "app/public/data/hashed")
+    (repo / "app/public/data/manifest.json").unlink()
+    history = tmp_path / "history.jsonl"
+    run_script(repo, "rebuild_all_data.py", "--force", "--history", str(history))
+
+    report = json.loads((repo / "data/rebuild_report.json").read_text(encoding="utf-8"))
+    assert [json.loads(line) for line in history.read_text(encoding="utf-8").splitlines()] == [report]
+    assert [s["step"] for s in report["steps"]] == list(STAGES)
+    assert report["skipped"] == [] and 0 < report["critical_path_s"] <= report["wall_s"]
+    for stats in report["steps"]:
+        assert stats["returncode"] == 0
+        assert set(stats["input_records"]) == set(STAGES[stats["step"]]["inputs"])
+        assert set(stats["output_records"]) == set(STAGES[stats["step"]]["outputs"])
+        if os.name == "posix":
+            assert stats["cpu_s"] > 0 and stats["peak_rss_kb"] > 1024, stats["step"]
+
+    # Every file publish_data.py wrote counts, including those under hashed/ subdirectories.
+    publish = next(s for s in report["steps"] if s["step"] == "scripts/publish_data.py")
+    hashed = [p for p in (repo / "app/public/data/hashed").rglob("*") if p.is_file()]
+    assert any(p.parent.name == "menus" for p in hashed)
+    assert publish["output_records"]["app/public/data/hashed"] == len(hashed)
+    assert publish["bytes_written"] == (
+        sum(p.stat().st_size for p in hashed) + (repo / "app/public/data/manifest.json").stat().st_size
+    )
@@ -0,0 +1,82 @@
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import threading
+
+import pytest
+
+import serve_data
+from serve_data import DataServer, DataStore
+
+
+@pytest.fixture
+def data_dir(rebuilt_repo, tmp_path):
+    return shutil.copytree(rebuilt_repo / "app" / "public" / "data", tmp_path / "data")
+
+
+def test_published_search_index_is_loaded(data_dir, monkeypatch):
+    def fail(*args):
+        raise AssertionError("search index rebuilt instead of loaded")
+
+    monkeypatch.setattr(serve_data, "build_index", fail)
+    store = DataStore(data_dir)
+    assert store.search.search("tacos")
+
+
+def test_stale_search_index_is_rebuilt(data_dir):
+    index = data_dir / "search_index.json"
+    items = data_dir / "menu_items_refactored.json"
+    # An index from before the items changed: emptied, and older than the items.
+    data = json.loads(index.read_text(encoding="utf-8"))
+    data.update(docs=[], terms=[], postings=[], trigrams={})
+    index.write_text(json.dumps(data), encoding="utf-8")
+    stat = items.stat()
+    os.utime(index, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+
+    assert DataStore(data_dir).search.search("tacos")
+
+
+@pytest.fixture
+def server(data_dir):
+    """A DataServer on an ephemeral port, run on its own event loop thread."""
+    data_server = DataServer(data_dir)
+    started = threading.Event()
+    state = {}
+
+    async def serve():
+        state["loop"], state["stop"] = asyncio.get_running_loop(), asyncio.Event()
+        async with await asyncio.start_server(data_server.handle, "127.0.0.1", 0) as srv:
+            state["port"] = srv.sockets[0].getsockname()[1]
+            started.set()
+            await state["stop"].wait()
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    assert started.wait(5)
+    yield data_server, state["port"]
+    state["loop"].call_soon_threadsafe(state["stop"].set)
+    thread.join(5)
+
+
+def test_unexpected_errors_return_500_and_keep_serving(server, monkeypatch, capsys):
+    data_server, port = server
+    original = data_server.respond
+
+    def respond(method, target, headers):
+        if target == "/api/boom":
+            raise KeyError("boom")
+        return original(method, target, headers)
+
+    monkeypatch.setattr(data_server, "respond", respond)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", "/api/boom")
+    response = conn.getresponse()
+    assert response.status == 500
+    assert json.loads(response.read()) == {"error": "internal server error"}
+
+    conn.request("GET", "/api/version")  # same keep-alive connection
+    assert conn.getresponse().status == 200
+    conn.close()
+    assert "Error handling GET /api/boom" in capsys.readouterr().out